@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+# Politiques de débordement de la file d'attente
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+
+
+class ActivityLogger:
+    """Écriture asynchrone et groupée des logs d'activité.
+
+    Les entrées sont placées dans une file bornée en mémoire ; un thread de fond les
+    insère par lots (`insert_many`) dès que `batch_size` entrées sont en attente ou que
+    `flush_interval` secondes se sont écoulées. Quand la file est pleine, la politique
+    `drop_oldest` sacrifie l'entrée la plus ancienne, `block` attend au plus
+    `block_timeout` secondes avant d'abandonner la nouvelle entrée. `on_flush(lot)` est
+    appelé par le thread d'écriture avec les entrées effectivement insérées de chaque lot.
+    """
+
+    def __init__(self, collection, max_queue_size: int = 10000, batch_size: int = 100,
+                 flush_interval: float = 2.0, overflow_policy: str = DROP_OLDEST,
+                 block_timeout: float = 0.5, on_flush: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        if overflow_policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Politique de débordement inconnue : {overflow_policy}")
+
+        self.collection = collection
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.on_flush = on_flush
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._in_progress = 0
+        self._flush_requested = False
+        self._closed = False
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._worker = threading.Thread(target=self._run, name="activity-logger", daemon=True)
+        self._worker.start()
+
+    def log(self, entry: Dict[str, Any]) -> bool:
+        """Ajoute une entrée à la file ; retourne False si elle a été abandonnée"""
+        with self._condition:
+            if self._closed:
+                self.dropped += 1
+                return False
+
+            if len(self._queue) >= self.max_queue_size:
+                if self.overflow_policy == DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                else:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._queue) >= self.max_queue_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.dropped += 1
+                            return False
+                        self._condition.wait(remaining)
+
+            self._queue.append(entry)
+            self.queued += 1
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify_all()
+            return True
+
+    def _run(self):
+        """Boucle du thread d'écriture"""
+        while True:
+            with self._condition:
+                deadline = time.monotonic() + self.flush_interval
+                while not (self._closed or self._flush_requested) and len(self._queue) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                if self._closed and not self._queue:
+                    return
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                if not self._queue:
+                    self._flush_requested = False
+                self._in_progress = len(batch)
+                # Libère les producteurs bloqués par la politique "block"
+                self._condition.notify_all()
+
+            if batch:
+                self._write(batch)
+
+            with self._condition:
+                self._in_progress = 0
+                self._condition.notify_all()
+
+    def _write(self, batch):
+        """Insère un lot d'entrées dans MongoDB"""
+        inserted = batch
+        try:
+            self.collection.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Insertion non ordonnée : seules les entrées en erreur manquent
+            rejected = {error["index"] for error in e.details.get("writeErrors", [])}
+            inserted = [entry for index, entry in enumerate(batch) if index not in rejected]
+            self.failed += len(batch) - len(inserted)
+            print(f"Erreur lors de l'enregistrement de {len(batch) - len(inserted)} log(s) sur {len(batch)}: {e}")
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"Erreur lors de l'enregistrement de {len(batch)} log(s): {e}")
+            return
+        self.flushed += len(inserted)
+
+        if self.on_flush is not None and inserted:
+            try:
+                self.on_flush(inserted)
+            except Exception as e:
+                print(f"Erreur lors du traitement d'un lot de logs: {e}")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Attend que toutes les entrées en file soient écrites"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            if self._queue:
+                self._flush_requested = True
+                self._condition.notify_all()
+            while self._queue or self._in_progress:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """Vide la file puis arrête le thread d'écriture"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._worker.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """Retourne les compteurs du logger"""
+        with self._condition:
+            return {
+                "pending": len(self._queue),
+                "queued": self.queued,
+                "flushed": self.flushed,
+                "dropped": self.dropped,
+                "failed": self.failed
+            }
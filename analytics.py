@@ -0,0 +1,128 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+# Activités comptées dans les agrégats d'utilisation
+TRACKED_ACTIVITIES = ("file_uploaded", "summaries_generated", "question_asked")
+
+# Champs numériques des agrégats journaliers
+ROLLUP_FIELDS = TRACKED_ACTIVITIES + ("pages", "words")
+
+
+def rollup_increments(entries: List[Dict[str, Any]]) -> Dict[tuple, Dict[str, int]]:
+    """Calcule les incréments par (utilisateur, jour) pour un lot d'entrées de log"""
+    increments = defaultdict(lambda: defaultdict(int))
+    for entry in entries:
+        activity_type = entry.get("activity_type")
+        if activity_type not in TRACKED_ACTIVITIES:
+            continue
+        day = entry["timestamp"].strftime("%Y-%m-%d")
+        counters = increments[(entry.get("user_id", "default"), day)]
+        counters[activity_type] += 1
+        if activity_type == "file_uploaded":
+            details = entry.get("details", {})
+            counters["pages"] += details.get("pages", 0) or 0
+            counters["words"] += details.get("words", 0) or 0
+    return increments
+
+
+class UsageAnalytics:
+    """Statistiques d'utilisation pré-agrégées par utilisateur et par jour.
+
+    Les agrégats de la collection `usage_rollups` sont incrémentés à chaque lot de logs
+    écrit ; `rebuild_rollups` les recalcule depuis `activity_logs` par un pipeline
+    d'agrégation. Les requêtes de tableau de bord ne lisent que les agrégats.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def record_batch(self, entries: List[Dict[str, Any]]):
+        """Applique les incréments d'un lot de logs aux agrégats"""
+        operations = [
+            UpdateOne(
+                {"_id": {"user_id": user_id, "day": day}},
+                {"$inc": dict(counters), "$setOnInsert": {"user_id": user_id, "day": day}},
+                upsert=True
+            )
+            for (user_id, day), counters in rollup_increments(entries).items()
+        ]
+        if operations:
+            self.db.usage_rollups.bulk_write(operations, ordered=False)
+
+    def rebuild_rollups(self, since: Optional[datetime] = None):
+        """Recalcule les agrégats depuis les logs bruts (reprise ou initialisation)"""
+        match = {"activity_type": {"$in": list(TRACKED_ACTIVITIES)}}
+        if since is not None:
+            # Les agrégats sont remplacés par jour entier : on repart du début du jour
+            match["timestamp"] = {"$gte": since.replace(hour=0, minute=0, second=0, microsecond=0)}
+
+        counters = {
+            activity_type: {"$sum": {"$cond": [{"$eq": ["$activity_type", activity_type]}, 1, 0]}}
+            for activity_type in TRACKED_ACTIVITIES
+        }
+        counters["pages"] = {"$sum": {"$ifNull": ["$details.pages", 0]}}
+        counters["words"] = {"$sum": {"$ifNull": ["$details.words", 0]}}
+
+        self.db.activity_logs.aggregate([
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "user_id": "$user_id",
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}
+                },
+                **counters
+            }},
+            {"$addFields": {"user_id": "$_id.user_id", "day": "$_id.day"}},
+            {"$merge": {"into": "usage_rollups", "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ])
+
+    def _sum_rollups(self, match: Dict[str, Any], group_key: Any, sort: Optional[Dict[str, int]] = None,
+                     limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Somme les agrégats correspondant au filtre, regroupés par `group_key`"""
+        pipeline = [
+            {"$match": match},
+            {"$group": {"_id": group_key, **{field: {"$sum": f"${field}"} for field in ROLLUP_FIELDS}}},
+            {"$sort": sort or {"_id": 1}}
+        ]
+        if limit is not None:
+            pipeline.append({"$limit": limit})
+        return list(self.db.usage_rollups.aggregate(pipeline))
+
+    @staticmethod
+    def _day_range(start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+        """Filtre sur les jours [start, end]"""
+        days = {}
+        if start is not None:
+            days["$gte"] = start.strftime("%Y-%m-%d")
+        if end is not None:
+            days["$lte"] = end.strftime("%Y-%m-%d")
+        return {"day": days} if days else {}
+
+    def get_user_usage(self, user_id: str, start: Optional[datetime] = None,
+                       end: Optional[datetime] = None) -> Dict[str, int]:
+        """Totaux d'un utilisateur sur la période"""
+        results = self._sum_rollups({"user_id": user_id, **self._day_range(start, end)}, None)
+        totals = results[0] if results else {}
+        return {field: totals.get(field, 0) for field in ROLLUP_FIELDS}
+
+    def get_daily_usage(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                        user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Totaux par jour, pour un utilisateur ou pour toute la plateforme"""
+        match = self._day_range(start, end)
+        if user_id is not None:
+            match["user_id"] = user_id
+        return [{"day": row.pop("_id"), **row} for row in self._sum_rollups(match, "$day")]
+
+    def get_top_users(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      limit: int = 10) -> List[Dict[str, Any]]:
+        """Utilisateurs les plus actifs sur la période (par nombre de questions puis de fichiers)"""
+        results = self._sum_rollups(
+            self._day_range(start, end),
+            "$user_id",
+            sort={"question_asked": -1, "file_uploaded": -1},
+            limit=limit
+        )
+        return [{"user_id": row.pop("_id"), **row} for row in results]
@@ -1,28 +1,106 @@
 import streamlit as st
-import hashlib
 import secrets
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from utils import DatabaseManager
 from config import Config
+from cache import LRUCache
+from passwords import PasswordHasher
+from session_tokens import SessionTokenSigner
+
+# Champs du document utilisateur conservés dans le profil en session (jamais le hachage du mot de passe) ;
+# la version des jetons y figure pour valider un jeton sans relire la base
+PROFILE_FIELDS = ("_id", "email", "full_name", "username", "created_at", "last_login", "token_version")
 
 class AuthManager:
-    def __init__(self, db: DatabaseManager):
+    def __init__(self, db: DatabaseManager, password_hasher: Optional[PasswordHasher] = None):
         self.db = db
-        self.session_timeout = timedelta(hours=24)
+        self.session_timeout = timedelta(hours=Config.SESSION_TIMEOUT)
+        self.password_hasher = password_hasher or PasswordHasher(
+            n=Config.PASSWORD_SCRYPT_N,
+            r=Config.PASSWORD_SCRYPT_R,
+            p=Config.PASSWORD_SCRYPT_P,
+            max_concurrency=Config.PASSWORD_HASH_MAX_CONCURRENCY,
+            timeout=Config.PASSWORD_HASH_TIMEOUT
+        )
+        self.token_signer = SessionTokenSigner(
+            self._load_session_secret(),
+            self.session_timeout.total_seconds(),
+            max_lifetime_seconds=Config.SESSION_MAX_LIFETIME_HOURS * 3600
+        )
+        self.profile_cache = LRUCache(
+            Config.USER_PROFILE_CACHE_MAX_BYTES,
+            sizeof=lambda profile: len(repr(profile)),
+            ttl_seconds=Config.USER_PROFILE_CACHE_TTL_SECONDS
+        )
+    
+    @staticmethod
+    def _load_session_secret() -> str:
+        """Clé de signature des jetons ; à défaut, une clé aléatoire propre au processus"""
+        try:
+            return Config.get_session_secret()
+        except Exception as e:
+            print(f"Clé de session absente des secrets, les jetons ne survivront pas à un redémarrage: {e}")
+            return secrets.token_hex(32)
+    
+    def cache_profile(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """Met en cache le profil public d'un utilisateur et le retourne"""
+        profile = {field: user[field] for field in PROFILE_FIELDS if field in user}
+        self.profile_cache.put(profile["email"], profile)
+        return profile
+    
+    def get_user_profile(self, email: str) -> Optional[Dict[str, Any]]:
+        """Retourne le profil d'un utilisateur, depuis le cache si possible"""
+        profile = self.profile_cache.get(email)
+        if profile is not None:
+            return profile
+        user = self.db.get_user_by_email(email)
+        if not user or not user.get("is_active", True):
+            return None
+        return self.cache_profile(user)
+    
+    def invalidate_profile(self, email: str):
+        """Retire un profil du cache (après une modification du compte)"""
+        self.profile_cache.pop(email)
+    
+    def issue_session_token(self, user: Dict[str, Any], session_id: str, binding: Optional[str] = None) -> str:
+        """Émet un jeton signé liant l'utilisateur à sa session, valable `session_timeout`.
+
+        `binding` (le User-Agent du navigateur) n'est pas transporté par l'URL : un lien
+        copié ou partagé ne restaure pas la session depuis un autre navigateur.
+        """
+        return self.token_signer.issue(user["email"], session_id, version=user.get("token_version", 0), binding=binding)
+    
+    def restore_session(self, token: str, binding: Optional[str] = None) -> Optional[Tuple[Dict[str, Any], str, str]]:
+        """Valide un jeton et retourne (profil, identifiant de session, jeton renouvelé), ou None.
+
+        La signature et l'expiration se vérifient sans la base. La version des jetons
+        (révocation) vient du profil : depuis le cache, sans accès à la base, sinon d'une
+        seule lecture du document utilisateur. Une révocation faite par ce processus vide
+        le cache et s'applique aussitôt ; faite par un autre processus, elle s'applique à
+        l'expiration du profil en cache (`USER_PROFILE_CACHE_TTL_SECONDS`).
+        """
+        claims = self.token_signer.verify(token, binding=binding)
+        if claims is None:
+            return None
+        profile = self.get_user_profile(claims["sub"])
+        if profile is None or profile.get("token_version", 0) != claims.get("ver", 0):
+            return None
+        return profile, claims["sid"], self.token_signer.renew(claims)
+    
+    def revoke_sessions(self, email: str) -> bool:
+        """Révoque tous les jetons de session émis pour un utilisateur"""
+        self.invalidate_profile(email)
+        return self.db.increment_token_version(email)
     
     def hash_password(self, password: str) -> str:
-        """Hash un mot de passe avec salt"""
-        salt = secrets.token_hex(16)
-        hash_obj = hashlib.sha256((password + salt).encode())
-        return f"{salt}${hash_obj.hexdigest()}"
+        """Hash un mot de passe avec scrypt (sel et paramètres de coût inclus)"""
+        return self.password_hasher.hash(password)
     
     def verify_password(self, password: str, hashed_password: str) -> bool:
         """Vérifie un mot de passe contre son hash"""
         try:
-            salt, hash_value = hashed_password.split('$')
-            hash_obj = hashlib.sha256((password + salt).encode())
-            return hash_obj.hexdigest() == hash_value
+            return self.password_hasher.verify(password, hashed_password)
         except:
             return False
     
@@ -94,12 +172,17 @@ class AuthManager:
                     }
                 
                 # Vérifier le mot de passe
-                if not self.verify_password(password, user["password"]):
+                is_valid, new_hash = self.password_hasher.verify_and_update(password, user["password"])
+                if not is_valid:
                     return {
                         "success": False,
                         "message": "Nom d'utilisateur ou mot de passe incorrect."
                     }
                 
+                # Mettre à niveau les anciens hachages SHA-256
+                if new_hash:
+                    self.db.update_password_hash(user["_id"], user["password"], new_hash)
+                
                 # Vérifier si le compte est actif
                 if not user.get("is_active", True):
                     return {
@@ -154,7 +237,11 @@ class AuthManager:
             return None
     
     def logout_user(self):
-        """Déconnecte l'utilisateur actuel"""
+        """Déconnecte l'utilisateur actuel : révoque ses jetons et retire celui de l'URL"""
+        current_user = st.session_state.get("current_user")
+        if current_user:
+            self.revoke_sessions(current_user["email"])
+        st.experimental_set_query_params()
         if "user" in st.session_state:
             del st.session_state["user"]
         if "user_id" in st.session_state:
@@ -0,0 +1,288 @@
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Union
+
+from cache import SummaryCache
+from chat_stream import TokenStream
+from extractive import answer_extractive, summarize_extractive
+from inference_scheduler import InferenceScheduler, QueueTimeout
+from singleflight import SingleFlight
+from summarization import SummarizationError
+
+# Noms utilisables dans Config.INFERENCE_BACKENDS
+HUGGINGFACE = "huggingface"
+LOCAL = "local"
+STUB = "stub"
+
+
+class BackendError(Exception):
+    """Échec d'un backend d'inférence"""
+
+
+def chat_error_message(status_code: int) -> str:
+    """Message d'erreur pour une réponse en échec du modèle de chat"""
+    # Gestion spécifique de l'erreur 504 (Gateway Timeout)
+    if status_code == 504:
+        return "Le service Hugging Face est temporairement surchargé. Veuillez réessayer dans quelques minutes."
+    if status_code == 503:
+        return "Le modèle est en train de se charger. Réessaye dans quelques secondes."
+    return f"Erreur API Hugging Face : {status_code} - Service temporairement indisponible"
+
+
+class HuggingFaceBackend:
+    """Modèles distants de l'API d'inférence Hugging Face (bart-large-cnn, Mistral)"""
+
+    name = HUGGINGFACE
+
+    def __init__(self, client, base_url: str, summary_model: str, chat_model: str,
+                 summary_cache: Optional[SummaryCache] = None, input_chars: int = 4000,
+                 context_chars: int = 4000, max_new_tokens: int = 500,
+                 single_flight: Optional[SingleFlight] = None, scheduler: Optional[InferenceScheduler] = None):
+        self.client = client
+        self.summary_url = f"{base_url}/{summary_model}"
+        self.chat_url = f"{base_url}/{chat_model}"
+        self.summary_model = summary_model
+        self.chat_model = chat_model
+        self.summary_cache = summary_cache
+        self.input_chars = input_chars
+        self.context_chars = context_chars
+        self.max_new_tokens = max_new_tokens
+        # Requêtes identiques simultanées (plusieurs sessions, même document) : un seul appel au service
+        self.single_flight = single_flight or SingleFlight()
+        # Limite globale d'appels simultanés, avec priorité aux questions du chat
+        self.scheduler = scheduler
+
+    def summarize(self, text: str) -> str:
+        """Résume un bloc de texte ; lève SummarizationError en cas d'échec"""
+        short_text = text[:self.input_chars]
+
+        # Les blocs inchangés ne sont résumés qu'une seule fois
+        cache_key = SummaryCache.make_key(short_text, self.summary_model, self.input_chars)
+        if self.summary_cache is not None:
+            cached_summary = self.summary_cache.get(cache_key)
+            if cached_summary is not None:
+                return cached_summary
+
+        key = SingleFlight.make_key(self.summary_model, short_text)
+        return self.single_flight.do(key, lambda: self._request_summary(short_text, cache_key))
+
+    def _request_summary(self, short_text: str, cache_key: str) -> str:
+        """Appel au modèle de résumé, puis mise en cache du résultat"""
+        try:
+            with self._slot():
+                response = self.client.post(self.summary_url, {"inputs": short_text})
+        except QueueTimeout:
+            # File d'attente locale saturée : le service lui-même n'est pas en cause
+            raise
+        except Exception as e:
+            raise SummarizationError(f"Erreur lors du résumé : {e}")
+
+        # Si le modèle est en train de se charger (503)
+        if response.status_code == 503:
+            raise SummarizationError("Le modèle n'est pas encore prêt. Réessaie dans quelques secondes.")
+
+        # Gestion spécifique de l'erreur 504 (Gateway Timeout)
+        if response.status_code == 504:
+            raise SummarizationError("Le service Hugging Face est temporairement surchargé. Veuillez réessayer dans quelques minutes.")
+
+        if response.status_code != 200:
+            raise SummarizationError(f"Erreur Hugging Face : {response.status_code} - Service temporairement indisponible")
+
+        result = response.json()
+        if isinstance(result, list) and "summary_text" in result[0]:
+            if self.summary_cache is not None:
+                self.summary_cache.put(cache_key, result[0]["summary_text"])
+            return result[0]["summary_text"]
+        raise SummarizationError("Réponse inattendue du service")
+
+    def _slot(self):
+        """Place d'inférence du planificateur, pour l'utilisateur et la priorité du thread courant"""
+        return self.scheduler.slot() if self.scheduler is not None else nullcontext()
+
+    def _chat_payload(self, question: str, context: str) -> Dict[str, Any]:
+        """Construit la requête de génération pour une question et son contexte"""
+        context = context[:self.context_chars]
+
+        prompt = f"""
+    Tu es un assistant intelligent. Utilise les informations suivantes pour répondre :
+
+    Contexte :
+    {context}
+
+    Question : {question}
+
+    Réponse :
+    """
+
+        return {
+            "inputs": prompt,
+            "parameters": {
+                "max_new_tokens": self.max_new_tokens,
+                "temperature": 0.7,
+                "return_full_text": False
+            }
+        }
+
+    def answer(self, question: str, context: str) -> str:
+        """Répond à une question ; lève BackendError en cas d'échec"""
+        payload = self._chat_payload(question, context)
+        key = SingleFlight.make_key(self.chat_model, payload["inputs"], payload["parameters"])
+        return self.single_flight.do(key, lambda: self._request_answer(payload))
+
+    def _request_answer(self, payload: Dict[str, Any]) -> str:
+        """Appel au modèle de génération"""
+        try:
+            with self._slot():
+                response = self.client.post(self.chat_url, payload)
+        except QueueTimeout:
+            raise
+        except Exception as e:
+            raise BackendError(f"Erreur lors de la réponse : {e}")
+        if response.status_code != 200:
+            raise BackendError(chat_error_message(response.status_code))
+
+        result = response.json()
+        if isinstance(result, list) and "generated_text" in result[0]:
+            return result[0]["generated_text"]
+        raise BackendError("Réponse inattendue du service")
+
+    def stream_answer(self, question: str, context: str) -> TokenStream:
+        """Lance la génération en streaming ; lève BackendError si le service la refuse"""
+        # La place est gardée jusqu'à la fin de la génération (ou son annulation)
+        ticket = self.scheduler.acquire() if self.scheduler is not None else None
+        try:
+            stream = self.client.stream(self.chat_url, self._chat_payload(question, context))
+        except Exception as e:
+            if ticket is not None:
+                self.scheduler.release(ticket)
+            raise BackendError(f"Erreur lors de la réponse : {e}")
+        if isinstance(stream, TokenStream):
+            if ticket is not None:
+                stream.on_close = lambda: self.scheduler.release(ticket)
+            return stream
+        if ticket is not None:
+            self.scheduler.release(ticket)
+        stream.close()
+        raise BackendError(chat_error_message(stream.status_code))
+
+
+class LocalExtractiveBackend:
+    """Calcul local sur le CPU : résumés et réponses extractifs, sans modèle distant"""
+
+    name = LOCAL
+
+    def __init__(self, summary_sentences: int = 5, answer_sentences: int = 3):
+        self.summary_sentences = summary_sentences
+        self.answer_sentences = answer_sentences
+
+    def summarize(self, text: str) -> str:
+        summary = summarize_extractive(text, self.summary_sentences)
+        if not summary:
+            raise SummarizationError("Aucune phrase exploitable pour le résumé")
+        return summary
+
+    def answer(self, question: str, context: str) -> str:
+        answer = answer_extractive(question, context, self.answer_sentences)
+        if not answer:
+            return "Je n'ai pas trouvé de passage des documents qui réponde à cette question."
+        return f"D'après les documents : {answer}"
+
+    def stream_answer(self, question: str, context: str) -> str:
+        return self.answer(question, context)
+
+
+class StubBackend:
+    """Réponses déterministes et instantanées, pour les tests et le développement hors ligne"""
+
+    name = STUB
+
+    def __init__(self, summary_words: int = 30):
+        self.summary_words = summary_words
+
+    def summarize(self, text: str) -> str:
+        return " ".join(text.split()[:self.summary_words])
+
+    def answer(self, question: str, context: str) -> str:
+        return f"Réponse simulée à « {question} » ({len(context)} caractères de contexte)"
+
+    def stream_answer(self, question: str, context: str) -> str:
+        return self.answer(question, context)
+
+
+class BackendChain:
+    """Enchaîne plusieurs backends : en cas d'échec, le suivant prend le relais.
+
+    Un backend en échec est mis de côté pendant `cooldown_seconds` pour ne pas payer
+    ses délais et relances à chaque bloc ; s'ils sont tous de côté, ils sont tous
+    retentés dans l'ordre.
+    """
+
+    def __init__(self, backends: List[Any], cooldown_seconds: float = 30.0):
+        if not backends:
+            raise ValueError("Au moins un backend d'inférence est requis")
+        self.backends = backends
+        self.cooldown_seconds = cooldown_seconds
+        self._unavailable_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {backend.name: 0 for backend in backends}
+        self.failures: Dict[str, int] = {backend.name: 0 for backend in backends}
+        self.fallbacks = 0
+        self.queue_timeouts = 0
+
+    @property
+    def name(self) -> str:
+        return self.backends[0].name
+
+    def _candidates(self) -> List[Any]:
+        now = time.monotonic()
+        with self._lock:
+            available = [backend for backend in self.backends if self._unavailable_until.get(backend.name, 0) <= now]
+        return available or list(self.backends)
+
+    def _call(self, method: str, *args) -> Any:
+        error = None
+        for position, backend in enumerate(self._candidates()):
+            with self._lock:
+                self.calls[backend.name] += 1
+                if position:
+                    self.fallbacks += 1
+            try:
+                return getattr(backend, method)(*args)
+            except QueueTimeout as e:
+                # Notre propre file est saturée : repli pour cet appel seulement, sans écarter le backend
+                error = e
+                with self._lock:
+                    self.queue_timeouts += 1
+                print(f"Backend {backend.name} saturé ({method}): {e}")
+            except Exception as e:
+                error = e
+                with self._lock:
+                    self.failures[backend.name] += 1
+                    self._unavailable_until[backend.name] = time.monotonic() + self.cooldown_seconds
+                print(f"Backend {backend.name} en échec ({method}): {e}")
+        raise error
+
+    def summarize(self, text: str) -> str:
+        """Résume un bloc ; lève l'erreur du dernier backend si tous échouent"""
+        return self._call("summarize", text)
+
+    def answer(self, question: str, context: str) -> str:
+        """Répond à une question ; lève l'erreur du dernier backend si tous échouent"""
+        return self._call("answer", question, context)
+
+    def stream_answer(self, question: str, context: str) -> Union[TokenStream, str]:
+        """Lance une réponse en streaming, ou retourne une réponse complète si le backend ne streame pas"""
+        return self._call("stream_answer", question, context)
+
+    def stats(self) -> Dict[str, Any]:
+        """Appels, échecs et replis par backend"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "failures": dict(self.failures),
+                "fallbacks": self.fallbacks,
+                "queue_timeouts": self.queue_timeouts,
+                "unavailable": [name for name, until in self._unavailable_until.items() if until > now]
+            }
@@ -0,0 +1,98 @@
+"""Génération d'un corpus de PDF synthétiques pour les benchmarks.
+
+Les PDF sont écrits directement (police standard Helvetica, un flux de texte par
+page), sans dépendance supplémentaire ; PyPDF2 en extrait le texte comme pour un
+document réel.
+"""
+import random
+from typing import Dict, List, Tuple
+
+# Vocabulaire des documents générés (termes juridiques et financiers courants)
+WORDS = """
+contrat clause partie signataire obligation paiement facture échéance résiliation
+préavis indemnité responsabilité assurance garantie livraison prestation service
+montant euros taux intérêt pénalité retard litige tribunal juridiction article
+annexe avenant durée renouvellement confidentialité données personnelles
+fournisseur client société siège social capital bilan exercice comptable
+""".split()
+
+# Profils (nombre de pages, mots par page) : notes courtes, rapports, annexes denses
+DEFAULT_PROFILES = [
+    ("note", 2, 150),
+    ("rapport", 20, 350),
+    ("annexe", 80, 600),
+]
+
+_LINE_WORDS = 12
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_text(words: int, rng: random.Random) -> str:
+    """Texte pseudo-aléatoire de `words` mots, découpé en phrases"""
+    tokens = []
+    for index in range(words):
+        word = rng.choice(WORDS)
+        tokens.append(word.capitalize() if index % 15 == 0 else word)
+        if index % 15 == 14:
+            tokens[-1] += "."
+    return " ".join(tokens)
+
+
+def make_pdf(page_texts: List[str]) -> bytes:
+    """Construit un PDF minimal dont chaque page contient le texte donné"""
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(b"")
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    page_ids = []
+    for text in page_texts:
+        words = text.split()
+        lines = [" ".join(words[i:i + _LINE_WORDS]) for i in range(0, len(words), _LINE_WORDS)]
+        operations = ["BT", "/F1 9 Tf", "11 TL", "40 800 Td"]
+        operations += [f"({_escape(line)}) Tj T*" for line in lines]
+        operations.append("ET")
+        stream = "\n".join(operations).encode("cp1252", errors="replace")
+        content_id = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+        ))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset
+    )
+    return bytes(output)
+
+
+def make_corpus(documents_per_profile: int = 3, profiles: List[Tuple[str, int, int]] = DEFAULT_PROFILES,
+                seed: int = 0) -> Dict[str, bytes]:
+    """Génère un corpus reproductible {nom de fichier: octets du PDF}"""
+    rng = random.Random(seed)
+    corpus = {}
+    for name, num_pages, words_per_page in profiles:
+        for index in range(documents_per_profile):
+            # Densité variable d'une page à l'autre (pages de garde, tableaux, texte plein)
+            pages = [make_text(max(10, int(words_per_page * rng.uniform(0.3, 1.2))), rng) for _ in range(num_pages)]
+            corpus[f"{name}_{index + 1}.pdf"] = make_pdf(pages)
+    return corpus
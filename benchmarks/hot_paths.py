@@ -0,0 +1,340 @@
+"""Benchmarks des chemins critiques : upload→extraction, résumé de tous les fichiers, question.
+
+Usage : python benchmarks/hot_paths.py [--documents 3] [--latency-ms 200] [--error-rate 0.05]
+                                       [--mongo mongomock|none|mongodb://...] [--json resultats.json]
+                                       [--baseline reference.json --tolerance 0.2]
+
+Les composants de l'application (extraction, caches, résumé hiérarchique, index de
+passages, client d'inférence) sont assemblés comme dans main.py, mais l'API Hugging
+Face est remplacée par un serveur local (stub_server) et MongoDB par mongomock ou
+un mongod local. Pour chaque scénario : débit, latences p50/p95/p99 et mémoire
+résidente maximale. Avec --baseline, le script échoue (code 1) si un p95 se dégrade
+de plus de --tolerance par rapport à la référence.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from backends import HuggingFaceBackend
+from cache import ExtractionCache, SummaryCache, content_hash
+from extraction import extract_pdf
+from chat_stream import TokenStream
+from inference import InferenceClient
+from retrieval import PassageIndex
+from summarization import summarize_documents, summarize_hierarchical
+
+from corpus import WORDS, make_corpus
+from stub_server import StubInferenceServer
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Percentile par rang le plus proche"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, int(round(fraction * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class PeakMemory:
+    """Mesure la mémoire résidente maximale du processus pendant un bloc"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def _rss(self) -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page_size
+        except OSError:
+            # Hors Linux : maximum depuis le démarrage du processus
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, self._rss())
+
+    def __enter__(self) -> "PeakMemory":
+        self.peak_bytes = self._rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self._rss())
+
+
+def report(name: str, samples_ms: List[float], elapsed: float, units: float, unit: str,
+           memory: PeakMemory, **extra) -> Dict[str, object]:
+    """Construit la ligne de résultats d'un scénario"""
+    return {
+        "scenario": name,
+        "count": len(samples_ms),
+        "throughput": units / elapsed if elapsed else 0.0,
+        "throughput_unit": f"{unit}/s",
+        "p50_ms": percentile(samples_ms, 0.50),
+        "p95_ms": percentile(samples_ms, 0.95),
+        "p99_ms": percentile(samples_ms, 0.99),
+        "mean_ms": statistics.fmean(samples_ms) if samples_ms else 0.0,
+        "peak_rss_mb": memory.peak_bytes / (1024 * 1024),
+        **extra
+    }
+
+
+def open_collections(mongo: str):
+    """Retourne la base utilisée pour les caches (mongomock, mongod local) ou None"""
+    if mongo == "none":
+        return None
+    if mongo == "mongomock":
+        import mongomock
+        return mongomock.MongoClient()["benchmark"]
+    import pymongo
+    client = pymongo.MongoClient(mongo, serverSelectionTimeoutMS=2000)
+    client.drop_database("apocalipssi_benchmark")
+    return client["apocalipssi_benchmark"]
+
+
+def bench_upload_extract(corpus: Dict[str, bytes], extraction_cache: ExtractionCache, label: str):
+    """Upload→extraction : empreinte, cache, extraction parallèle, mise en cache"""
+    samples = []
+    pages = 0
+    texts = {}
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        for name, pdf_bytes in corpus.items():
+            document_start = time.perf_counter()
+            file_hash = content_hash(pdf_bytes)
+            extracted = extraction_cache.get(file_hash)
+            if extracted is None:
+                extracted = extract_pdf(
+                    pdf_bytes,
+                    max_workers=Config.EXTRACTION_MAX_WORKERS,
+                    pages_per_task=Config.EXTRACTION_PAGES_PER_TASK,
+                    min_parallel_pages=Config.EXTRACTION_MIN_PARALLEL_PAGES
+                )
+                extraction_cache.put(file_hash, extracted)
+            samples.append((time.perf_counter() - document_start) * 1000)
+            pages += extracted["num_pages"]
+            texts[name] = extracted["text"]
+        elapsed = time.perf_counter() - start
+    return texts, report(label, samples, elapsed, pages, "pages", memory)
+
+
+class TimedClient:
+    """Enveloppe du client d'inférence qui chronomètre chaque requête POST"""
+
+    def __init__(self, client: InferenceClient, samples: List[float]):
+        self.client = client
+        self.samples = samples
+
+    def post(self, url: str, payload: Dict, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.client.post(url, payload, **kwargs)
+        finally:
+            self.samples.append((time.perf_counter() - start) * 1000)
+
+
+def make_summarize_fn(client: InferenceClient, base_url: str, summary_cache: SummaryCache, request_samples: List[float]):
+    """Backend Hugging Face de main.py pointant sur le serveur local"""
+    backend = HuggingFaceBackend(TimedClient(client, request_samples), base_url, Config.SUMMARY_MODEL, Config.CHAT_MODEL,
+                                 summary_cache=summary_cache, input_chars=Config.SUMMARY_INPUT_CHARS)
+    return backend.summarize
+
+
+def bench_summarize_all(texts: Dict[str, str], client: InferenceClient, base_url: str, summary_cache: SummaryCache):
+    """Résumé de tous les documents (bouton « Résumer tous les fichiers »)"""
+    request_samples = []
+    document_samples = []
+    request_summary = make_summarize_fn(client, base_url, summary_cache, request_samples)
+
+    def summarize_document(text: str) -> str:
+        start = time.perf_counter()
+        try:
+            return summarize_hierarchical(
+                text,
+                request_summary,
+                chunk_tokens=Config.SUMMARY_CHUNK_TOKENS,
+                max_workers=Config.SUMMARY_MAX_CONCURRENCY,
+                max_depth=Config.SUMMARY_MAX_DEPTH
+            )
+        finally:
+            document_samples.append((time.perf_counter() - start) * 1000)
+
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        summaries = summarize_documents(
+            texts,
+            summarize_document,
+            max_workers=Config.SUMMARY_MAX_CONCURRENCY,
+            timeout=Config.SUMMARY_BATCH_TIMEOUT
+        )
+        elapsed = time.perf_counter() - start
+
+    failures = sum(1 for summary in summaries.values() if summary.startswith(("Erreur", "Le ")))
+    return [
+        report("summarize-all (document)", document_samples, elapsed, len(texts), "docs", memory, failures=failures),
+        report("summarize-all (requête)", request_samples, elapsed, len(request_samples), "req", memory)
+    ]
+
+
+def bench_ask_question(texts: Dict[str, str], client: InferenceClient, base_url: str, questions: int, seed: int):
+    """Question au chat : recherche des passages puis génération"""
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        index = PassageIndex(Config.RETRIEVAL_PASSAGE_TOKENS)
+        for name, text in texts.items():
+            index.add_document(name, text)
+        build_elapsed = time.perf_counter() - start
+    build = report("index build", [build_elapsed * 1000], build_elapsed, len(texts), "docs", memory)
+
+    api_url = f"{base_url}/{Config.CHAT_MODEL}"
+    rng = random.Random(seed)
+    samples = []
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        for _ in range(questions):
+            question = " ".join(rng.sample(WORDS, 4)) + " ?"
+            question_start = time.perf_counter()
+            passages = index.search(question, k=Config.RETRIEVAL_TOP_K, token_budget=Config.RETRIEVAL_TOKEN_BUDGET)
+            context = "\n\n".join(f"[{name}]\n{passage}" for name, passage, _ in passages)[:Config.CHAT_CONTEXT_CHARS]
+            payload = {
+                "inputs": f"Contexte :\n{context}\n\nQuestion : {question}\n\nRéponse :",
+                "parameters": {"max_new_tokens": 500, "temperature": 0.7, "return_full_text": False}
+            }
+            client.post(api_url, payload)
+            samples.append((time.perf_counter() - question_start) * 1000)
+        elapsed = time.perf_counter() - start
+    results = [build, report("ask-question", samples, elapsed, questions, "questions", memory)]
+
+    # Même parcours en streaming : temps jusqu'au premier token et débit de tokens
+    ttft_samples = []
+    tokens = 0
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        for _ in range(questions):
+            question = " ".join(rng.sample(WORDS, 4)) + " ?"
+            passages = index.search(question, k=Config.RETRIEVAL_TOP_K, token_budget=Config.RETRIEVAL_TOKEN_BUDGET)
+            context = "\n\n".join(f"[{name}]\n{passage}" for name, passage, _ in passages)[:Config.CHAT_CONTEXT_CHARS]
+            payload = {
+                "inputs": f"Contexte :\n{context}\n\nQuestion : {question}\n\nRéponse :",
+                "parameters": {"max_new_tokens": Config.CHAT_MAX_NEW_TOKENS, "temperature": 0.7, "return_full_text": False}
+            }
+            stream = client.stream(api_url, payload)
+            if isinstance(stream, TokenStream):
+                with stream:
+                    for _ in stream:
+                        pass
+                stats = stream.stats()
+                if stats["ttft_ms"] is not None:
+                    ttft_samples.append(stats["ttft_ms"])
+                tokens += stats["tokens"]
+            else:
+                stream.close()
+        elapsed = time.perf_counter() - start
+    results.append(report("ask-question (stream, ttft)", ttft_samples, elapsed, tokens, "tokens", memory))
+    return results
+
+
+def print_table(results: List[Dict[str, object]]):
+    header = f"{'scénario':<28}{'n':>6}{'débit':>18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'RSS Mo':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        throughput = f"{row['throughput']:.1f} {row['throughput_unit']}"
+        print(f"{row['scenario']:<28}{row['count']:>6}{throughput:>18}{row['p50_ms']:>10.1f}"
+              f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['peak_rss_mb']:>9.0f}")
+
+
+def compare_with_baseline(results: List[Dict[str, object]], baseline_path: str, tolerance: float) -> bool:
+    """Affiche les régressions de p95 par rapport à la référence ; retourne True s'il y en a"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {row["scenario"]: row for row in json.load(f)["results"]}
+    regressed = False
+    for row in results:
+        reference = baseline.get(row["scenario"])
+        if reference is None or not reference["p95_ms"]:
+            continue
+        ratio = row["p95_ms"] / reference["p95_ms"]
+        if ratio > 1 + tolerance:
+            regressed = True
+            print(f"[RÉGRESSION] {row['scenario']}: p95 {reference['p95_ms']:.1f} → {row['p95_ms']:.1f} ms (x{ratio:.2f})")
+    if not regressed:
+        print(f"[OK] aucun p95 dégradé de plus de {tolerance:.0%} par rapport à {baseline_path}")
+    return regressed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=3, help="documents par profil (note, rapport, annexe)")
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=200, help="latence moyenne du faux service")
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--token-delay-ms", type=float, default=20, help="délai entre deux tokens en streaming")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="proportion de réponses 503/504")
+    parser.add_argument("--mongo", default="mongomock", help="mongomock, none ou URI d'un mongod local")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="écrit les résultats dans ce fichier")
+    parser.add_argument("--baseline", help="résultats de référence (JSON produit par --json)")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    corpus = make_corpus(args.documents, seed=args.seed)
+    database = open_collections(args.mongo)
+    collection = (lambda name: database[name] if database is not None else None)
+
+    results = []
+    extraction_cache = ExtractionCache(collection("documents"), Config.EXTRACTION_CACHE_MAX_BYTES)
+    texts, cold = bench_upload_extract(corpus, extraction_cache, "upload→extract")
+    results.append(cold)
+    results.append(bench_upload_extract(corpus, extraction_cache, "upload→extract (cache)")[1])
+
+    with StubInferenceServer(args.latency_ms, args.jitter_ms, args.error_rate,
+                             token_delay_ms=args.token_delay_ms, seed=args.seed) as server:
+        client = InferenceClient(
+            "benchmark",
+            connect_timeout=Config.INFERENCE_CONNECT_TIMEOUT,
+            read_timeout=Config.INFERENCE_READ_TIMEOUT,
+            max_retries=Config.INFERENCE_MAX_RETRIES,
+            backoff_base=min(Config.INFERENCE_BACKOFF_BASE, args.latency_ms / 1000),
+            backoff_max=Config.INFERENCE_BACKOFF_MAX,
+            pool_maxsize=Config.INFERENCE_POOL_MAXSIZE
+        )
+        summary_cache = SummaryCache(collection("summary_cache"), Config.SUMMARY_CACHE_MAX_BYTES, Config.SUMMARY_CACHE_TTL_HOURS)
+        results.extend(bench_summarize_all(texts, client, server.base_url, summary_cache))
+        results.extend(bench_ask_question(texts, client, server.base_url, args.questions, args.seed))
+        client_metrics = client.metrics()
+        server_counters = dict(server.counters)
+        client.close()
+
+    print_table(results)
+    print(f"\nservice simulé : {server_counters} ; client : {client_metrics}")
+    print(f"mémoire max des processus d'extraction : "
+          f"{resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024:.0f} Mo")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"arguments": vars(args), "results": results}, f, indent=2, ensure_ascii=False)
+
+    if args.baseline and compare_with_baseline(results, args.baseline, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+"""Démarrage à froid et coût d'un rerun de l'application.
+
+Usage : python benchmarks/startup.py [--runs 5]
+
+Chaque mesure de démarrage est faite dans un interpréteur neuf : on importe les
+modules nécessaires à la page de connexion, puis ceux de la page d'analyse, et on
+vérifie que la page de connexion ne charge ni la pile PDF ni la pile d'inférence.
+Le coût d'un rerun est mesuré sur le travail fait à chaque exécution du script
+avant tout accès à la base (styles, validation du jeton de session).
+Le script échoue (code 1) si un budget est dépassé.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules importés par main.py avant la vérification de l'authentification
+LOGIN_MODULES = ["streamlit", "utils", "auth", "passwords", "rate_limit", "session_tokens", "style_utils"]
+
+# Modules importés une fois l'utilisateur connecté
+ANALYSIS_MODULES = ["extraction", "cache", "summarization", "inference", "retrieval", "session_store",
+                    "extractive", "backends", "singleflight", "inference_scheduler"]
+
+# Modules qui ne doivent pas être chargés pour afficher la page de connexion
+LOGIN_FORBIDDEN_MODULES = ["PyPDF2", "extraction", "inference", "retrieval", "summarization",
+                           "backends", "extractive", "chat_stream", "singleflight", "inference_scheduler"]
+
+# Budgets, en millisecondes
+LOGIN_COLD_START_BUDGET_MS = 2000
+ANALYSIS_IMPORT_BUDGET_MS = 1500
+RERUN_BUDGET_MS = 5
+
+_COLD_START_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+for name in {login!r}:
+    __import__(name)
+login_ms = (time.perf_counter() - start) * 1000
+loaded = [name for name in {forbidden!r} if name in sys.modules]
+start = time.perf_counter()
+for name in {analysis!r}:
+    __import__(name)
+analysis_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{"login_ms": login_ms, "analysis_ms": analysis_ms, "forbidden_loaded": loaded}}))
+"""
+
+_RERUN_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+from session_tokens import SessionTokenSigner
+from style_utils import apply_custom_styles
+signer = SessionTokenSigner("benchmark", 3600)
+token = signer.issue("utilisateur@email.com", "session")
+apply_custom_styles()
+timings = []
+for _ in range({iterations}):
+    start = time.perf_counter()
+    apply_custom_styles()
+    signer.verify(token)
+    timings.append((time.perf_counter() - start) * 1000)
+print(json.dumps(timings))
+"""
+
+
+def _run_probe(code: str) -> str:
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def measure_cold_start(runs: int):
+    """Lance `runs` interpréteurs neufs et retourne les mesures de chacun"""
+    code = _COLD_START_PROBE.format(
+        root=ROOT,
+        login=LOGIN_MODULES,
+        analysis=ANALYSIS_MODULES,
+        forbidden=LOGIN_FORBIDDEN_MODULES
+    )
+    return [json.loads(_run_probe(code)) for _ in range(runs)]
+
+
+def measure_rerun(iterations: int):
+    """Retourne la durée de chaque rerun simulé, en millisecondes"""
+    return json.loads(_run_probe(_RERUN_PROBE.format(root=ROOT, iterations=iterations)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="nombre d'interpréteurs neufs")
+    parser.add_argument("--reruns", type=int, default=200, help="nombre de reruns simulés")
+    args = parser.parse_args()
+
+    cold_starts = measure_cold_start(args.runs)
+    login_ms = statistics.median(run["login_ms"] for run in cold_starts)
+    analysis_ms = statistics.median(run["analysis_ms"] for run in cold_starts)
+    forbidden = sorted({name for run in cold_starts for name in run["forbidden_loaded"]})
+    rerun_ms = statistics.median(measure_rerun(args.reruns))
+
+    checks = [
+        ("page de connexion (imports)", login_ms, LOGIN_COLD_START_BUDGET_MS),
+        ("page d'analyse (imports)", analysis_ms, ANALYSIS_IMPORT_BUDGET_MS),
+        ("rerun", rerun_ms, RERUN_BUDGET_MS),
+    ]
+    failed = False
+    for label, value, budget in checks:
+        status = "OK" if value <= budget else "DÉPASSÉ"
+        failed = failed or value > budget
+        print(f"[{status}] {label}: {value:.1f} ms (budget {budget} ms)")
+
+    if forbidden:
+        failed = True
+        print(f"[DÉPASSÉ] modules chargés par la page de connexion: {', '.join(forbidden)}")
+    else:
+        print("[OK] la page de connexion ne charge ni la pile PDF ni la pile d'inférence")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,129 @@
+"""Serveur HTTP local imitant l'API d'inférence Hugging Face.
+
+Les modèles de résumé (bart-large-cnn) répondent `[{"summary_text": ...}]`, les
+modèles de génération (Mistral) `[{"generated_text": ...}]`, ou un flux
+server-sent events token par token si la requête demande `"stream": true`. La
+latence (avant le premier token), le délai entre tokens et la proportion de
+réponses 503/504 sont configurables pour reproduire un service chargé ; 503 est
+accompagné d'un en-tête Retry-After comme le vrai service.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Sequence
+
+
+class StubInferenceServer:
+    """Faux service d'inférence démarré dans un thread, sur un port libre"""
+
+    def __init__(self, latency_ms: float = 200, jitter_ms: float = 50, error_rate: float = 0.0,
+                 error_statuses: Sequence[int] = (503, 504), retry_after: int = 0,
+                 summary_words: int = 60, token_delay_ms: float = 0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.retry_after = retry_after
+        self.summary_words = summary_words
+        self.token_delay_ms = token_delay_ms
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"requests": 0, "errors": 0}
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-inference", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        """URL à utiliser à la place de Config.INFERENCE_BASE_URL"""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/models"
+
+    def start(self) -> "StubInferenceServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubInferenceServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _draw(self):
+        """Tire la latence et l'éventuelle erreur d'une requête"""
+        with self._lock:
+            self.counters["requests"] += 1
+            delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            status = None
+            if self.error_statuses and self._random.random() < self.error_rate:
+                status = self._random.choice(self.error_statuses)
+                self.counters["errors"] += 1
+                self.counters[str(status)] = self.counters.get(str(status), 0) + 1
+            return delay, status
+
+    def _respond(self, path: str, payload: Dict) -> list:
+        words = str(payload.get("inputs", "")).split()
+        if "bart" in path or "summar" in path:
+            return [{"summary_text": " ".join(words[:self.summary_words])}]
+        max_tokens = payload.get("parameters", {}).get("max_new_tokens", 100)
+        return [{"generated_text": " ".join(words[-min(max_tokens, 80):])}]
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                delay, status = stub._draw()
+                time.sleep(delay)
+                if status is None and payload.get("stream"):
+                    self._stream(stub._respond(self.path, payload)[0]["generated_text"].split())
+                    return
+                if status is None:
+                    body = json.dumps(stub._respond(self.path, payload)).encode()
+                    status = 200
+                else:
+                    body = json.dumps({"error": "Model is currently loading", "estimated_time": stub.retry_after}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 503:
+                    self.send_header("Retry-After", str(stub.retry_after))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, words):
+                """Envoie un événement SSE par mot (encodage chunked, connexion conservée)"""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for index, word in enumerate(words):
+                        last = index == len(words) - 1
+                        event = {
+                            "token": {"id": index, "text": word if index == 0 else f" {word}", "special": False},
+                            "generated_text": " ".join(words) if last else None
+                        }
+                        data = f"data: {json.dumps(event)}\n\n".encode()
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                        self.wfile.flush()
+                        time.sleep(stub.token_delay_ms / 1000)
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # Génération annulée par le client
+                    self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,278 @@
+import hashlib
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+
+def content_hash(data: bytes) -> str:
+    """Retourne l'empreinte SHA-256 d'un contenu"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _extraction_size(value: Dict[str, Any]) -> int:
+    """Estime la taille en octets d'un résultat d'extraction"""
+    return len(value.get("text", "").encode("utf-8")) + 64
+
+
+class LRUCache:
+    """Cache LRU en mémoire, borné par une taille totale en octets et optionnellement par une durée de vie"""
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int], ttl_seconds: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.ttl_seconds = ttl_seconds
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retourne la valeur et la marque comme récemment utilisée"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] < time.monotonic():
+                # Entrée expirée : elle est retirée comme si elle était absente
+                del self._entries[key]
+                self.current_bytes -= entry[1]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Retourne la valeur sans la marquer comme utilisée ni compter de succès ou d'échec"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[2] is not None and entry[2] < time.monotonic()):
+                return None
+            return entry[0]
+
+    def put(self, key: str, value: Any):
+        """Ajoute une valeur puis évince les plus anciennes si nécessaire"""
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size, expires_at)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def pop(self, key: str) -> Optional[Any]:
+        """Retire une entrée du cache"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self.current_bytes -= entry[1]
+            return entry[0]
+
+    def pop_matching(self, predicate: Callable[[str], bool]) -> int:
+        """Retire toutes les entrées dont la clé vérifie le prédicat"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self.current_bytes -= self._entries.pop(key)[1]
+            return len(keys)
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Retourne les compteurs du cache"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+class ExtractionCache:
+    """Cache des extractions PDF indexé par empreinte du contenu.
+
+    Un premier niveau LRU en mémoire est partagé par toutes les sessions du processus ;
+    un second niveau persistant (collection MongoDB) est partagé entre les redémarrages
+    et les réplicas.
+    """
+
+    # Marge sous la limite de 16 Mo d'un document MongoDB
+    MAX_STORED_BYTES = 15 * 1024 * 1024
+
+    def __init__(self, collection=None, max_bytes: int = 256 * 1024 * 1024):
+        self.collection = collection
+        self.memory = LRUCache(max_bytes, _extraction_size)
+        self.persistent_hits = 0
+
+    def get(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Retourne l'extraction mise en cache pour ce contenu, ou None"""
+        extracted = self.memory.get(file_hash)
+        if extracted is not None:
+            return extracted
+
+        if self.collection is None:
+            return None
+        try:
+            document = self.collection.find_one({"_id": file_hash})
+            if document is None:
+                return None
+            extracted = {
+                "text": zlib.decompress(document["text"]).decode("utf-8"),
+                "num_pages": document["num_pages"],
+                "num_words": document["num_words"]
+            }
+            self.persistent_hits += 1
+            self.memory.put(file_hash, extracted)
+            return extracted
+        except Exception as e:
+            print(f"Erreur lors de la lecture du cache d'extraction: {e}")
+            return None
+
+    def put(self, file_hash: str, extracted: Dict[str, Any]):
+        """Enregistre une extraction dans les deux niveaux du cache"""
+        self.memory.put(file_hash, extracted)
+
+        if self.collection is None:
+            return
+        try:
+            compressed = zlib.compress(extracted["text"].encode("utf-8"))
+            if len(compressed) > self.MAX_STORED_BYTES:
+                return
+            self.collection.update_one(
+                {"_id": file_hash},
+                {"$setOnInsert": {
+                    "text": compressed,
+                    "num_pages": extracted["num_pages"],
+                    "num_words": extracted["num_words"],
+                    "created_at": datetime.now()
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"Erreur lors de l'écriture du cache d'extraction: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Retourne les compteurs du cache"""
+        stats = self.memory.stats()
+        stats["persistent_hits"] = self.persistent_hits
+        return stats
+
+
+class SummaryCache:
+    """Cache des résumés indexé par (empreinte du texte, modèle, longueur de troncature).
+
+    Les entrées expirent après `ttl_hours` dans les deux niveaux : éviction LRU en mémoire
+    et index TTL sur `expires_at` dans la collection MongoDB.
+    """
+
+    def __init__(self, collection=None, max_bytes: int = 16 * 1024 * 1024, ttl_hours: float = 24 * 7):
+        self.collection = collection
+        self.ttl = timedelta(hours=ttl_hours)
+        self.memory = LRUCache(max_bytes, lambda summary: len(summary.encode("utf-8")) + 64, self.ttl.total_seconds())
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str, model: str, max_chars: int) -> str:
+        """Construit la clé d'un résumé"""
+        return f"{content_hash(text.encode('utf-8'))}:{model}:{max_chars}"
+
+    def ensure_indexes(self):
+        """Crée l'index TTL de la collection persistante"""
+        if self.collection is None:
+            return
+        try:
+            self.collection.create_index("expires_at", expireAfterSeconds=0)
+        except Exception as e:
+            print(f"Erreur lors de la création de l'index du cache de résumés: {e}")
+
+    def get(self, key: str) -> Optional[str]:
+        """Retourne le résumé mis en cache, ou None"""
+        summary = self.memory.get(key)
+        if summary is None and self.collection is not None:
+            try:
+                document = self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.now()}})
+                if document is not None:
+                    summary = document["summary"]
+                    self.memory.put(key, summary)
+            except Exception as e:
+                print(f"Erreur lors de la lecture du cache de résumés: {e}")
+
+        if summary is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return summary
+
+    def peek(self, key: str) -> Optional[str]:
+        """Retourne le résumé mis en cache, ou None, sans toucher aux compteurs ni à l'ordre LRU"""
+        summary = self.memory.peek(key)
+        if summary is None and self.collection is not None:
+            try:
+                document = self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.now()}})
+                if document is not None:
+                    summary = document["summary"]
+            except Exception as e:
+                print(f"Erreur lors de la lecture du cache de résumés: {e}")
+        return summary
+
+    def put(self, key: str, summary: str):
+        """Enregistre un résumé"""
+        self.memory.put(key, summary)
+
+        if self.collection is None:
+            return
+        try:
+            self.collection.update_one(
+                {"_id": key},
+                {"$set": {"summary": summary, "expires_at": datetime.now() + self.ttl}},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"Erreur lors de l'écriture du cache de résumés: {e}")
+
+    def invalidate(self, text: Optional[str] = None) -> int:
+        """Invalide les résumés d'un texte (tous modèles confondus), ou tout le cache"""
+        if text is None:
+            removed = len(self.memory)
+            self.memory.clear()
+            query = {}
+        else:
+            prefix = f"{content_hash(text.encode('utf-8'))}:"
+            removed = self.memory.pop_matching(lambda key: key.startswith(prefix))
+            query = {"_id": {"$regex": f"^{prefix}"}}
+
+        if self.collection is not None:
+            try:
+                removed = max(removed, self.collection.delete_many(query).deleted_count)
+            except Exception as e:
+                print(f"Erreur lors de l'invalidation du cache de résumés: {e}")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Retourne les compteurs du cache"""
+        stats = self.memory.stats()
+        stats["hits"] = self.hits
+        stats["misses"] = self.misses
+        return stats
@@ -0,0 +1,143 @@
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+# Marqueur de fin de flux placé dans la file par le thread de lecture
+_END = object()
+
+
+class StreamError(Exception):
+    """Erreur signalée par le service pendant la génération"""
+
+
+def iter_sse_data(lines: Iterable[Any]) -> Iterator[str]:
+    """Extrait le champ `data` de chaque événement d'un flux server-sent events"""
+    data = []
+    for raw_line in lines:
+        line = raw_line.decode("utf-8") if isinstance(raw_line, bytes) else raw_line
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            data.append(value[1:] if value.startswith(" ") else value)
+    if data:
+        yield "\n".join(data)
+
+
+def token_text(event: Dict[str, Any]) -> Optional[str]:
+    """Texte du token d'un événement (format text-generation ou format OpenAI)"""
+    if "error" in event:
+        raise StreamError(event["error"])
+    token = event.get("token")
+    if token is not None:
+        return None if token.get("special") else token.get("text", "")
+    choices = event.get("choices")
+    if choices:
+        return (choices[0].get("delta") or {}).get("content")
+    return None
+
+
+class TokenStream:
+    """Tokens d'une réponse en streaming, lus dans un thread dédié.
+
+    L'itération produit le texte de chaque token, ou une chaîne vide toutes les
+    `poll_interval` secondes sans nouveau token : l'appelant garde ainsi la main
+    (Streamlit peut interrompre le script) même pendant l'attente du premier token.
+    `cancel()` ferme la connexion et arrête la lecture. Les réponses non SSE (JSON
+    complet) sont acceptées et produites en un seul morceau. `on_close` est appelé
+    une fois, à la fin de la génération ou à l'annulation.
+    """
+
+    def __init__(self, response, started_at: Optional[float] = None, poll_interval: float = 0.1):
+        self.response = response
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.poll_interval = poll_interval
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.tokens = 0
+        self.cancelled = False
+        self._cancel = threading.Event()
+        self.on_close: Optional[Callable[[], None]] = None
+
+    def _read(self, tokens: "queue.Queue"):
+        """Boucle du thread de lecture"""
+        try:
+            content_type = self.response.headers.get("Content-Type", "")
+            if "text/event-stream" in content_type:
+                events = (json.loads(data) for data in iter_sse_data(self.response.iter_lines()) if data != "[DONE]")
+                texts = (token_text(event) for event in events)
+            else:
+                result = self.response.json()
+                texts = [result[0]["generated_text"] if isinstance(result, list) else token_text(result)]
+
+            for text in texts:
+                if self._cancel.is_set():
+                    break
+                if not text:
+                    continue
+                if self.first_token_at is None:
+                    self.first_token_at = time.perf_counter()
+                self.tokens += 1
+                tokens.put(text)
+        except Exception as e:
+            # Une connexion fermée par cancel() n'est pas une erreur
+            if not self._cancel.is_set():
+                tokens.put(e)
+        finally:
+            self.finished_at = time.perf_counter()
+            self._closed()
+            tokens.put(_END)
+
+    def __iter__(self) -> Iterator[str]:
+        tokens = queue.Queue()
+        reader = threading.Thread(target=self._read, args=(tokens,), name="chat-stream", daemon=True)
+        reader.start()
+        while True:
+            try:
+                item = tokens.get(timeout=self.poll_interval)
+            except queue.Empty:
+                yield ""
+                continue
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def cancel(self):
+        """Interrompt la génération et libère la connexion"""
+        if self.finished_at is None:
+            self.cancelled = True
+        self._cancel.set()
+        self.response.close()
+        self._closed()
+
+    def _closed(self):
+        callback, self.on_close = self.on_close, None
+        if callback is not None:
+            callback()
+
+    def __enter__(self) -> "TokenStream":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Temps jusqu'au premier token, nombre de tokens et débit"""
+        end = self.finished_at or time.perf_counter()
+        generation = end - self.first_token_at if self.first_token_at is not None else 0.0
+        return {
+            "ttft_ms": round((self.first_token_at - self.started_at) * 1000, 1) if self.first_token_at is not None else None,
+            "tokens": self.tokens,
+            "tokens_per_second": round(self.tokens / generation, 1) if generation > 0 else None,
+            "duration_ms": round((end - self.started_at) * 1000, 1),
+            "cancelled": self.cancelled
+        }
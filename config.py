@@ -7,21 +7,99 @@ class Config:
     MONGODB_LOGS_COLLECTION = "activity_logs"
     MONGODB_SESSIONS_COLLECTION = "sessions"
     MONGODB_USERS_COLLECTION = "users"
+    MONGODB_EXTRACTION_CACHE_COLLECTION = "extraction_cache"
+    MONGODB_SUMMARY_CACHE_COLLECTION = "summary_cache"
+    
+    # Paramètres du pool de connexions MongoDB
+    MONGODB_MAX_POOL_SIZE = 50
+    MONGODB_MIN_POOL_SIZE = 0
+    MONGODB_MAX_IDLE_TIME_MS = 60000
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS = 5000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS = 5000
+    MONGODB_CONNECT_TIMEOUT_MS = 5000
+    MONGODB_SOCKET_TIMEOUT_MS = 20000
+    MONGODB_WRITE_CONCERN = 1  # ou "majority"
     
     # Paramètres de logging
     MAX_LOG_ENTRIES = 50
     LOG_DISPLAY_LIMIT = 20
+    LOG_ACTIVITY_TYPES = [
+        "file_uploaded",
+        "summaries_generated",
+        "question_asked",
+        "session_restored",
+        "manual_save",
+        "session_cleared",
+        "error_occurred"
+    ]
+    LOG_QUEUE_MAX_SIZE = 10000
+    LOG_BATCH_SIZE = 100
+    LOG_FLUSH_INTERVAL = 2.0  # secondes
+    LOG_OVERFLOW_POLICY = "drop_oldest"  # ou "block"
+    LOG_BLOCK_TIMEOUT = 0.5  # secondes, pour la politique "block"
     
     # Paramètres de session
     SESSION_TIMEOUT_HOURS = 24
     
+    # Paramètres de rétention des données
+    LOG_RETENTION_DAYS = 90
+    SESSION_ARCHIVE_RETENTION_DAYS = 365
+    RETENTION_INTERVAL_MINUTES = 60
+    
     # Paramètres d'API
     MAX_TEXT_LENGTH = 3000
     MAX_QUESTION_LENGTH = 100
+    INFERENCE_BASE_URL = "https://api-inference.huggingface.co/models"
+    SUMMARY_MODEL = "facebook/bart-large-cnn"
+    CHAT_MODEL = "mistralai/Mistral-7B-Instruct-v0.3"
+    SUMMARY_INPUT_CHARS = 4000  # garde-fou par bloc envoyé au modèle
+    SUMMARY_CHUNK_TOKENS = 700  # budget par bloc (bart-large-cnn accepte 1024 tokens)
+    SUMMARY_MAX_DEPTH = 3
+    SUMMARY_MAX_CONCURRENCY = 4
+    SUMMARY_BATCH_TIMEOUT = 300  # secondes
+    QUICK_SUMMARY_ENABLED = True  # résumé extractif instantané pendant le résumé par le modèle
+    QUICK_SUMMARY_SENTENCES = 5
+    
+    # Paramètres de recherche de passages pour le chat
+    RETRIEVAL_PASSAGE_TOKENS = 200
+    RETRIEVAL_TOP_K = 5
+    RETRIEVAL_TOKEN_BUDGET = 800
+    SEARCH_INDEX_MAX_BYTES = 15 * 1024 * 1024  # sous la limite de 16 Mo d'un document MongoDB
+    CHAT_CONTEXT_CHARS = 4000
+    CHAT_MAX_NEW_TOKENS = 500
+    CHAT_STREAMING = True  # affichage de la réponse au fil des tokens
+    
+    # Paramètres du client d'inférence Hugging Face
+    INFERENCE_CONNECT_TIMEOUT = 5  # secondes
+    INFERENCE_READ_TIMEOUT = 60  # secondes
+    INFERENCE_MAX_RETRIES = 3
+    INFERENCE_BACKOFF_BASE = 1.0  # secondes
+    INFERENCE_BACKOFF_MAX = 20  # secondes
+    INFERENCE_POOL_MAXSIZE = 10
+    INFERENCE_MAX_CONCURRENCY = 4  # appels simultanés pour tout le processus, toutes sessions confondues
+    INFERENCE_EXPECTED_SECONDS = 5  # durée d'appel supposée avant les premières mesures
+    INFERENCE_QUEUE_TIMEOUT = 120  # secondes d'attente max avant repli sur le backend suivant
+
+    # Backends d'inférence, essayés dans l'ordre : "huggingface", "local" (extractif, CPU) ou "stub"
+    INFERENCE_BACKENDS = ["huggingface", "local"]
+    INFERENCE_BACKEND_COOLDOWN = 30  # secondes de mise à l'écart d'un backend en échec
+    LOCAL_SUMMARY_SENTENCES = 5
+    LOCAL_ANSWER_SENTENCES = 3
+    
+    # Paramètres du cache de résumés
+    SUMMARY_CACHE_TTL_HOURS = 24 * 7
+    SUMMARY_CACHE_MAX_BYTES = 16 * 1024 * 1024
+    
+    # Paramètres d'extraction PDF
+    EXTRACTION_MAX_WORKERS = 4
+    EXTRACTION_PAGES_PER_TASK = 16
+    EXTRACTION_MIN_PARALLEL_PAGES = 32
+    EXTRACTION_CACHE_MAX_BYTES = 256 * 1024 * 1024
     
     # Paramètres d'authentification
     MIN_PASSWORD_LENGTH = 6
     SESSION_TIMEOUT = 24  # heures
+    SESSION_MAX_LIFETIME_HOURS = 24 * 7  # durée de vie maximale d'un jeton, renouvellements compris
     
     # Paramètres d'interface
     SIDEBAR_TITLE = "📊 Logs et Session"
@@ -29,6 +107,23 @@ class Config:
     
     # Paramètres d'authentification
     MIN_PASSWORD_LENGTH = 8
+    PASSWORD_SCRYPT_N = 2 ** 14  # coût CPU/mémoire (16 Mo par hachage avec r=8)
+    PASSWORD_SCRYPT_R = 8
+    PASSWORD_SCRYPT_P = 1
+    PASSWORD_HASH_MAX_CONCURRENCY = 4
+    PASSWORD_HASH_TIMEOUT = 10  # secondes
+    USER_PROFILE_CACHE_TTL_SECONDS = 300
+    USER_PROFILE_CACHE_MAX_BYTES = 1024 * 1024
+    
+    # Limitation des tentatives de connexion / inscription
+    RATE_LIMIT_IP_CAPACITY = 20
+    RATE_LIMIT_IP_REFILL_PER_MINUTE = 10
+    RATE_LIMIT_EMAIL_CAPACITY = 5
+    RATE_LIMIT_EMAIL_REFILL_PER_MINUTE = 1
+    RATE_LIMIT_SHARED = False  # True pour partager les compteurs entre réplicas via MongoDB
+    RATE_LIMIT_WINDOW_SECONDS = 60
+    RATE_LIMIT_TRUSTED_PROXIES = 0  # nombre de proxys devant l'application dont X-Forwarded-For est fiable
+    MONGODB_RATE_LIMIT_COLLECTION = "rate_limits"
     PASSWORD_REQUIREMENTS = {
         "min_length": 8,
         "require_uppercase": True,
@@ -41,6 +136,11 @@ class Config:
         """Récupère la chaîne de connexion MongoDB depuis les secrets"""
         return st.secrets["mongodb"]["connection_string"]
     
+    @staticmethod
+    def get_session_secret():
+        """Récupère la clé de signature des jetons de session depuis les secrets"""
+        return st.secrets["auth"]["session_secret"]
+    
     @staticmethod
     def get_huggingface_api_key():
         """Récupère la clé API Hugging Face depuis les secrets"""
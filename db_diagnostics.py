@@ -0,0 +1,36 @@
+"""Diagnostic des index MongoDB.
+
+Usage : python db_diagnostics.py
+Crée les index manquants puis affiche, pour chaque requête fréquente, le plan retenu
+par MongoDB et s'il s'appuie sur un index.
+"""
+from utils import DatabaseManager
+
+
+def main():
+    # Outil ponctuel : pas d'archivage de sessions ni de logger en arrière-plan
+    db = DatabaseManager(start_background_jobs=False)
+    health = db.health_check()
+    print(f"Santé MongoDB : {health['status']} (ping {health['ping_ms'] or 0:.1f} ms)")
+
+    for index_name in db.ensure_indexes():
+        print(f"Index présent : {index_name}")
+
+    all_indexed = True
+    for report in db.explain_hot_queries():
+        if "error" in report:
+            all_indexed = False
+            print(f"[ERREUR] {report['query']} ({report['collection']}) : {report['error']}")
+            continue
+
+        status = "OK" if report["uses_index"] and not report["in_memory_sort"] else "SCAN"
+        all_indexed = all_indexed and status == "OK"
+        print(f"[{status}] {report['query']} ({report['collection']}) : "
+              f"index={report['index']}, étapes={' > '.join(report['stages'])}")
+
+    db.close_connection()
+    return 0 if all_indexed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
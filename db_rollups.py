@@ -0,0 +1,27 @@
+"""Recalcul des agrégats d'utilisation.
+
+Usage : python db_rollups.py [AAAA-MM-JJ]
+Reconstruit la collection usage_rollups depuis activity_logs (depuis la date donnée,
+ou depuis le début). À lancer après une migration ou une perte de lots de logs.
+"""
+import sys
+from datetime import datetime
+
+from utils import DatabaseManager
+
+
+def main():
+    since = datetime.strptime(sys.argv[1], "%Y-%m-%d") if len(sys.argv) > 1 else None
+    # Outil ponctuel : pas d'archivage de sessions ni de logger en arrière-plan
+    db = DatabaseManager(start_background_jobs=False)
+    if db.analytics is None:
+        print("Base de données non connectée")
+        return 1
+    db.analytics.rebuild_rollups(since)
+    print("Agrégats d'utilisation recalculés")
+    db.close_connection()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,70 @@
+import io
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from PyPDF2 import PdfReader
+
+# Lecteur PDF propre à chaque processus de travail
+_worker_reader = None
+
+
+def _init_worker(pdf_bytes: bytes):
+    """Ouvre le PDF une seule fois par processus de travail"""
+    global _worker_reader
+    _worker_reader = PdfReader(io.BytesIO(pdf_bytes))
+
+
+def _extract_page_range(start: int, stop: int) -> list:
+    """Extrait le texte des pages [start, stop) dans un processus de travail"""
+    return [_worker_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_page_texts(pdf_bytes: bytes, max_workers: int = 4, pages_per_task: int = 16,
+                    min_parallel_pages: int = 32) -> Iterator[Tuple[int, int, str]]:
+    """Génère (index_page, nombre_pages, texte) dans l'ordre des pages.
+
+    Les petits documents sont extraits dans le processus courant ; au-delà de
+    `min_parallel_pages`, les pages sont réparties par blocs dans un pool de processus
+    et renvoyées au fur et à mesure, toujours dans l'ordre.
+    """
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    num_pages = len(reader.pages)
+
+    if num_pages < min_parallel_pages or max_workers <= 1:
+        for index, page in enumerate(reader.pages):
+            yield index, num_pages, page.extract_text() or ""
+        return
+
+    starts = list(range(0, num_pages, pages_per_task))
+    stops = [min(start + pages_per_task, num_pages) for start in starts]
+    workers = min(max_workers, len(starts))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pdf_bytes,)) as executor:
+        # executor.map conserve l'ordre des blocs tout en les produisant dès qu'ils sont prêts
+        for start, texts in zip(starts, executor.map(_extract_page_range, starts, stops)):
+            for offset, text in enumerate(texts):
+                yield start + offset, num_pages, text
+
+
+def extract_pdf(pdf_bytes: bytes, progress_callback: Optional[Callable[[int, int], None]] = None,
+                **options) -> Dict[str, Any]:
+    """Extrait le texte d'un PDF et calcule pages et mots en une seule passe.
+
+    `progress_callback(pages_traitees, nombre_pages)` est appelé après chaque page.
+    Retourne un dictionnaire au format de `st.session_state["file_texts"]`.
+    """
+    page_texts = []
+    num_words = 0
+    num_pages = 0
+
+    for index, num_pages, text in iter_page_texts(pdf_bytes, **options):
+        page_texts.append(text)
+        num_words += len(text.split())
+        if progress_callback is not None:
+            progress_callback(index + 1, num_pages)
+
+    return {
+        "text": "\n".join(page_texts),
+        "num_pages": num_pages,
+        "num_words": num_words
+    }
@@ -0,0 +1,126 @@
+import re
+from typing import Dict, List
+
+import numpy as np
+
+from retrieval import tokenize
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Découpe un texte en phrases (ponctuation finale ou paragraphe)"""
+    return [sentence.strip() for sentence in _SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+
+class SentenceMatrix:
+    """Matrice TF-IDF creuse des phrases d'un texte, au format COO (lignes, colonnes, poids).
+
+    Les lignes sont normalisées (norme L2) : le produit scalaire de deux lignes est
+    leur similarité cosinus. Seules les cases non nulles sont stockées, ce qui garde
+    la mémoire proportionnelle au nombre de mots même pour des dizaines de milliers
+    de phrases.
+    """
+
+    def __init__(self, sentences: List[str]):
+        token_lists = [tokenize(sentence) for sentence in sentences]
+        lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(token_lists))
+        self.vocabulary: Dict[str, int] = {}
+        vocabulary = self.vocabulary
+        term_ids = np.fromiter(
+            (vocabulary.setdefault(token, len(vocabulary)) for tokens in token_lists for token in tokens),
+            dtype=np.int64,
+            count=int(lengths.sum())
+        )
+        self.num_sentences = len(sentences)
+        self.num_terms = len(vocabulary)
+
+        # Comptage des couples (phrase, terme)
+        stride = max(self.num_terms, 1)
+        pairs, counts = np.unique(np.repeat(np.arange(self.num_sentences), lengths) * stride + term_ids, return_counts=True)
+        self.rows = pairs // stride
+        self.cols = pairs % stride
+
+        document_frequency = np.bincount(self.cols, minlength=self.num_terms)
+        self.idf = np.log((1 + self.num_sentences) / (1 + document_frequency)) + 1
+        values = (1 + np.log(counts)) * self.idf[self.cols]
+        norms = np.sqrt(np.bincount(self.rows, weights=values ** 2, minlength=self.num_sentences))
+        self.values = values / norms[self.rows] if len(values) else values
+        # Similarité de chaque phrase avec elle-même : 1, ou 0 pour une phrase sans terme
+        self.self_similarity = (norms > 0).astype(np.float64)
+
+    def dot(self, weights: np.ndarray) -> np.ndarray:
+        """Produit matrice × vecteur de termes : un score par phrase"""
+        return np.bincount(self.rows, weights=self.values * weights[self.cols], minlength=self.num_sentences)
+
+    def similarity_dot(self, vector: np.ndarray) -> np.ndarray:
+        """(S - I) · vector, où S = X·Xᵀ est la matrice des similarités cosinus entre phrases.
+
+        S n'est jamais construite : Xᵀ·vector puis X·(Xᵀ·vector) coûtent chacun un
+        passage sur les cases non nulles, au lieu des n² cases d'une matrice dense.
+        """
+        projected = np.bincount(self.cols, weights=self.values * vector[self.rows], minlength=self.num_terms)
+        return self.dot(projected) - self.self_similarity * vector
+
+    def query_weights(self, text: str) -> np.ndarray:
+        """Vecteur TF-IDF (non normalisé) des termes d'un texte connus de la matrice"""
+        weights = np.zeros(self.num_terms)
+        for token in tokenize(text):
+            term_id = self.vocabulary.get(token)
+            if term_id is not None:
+                weights[term_id] += self.idf[term_id]
+        return weights
+
+
+def textrank_scores(matrix: SentenceMatrix, damping: float = 0.85, max_iterations: int = 100,
+                    tolerance: float = 1e-6) -> np.ndarray:
+    """Centralité TextRank de chaque phrase (PageRank sur le graphe des similarités cosinus)"""
+    n = matrix.num_sentences
+    if n == 0:
+        return np.zeros(0)
+
+    degree = matrix.similarity_dot(np.ones(n))
+    # Phrase isolée (aucun terme partagé) : son score est redistribué uniformément
+    isolated = degree <= 1e-12
+    safe_degree = np.where(isolated, 1.0, degree)
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(max_iterations):
+        shares = np.where(isolated, 0.0, scores / safe_degree)
+        updated = (1 - damping) / n + damping * (matrix.similarity_dot(shares) + scores[isolated].sum() / n)
+        converged = np.abs(updated - scores).sum() < tolerance
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def _select(sentences: List[str], scores: np.ndarray, max_sentences: int) -> str:
+    """Garde les phrases les mieux notées, dans leur ordre d'origine"""
+    if len(sentences) <= max_sentences:
+        return " ".join(sentences)
+    best = np.sort(np.argsort(-scores, kind="stable")[:max_sentences])
+    return " ".join(sentences[index] for index in best)
+
+
+def summarize_extractive(text: str, max_sentences: int = 5) -> str:
+    """Résumé extractif : les phrases les plus centrales du texte selon TextRank"""
+    sentences = split_sentences(text)
+    if len(sentences) <= max_sentences:
+        return " ".join(sentences)
+    return _select(sentences, textrank_scores(SentenceMatrix(sentences)), max_sentences)
+
+
+def answer_extractive(question: str, context: str, max_sentences: int = 3) -> str:
+    """Réponse extractive : phrases du contexte les plus proches de la question (cosinus TF-IDF)"""
+    sentences = split_sentences(context)
+    if not sentences:
+        return ""
+
+    matrix = SentenceMatrix(sentences)
+    scores = matrix.dot(matrix.query_weights(question))
+    matching = np.flatnonzero(scores > 0)
+    if not len(matching):
+        return ""
+    return _select([sentences[index] for index in matching], scores[matching], max_sentences)
+
@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from chat_stream import TokenStream
+
+# Codes HTTP pour lesquels la requête est relancée (modèle en chargement, passerelle surchargée)
+RETRY_STATUS_CODES = (503, 504)
+
+
+class InferenceClient:
+    """Client HTTP partagé pour l'API d'inférence Hugging Face.
+
+    Réutilise les connexions (keep-alive) via un pool, applique des délais de connexion
+    et de lecture, et relance les réponses 503/504 avec un backoff exponentiel à jitter.
+    """
+
+    def __init__(self, api_key: str, connect_timeout: float = 5.0, read_timeout: float = 60.0,
+                 max_retries: int = 3, backoff_base: float = 1.0, backoff_max: float = 20.0,
+                 pool_maxsize: int = 10):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests_sent = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _backoff_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Calcule l'attente avant la tentative suivante (full jitter, borné)"""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def post(self, url: str, payload: Dict[str, Any], **kwargs) -> requests.Response:
+        """Envoie une requête POST JSON, relancée sur 503/504 et erreurs de connexion.
+
+        Retourne la dernière réponse obtenue ; lève l'exception de `requests` si toutes
+        les tentatives ont échoué sans réponse.
+        """
+        response = None
+        for attempt in range(self.max_retries + 1):
+            with self._lock:
+                self.in_flight += 1
+                self.requests_sent += 1
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout, **kwargs)
+                error = None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response, error = None, e
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+            if error is None and response.status_code not in RETRY_STATUS_CODES:
+                return response
+            if attempt == self.max_retries:
+                break
+
+            with self._lock:
+                self.retries += 1
+            delay = self._backoff_delay(attempt, response)
+            if response is not None:
+                # Rend la connexion au pool (nécessaire pour les réponses en streaming)
+                response.close()
+            time.sleep(delay)
+
+        with self._lock:
+            self.failures += 1
+        if response is None:
+            raise error
+        return response
+
+    def stream(self, url: str, payload: Dict[str, Any], poll_interval: float = 0.1):
+        """Lance une génération en streaming (server-sent events).
+
+        Retourne un TokenStream si le service a accepté la requête, sinon la réponse
+        d'erreur (après les relances habituelles sur 503/504).
+        """
+        started_at = time.perf_counter()
+        response = self.post(url, {**payload, "stream": True}, stream=True)
+        if response.status_code != 200:
+            return response
+        return TokenStream(response, started_at=started_at, poll_interval=poll_interval)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Retourne les métriques du pool de connexions"""
+        connections = 0
+        pooled_requests = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                pooled_requests += pool.num_requests
+
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "requests": self.requests_sent,
+                "retries": self.retries,
+                "failures": self.failures,
+                "connections_opened": connections,
+                "reuse_ratio": 1 - connections / pooled_requests if pooled_requests else 0.0
+            }
+
+    def close(self):
+        """Ferme les connexions du pool"""
+        self.session.close()
@@ -0,0 +1,228 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+# Classes de priorité : les questions du chat passent avant les résumés en lot
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+# Rappel d'attente : (position dans la file, attente estimée en secondes)
+WaitCallback = Callable[[int, float], None]
+
+
+class QueueTimeout(Exception):
+    """Attente d'une place d'inférence trop longue"""
+
+
+class QueueTicket:
+    """Demande d'une place d'inférence"""
+
+    def __init__(self, user_id: str, priority: int):
+        self.user_id = user_id
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.granted = False
+        self.released = False
+
+
+class InferenceScheduler:
+    """Limite globale des appels d'inférence simultanés, partagée par toutes les sessions.
+
+    Au plus `max_concurrency` appels sont en cours ; les autres attendent dans une file
+    par classe de priorité (INTERACTIVE avant BULK). Dans une classe, chaque utilisateur
+    a sa propre file et les places sont attribuées à tour de rôle entre utilisateurs :
+    un lot de 40 blocs à résumer ne fait pas attendre les 3 blocs d'un collègue derrière
+    lui. La durée moyenne des appels (moyenne glissante) sert à estimer l'attente.
+
+    L'utilisateur et la priorité des appels faits par un thread se fixent avec
+    `context()` ou `bind()` ; les backends appellent ensuite `slot()` sans argument.
+    """
+
+    def __init__(self, max_concurrency: int = 4, expected_seconds: float = 5.0, timeout: Optional[float] = None,
+                 smoothing: float = 0.2):
+        self.max_concurrency = max(1, max_concurrency)
+        self.average_seconds = expected_seconds
+        self.timeout = timeout
+        self.smoothing = smoothing
+        self._queues: Dict[int, "OrderedDict[str, Deque[QueueTicket]]"] = {INTERACTIVE: OrderedDict(), BULK: OrderedDict()}
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self.running = 0
+        self.granted: Dict[int, int] = {INTERACTIVE: 0, BULK: 0}
+        self.total_wait: Dict[int, float] = {INTERACTIVE: 0.0, BULK: 0.0}
+        self.timeouts = 0
+
+    # Contexte d'appel du thread courant
+
+    @contextmanager
+    def context(self, user_id: str, priority: int, on_wait: Optional[WaitCallback] = None) -> Iterator[None]:
+        """Attribue les appels d'inférence du thread courant à un utilisateur et une priorité"""
+        previous = getattr(self._local, "request", None)
+        self._local.request = (user_id, priority, on_wait)
+        try:
+            yield
+        finally:
+            self._local.request = previous
+
+    def bind(self, fn: Callable, user_id: str, priority: int) -> Callable:
+        """Enveloppe `fn` pour qu'elle s'exécute dans le contexte donné, quel que soit le thread"""
+        def bound(*args, **kwargs):
+            with self.context(user_id, priority):
+                return fn(*args, **kwargs)
+        return bound
+
+    def current_request(self) -> Tuple[str, int, Optional[WaitCallback]]:
+        """(utilisateur, priorité, rappel d'attente) du thread courant"""
+        return getattr(self._local, "request", None) or ("anonyme", BULK, None)
+
+    # File d'attente
+
+    def _dispatch(self):
+        """Attribue les places libres ; appelé avec le verrou"""
+        granted = False
+        while self.running < self.max_concurrency:
+            ticket = self._pop_next()
+            if ticket is None:
+                break
+            ticket.granted = True
+            ticket.started_at = time.monotonic()
+            self.running += 1
+            self.granted[ticket.priority] += 1
+            self.total_wait[ticket.priority] += ticket.started_at - ticket.enqueued_at
+            granted = True
+        if granted:
+            self._condition.notify_all()
+
+    def _pop_next(self) -> Optional[QueueTicket]:
+        for priority in (INTERACTIVE, BULK):
+            users = self._queues[priority]
+            if users:
+                # Tourniquet : l'utilisateur servi repasse en fin de file
+                user_id, tickets = next(iter(users.items()))
+                ticket = tickets.popleft()
+                del users[user_id]
+                if tickets:
+                    users[user_id] = tickets
+                return ticket
+        return None
+
+    def _order(self) -> List[QueueTicket]:
+        """Ordre dans lequel les demandes en attente seront servies ; appelé avec le verrou"""
+        order = []
+        for priority in (INTERACTIVE, BULK):
+            queues = list(self._queues[priority].values())
+            depth = max((len(tickets) for tickets in queues), default=0)
+            for index in range(depth):
+                order.extend(tickets[index] for tickets in queues if len(tickets) > index)
+        return order
+
+    def _remove(self, ticket: QueueTicket):
+        users = self._queues[ticket.priority]
+        tickets = users.get(ticket.user_id)
+        if tickets is not None and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del users[ticket.user_id]
+
+    def estimate_wait(self, position: int) -> float:
+        """Attente estimée (secondes) pour la demande qui a `position` demandes devant elle"""
+        return (position + 1) * self.average_seconds / self.max_concurrency
+
+    def acquire(self, user_id: Optional[str] = None, priority: Optional[int] = None,
+                on_wait: Optional[WaitCallback] = None, poll_interval: float = 0.5) -> QueueTicket:
+        """Attend une place d'inférence ; lève QueueTimeout au-delà du délai configuré.
+
+        Sans argument, l'utilisateur, la priorité et le rappel viennent de `context()`.
+        `on_wait(position, attente_estimee)` est appelé dans le thread appelant tant que
+        la demande attend.
+        """
+        context_user, context_priority, context_on_wait = self.current_request()
+        ticket = QueueTicket(user_id or context_user, context_priority if priority is None else priority)
+        on_wait = on_wait or context_on_wait
+        deadline = None if self.timeout is None else ticket.enqueued_at + self.timeout
+
+        with self._condition:
+            self._queues[ticket.priority].setdefault(ticket.user_id, deque()).append(ticket)
+            self._dispatch()
+
+        try:
+            while True:
+                with self._condition:
+                    if ticket.granted:
+                        return ticket
+                    if deadline is not None and time.monotonic() >= deadline:
+                        self._remove(ticket)
+                        self.timeouts += 1
+                        raise QueueTimeout("Le service d'IA est saturé. Veuillez réessayer dans quelques minutes.")
+                    position = self._order().index(ticket)
+                if on_wait is not None:
+                    on_wait(position, self.estimate_wait(position))
+                with self._condition:
+                    if not ticket.granted:
+                        wait = poll_interval if deadline is None else max(0.0, min(poll_interval, deadline - time.monotonic()))
+                        self._condition.wait(wait)
+        except BaseException:
+            # Script interrompu (nouvelle question, rechargement) : la demande quitte la file
+            with self._condition:
+                if ticket.granted:
+                    self._release(ticket)
+                else:
+                    self._remove(ticket)
+            raise
+
+    def _release(self, ticket: QueueTicket):
+        if ticket.released or not ticket.granted:
+            return
+        ticket.released = True
+        self.running -= 1
+        duration = time.monotonic() - ticket.started_at
+        self.average_seconds += self.smoothing * (duration - self.average_seconds)
+        self._dispatch()
+
+    def release(self, ticket: QueueTicket):
+        """Libère la place d'une demande (sans effet si déjà libérée)"""
+        with self._condition:
+            self._release(ticket)
+
+    @contextmanager
+    def slot(self, user_id: Optional[str] = None, priority: Optional[int] = None) -> Iterator[QueueTicket]:
+        """Occupe une place d'inférence le temps du bloc"""
+        ticket = self.acquire(user_id, priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def user_status(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Demandes en attente d'un utilisateur : nombre, meilleure position et attente estimée"""
+        with self._condition:
+            order = self._order()
+        positions = [position for position, ticket in enumerate(order) if ticket.user_id == user_id]
+        if not positions:
+            return None
+        return {
+            "queued": len(positions),
+            "position": positions[0],
+            "estimated_wait": self.estimate_wait(positions[0]),
+            "estimated_drain": self.estimate_wait(positions[-1])
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Places occupées, demandes en attente par classe, attentes moyennes et délais dépassés"""
+        with self._condition:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "running": self.running,
+                "queued": {PRIORITY_NAMES[priority]: sum(len(tickets) for tickets in users.values())
+                           for priority, users in self._queues.items()},
+                "average_wait_seconds": {
+                    PRIORITY_NAMES[priority]: round(self.total_wait[priority] / self.granted[priority], 3) if self.granted[priority] else 0.0
+                    for priority in (INTERACTIVE, BULK)
+                },
+                "average_call_seconds": round(self.average_seconds, 3),
+                "timeouts": self.timeouts
+            }
@@ -1,24 +1,19 @@
 import streamlit as st
-import PyPDF2
-import requests
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from utils import DatabaseManager, format_log_entry
 from auth import AuthManager, show_auth_page
+from passwords import PasswordHasher
+from rate_limit import AuthRateLimiter, MongoWindowCounter, resolve_client_ip
 from config import Config
 from style_utils import apply_custom_styles
 import uuid
-import hashlib
+from datetime import datetime, timedelta
 import re
 
-# Appliquer les styles CSS personnalisés
+# Appliquer les styles CSS personnalisés (style.css, lu une seule fois par processus)
 apply_custom_styles()
 
-# Masquer les éléments Streamlit par défaut
-st.markdown(r"""<style>.stDeployButton {visibility: hidden;}</style>""", unsafe_allow_html=True)
-hide_menu_style = """<style>#MainMenu {visibility: hidden;}</style>"""
-st.markdown(hide_menu_style, unsafe_allow_html=True)
-
-HF_API_KEY = Config.get_huggingface_api_key()
-
 # Initialiser la connexion à la base de données
 @st.cache_resource
 def get_database():
@@ -26,6 +21,76 @@ def get_database():
 
 db = get_database()
 
+# Hachage des mots de passe dans un pool borné, partagé par toutes les sessions
+@st.cache_resource
+def get_password_hasher():
+    return PasswordHasher(
+        n=Config.PASSWORD_SCRYPT_N,
+        r=Config.PASSWORD_SCRYPT_R,
+        p=Config.PASSWORD_SCRYPT_P,
+        max_concurrency=Config.PASSWORD_HASH_MAX_CONCURRENCY,
+        timeout=Config.PASSWORD_HASH_TIMEOUT
+    )
+
+password_hasher = get_password_hasher()
+
+# Jetons de session signés et cache des profils utilisateurs
+@st.cache_resource
+def get_auth_manager():
+    return AuthManager(db, password_hasher)
+
+auth_manager = get_auth_manager()
+
+# Limitation des tentatives de connexion et d'inscription, partagée par toutes les sessions
+@st.cache_resource
+def get_rate_limiter():
+    shared_store = None
+    if Config.RATE_LIMIT_SHARED and db.db is not None:
+        shared_store = MongoWindowCounter(db.db[Config.MONGODB_RATE_LIMIT_COLLECTION], Config.RATE_LIMIT_WINDOW_SECONDS)
+        shared_store.ensure_indexes()
+    return AuthRateLimiter(
+        ip_capacity=Config.RATE_LIMIT_IP_CAPACITY,
+        ip_refill_per_minute=Config.RATE_LIMIT_IP_REFILL_PER_MINUTE,
+        email_capacity=Config.RATE_LIMIT_EMAIL_CAPACITY,
+        email_refill_per_minute=Config.RATE_LIMIT_EMAIL_REFILL_PER_MINUTE,
+        shared_store=shared_store
+    )
+
+rate_limiter = get_rate_limiter()
+
+def get_client_request():
+    """Requête HTTP de la connexion websocket de la session courante, ou None"""
+    try:
+        ctx = get_script_run_ctx()
+        client = runtime.get_instance().get_client(ctx.session_id) if ctx is not None else None
+        return client.request if client is not None else None
+    except Exception:
+        return None
+
+def get_client_ip():
+    """Adresse IP du client : celle de la connexion, ou celle transmise par les proxys de confiance"""
+    request = get_client_request()
+    if request is None:
+        return None
+    try:
+        return resolve_client_ip(request.remote_ip, request.headers.get("X-Forwarded-For"), Config.RATE_LIMIT_TRUSTED_PROXIES)
+    except Exception:
+        return None
+
+def get_session_binding():
+    """User-Agent du navigateur : le jeton de l'URL n'est valable qu'avec lui"""
+    request = get_client_request()
+    if request is None:
+        return None
+    return request.headers.get("User-Agent")
+
+def check_rate_limit(action, email):
+    """Retourne un message d'erreur si la tentative dépasse la limite, sinon None"""
+    allowed, retry_after = rate_limiter.check(action, get_client_ip(), email)
+    if allowed:
+        return None
+    return f"Trop de tentatives, veuillez réessayer dans {max(1, int(retry_after))} secondes"
+
 
 # Initialiser les états d'authentification
 if "authenticated" not in st.session_state:
@@ -35,9 +100,22 @@ if "current_user" not in st.session_state:
 if "show_register" not in st.session_state:
     st.session_state.show_register = False
 
+# Après un rechargement de page, la session est restaurée depuis le jeton signé de l'URL
+if not st.session_state.authenticated:
+    session_token = st.experimental_get_query_params().get("session", [None])[0]
+    restored = auth_manager.restore_session(session_token, get_session_binding()) if session_token else None
+    if restored:
+        st.session_state.current_user, st.session_state.session_id, renewed_token = restored
+        st.session_state.authenticated = True
+        # Expiration glissante, bornée par la durée de vie maximale du jeton d'origine
+        st.experimental_set_query_params(session=renewed_token)
+    elif session_token:
+        # Jeton expiré ou révoqué : il ne reste pas dans l'URL
+        st.experimental_set_query_params()
+
 def hash_password(password):
-    """Hash le mot de passe avec SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hash le mot de passe avec scrypt"""
+    return password_hasher.hash(password)
 
 def validate_email(email):
     """Valide le format de l'email"""
@@ -73,6 +151,10 @@ def register_user(email, password, confirm_password, full_name):
         if password != confirm_password:
             return False, "Les mots de passe ne correspondent pas"
         
+        rate_limit_message = check_rate_limit("register", email)
+        if rate_limit_message:
+            return False, rate_limit_message
+        
         # Vérifier si l'utilisateur existe déjà
         existing_user = db.get_user_by_email(email)
         if existing_user:
@@ -98,28 +180,34 @@ def register_user(email, password, confirm_password, full_name):
         return False, f"Erreur lors de l'inscription : {str(e)}"
 
 def login_user(email, password):
-    """Connecte un utilisateur"""
+    """Connecte un utilisateur ; retourne (succès, message, utilisateur)"""
     try:
         if not email or not password:
-            return False, "Email et mot de passe requis"
+            return False, "Email et mot de passe requis", None
+        
+        rate_limit_message = check_rate_limit("login", email)
+        if rate_limit_message:
+            return False, rate_limit_message, None
         
         # Récupérer l'utilisateur
         user = db.get_user_by_email(email)
         if not user:
-            return False, "Email ou mot de passe incorrect"
+            return False, "Email ou mot de passe incorrect", None
         
-        # Vérifier le mot de passe
-        hashed_password = hash_password(password)
-        if user["password"] != hashed_password:
-            return False, "Email ou mot de passe incorrect"
+        # Vérifier le mot de passe (les anciens hachages SHA-256 sont mis à niveau au passage)
+        is_valid, new_hash = password_hasher.verify_and_update(password, user["password"])
+        if not is_valid:
+            return False, "Email ou mot de passe incorrect", None
+        if new_hash:
+            db.update_password_hash(user["_id"], user["password"], new_hash)
         
         # Mettre à jour la dernière connexion
         db.update_last_login(user["_id"])
         
-        return True, "Connexion réussie !"
+        return True, "Connexion réussie !", user
         
     except Exception as e:
-        return False, f"Erreur lors de la connexion : {str(e)}"
+        return False, f"Erreur lors de la connexion : {str(e)}", None
 
 def show_auth_page():
     """Affiche la page d'authentification"""
@@ -161,10 +249,15 @@ def show_auth_page():
             login_submitted = st.form_submit_button("🚀 Se connecter", use_container_width=True)
             
             if login_submitted:
-                success, message = login_user(login_email, login_password)
+                success, message, user = login_user(login_email, login_password)
                 if success:
                     st.session_state.authenticated = True
-                    st.session_state.current_user = db.get_user_by_email(login_email)
+                    st.session_state.current_user = auth_manager.cache_profile(user)
+                    if "session_id" not in st.session_state:
+                        st.session_state.session_id = str(uuid.uuid4())
+                    st.experimental_set_query_params(
+                        session=auth_manager.issue_session_token(user, st.session_state.session_id, get_session_binding())
+                    )
                     st.markdown(f'<div class="success-message">✅ {message}</div>', unsafe_allow_html=True)
                     st.balloons()
                     st.rerun()
@@ -199,18 +292,28 @@ def show_auth_page():
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+def logout():
+    """Déconnecte l'utilisateur : révoque ses jetons, vide l'URL et l'état de la session"""
+    auth_manager.logout_user()
+    st.session_state.authenticated = False
+    st.session_state.current_user = None
+    st.session_state.file_texts = {}
+    st.session_state.summaries = []
+    st.session_state.current_summaries = ""
+    st.session_state.messages = []
+    st.session_state.pop("session_store", None)
+    st.session_state.pop("search_index", None)
+    # La prochaine connexion ouvre une nouvelle session, liée à son propre jeton
+    st.session_state.pop("session_id", None)
+    st.session_state.pop("session_loaded", None)
+    st.rerun()
+
 def show_logout_button():
     """Affiche le bouton de déconnexion dans la sidebar"""
     with st.sidebar:
         st.divider()
         if st.button("🚪 Se déconnecter"):
-            st.session_state.authenticated = False
-            st.session_state.current_user = None
-            st.session_state.file_texts = {}
-            st.session_state.summaries = []
-            st.session_state.current_summaries = ""
-            st.session_state.messages = []
-            st.rerun()
+            logout()
 
 # Vérifier l'authentification
 if not st.session_state.authenticated:
@@ -233,97 +336,190 @@ show_logout_button()
 if "session_id" not in st.session_state:
     st.session_state.session_id = str(uuid.uuid4())
 
-# Initialiser la connexion à la base de données
+# Les piles PDF, inférence et recherche ne sont importées qu'une fois l'utilisateur
+# authentifié : la page de connexion s'affiche sans les charger
+from extraction import extract_pdf
+from cache import ExtractionCache, SummaryCache, content_hash
+from summarization import SummarizationError, summarize_documents, summarize_hierarchical, summary_inputs
+from inference import InferenceClient
+from backends import (HUGGINGFACE, LOCAL, STUB, BackendChain, BackendError, HuggingFaceBackend,
+                      LocalExtractiveBackend, StubBackend)
+from retrieval import PassageIndex
+from extractive import summarize_extractive
+from singleflight import SingleFlight
+from inference_scheduler import BULK, INTERACTIVE, InferenceScheduler
+from session_store import SessionStore
+
+# Cache d'extraction partagé par toutes les sessions du processus
 @st.cache_resource
-def get_database():
-    return DatabaseManager()
-
-db = get_database()
-
-# Générer un ID de session unique
-if "session_id" not in st.session_state:
-    st.session_state.session_id = str(uuid.uuid4())
-
-def summarize_with_huggingface(text):
-    import time
-
-    api_url = "https://api-inference.huggingface.co/models/facebook/bart-large-cnn"
-    headers = {"Authorization": f"Bearer {HF_API_KEY}"}
-    short_text = text[:1300]
+def get_extraction_cache():
+    collection = db.db[Config.MONGODB_EXTRACTION_CACHE_COLLECTION] if db.db is not None else None
+    return ExtractionCache(collection, Config.EXTRACTION_CACHE_MAX_BYTES)
 
-    try:
-        response = requests.post(api_url, headers=headers, json={"inputs": short_text})
-        
-        # Si le modèle est en train de se charger (503)
-        if response.status_code == 503:
-            st.warning("Le modèle se réveille... Réessaye dans quelques secondes.")
-            time.sleep(10) 
-            return "Le modèle n'est pas encore prêt. Réessaie dans quelques secondes."
-
-        # Gestion spécifique de l'erreur 504 (Gateway Timeout)
-        if response.status_code == 504:
-            return "Le service Hugging Face est temporairement surchargé. Veuillez réessayer dans quelques minutes."
-
-        if response.status_code != 200:
-            return f"Erreur Hugging Face : {response.status_code} - Service temporairement indisponible"
-
-        result = response.json()
-        if isinstance(result, list) and "summary_text" in result[0]:
-            return result[0]["summary_text"]
-        else:
-            return f"Réponse inattendue du service"
+extraction_cache = get_extraction_cache()
 
-    except Exception as e:
-        return f"Erreur lors du résumé : {e}"
+# Cache des résumés partagé par toutes les sessions du processus
+@st.cache_resource
+def get_summary_cache():
+    collection = db.db[Config.MONGODB_SUMMARY_CACHE_COLLECTION] if db.db is not None else None
+    summary_cache = SummaryCache(collection, Config.SUMMARY_CACHE_MAX_BYTES, Config.SUMMARY_CACHE_TTL_HOURS)
+    summary_cache.ensure_indexes()
+    return summary_cache
 
-def ask_question_with_huggingface(question, context):
-    import time
-    api_url = "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.3"
-    headers = {"Authorization": f"Bearer {HF_API_KEY}"}
-    context = context[:2000]
+summary_cache = get_summary_cache()
 
-    prompt = f"""
-    Tu es un assistant intelligent. Utilise les informations suivantes pour répondre :
+# Client HTTP partagé (pool keep-alive) pour toutes les sessions
+@st.cache_resource
+def get_inference_client():
+    return InferenceClient(
+        Config.get_huggingface_api_key(),
+        connect_timeout=Config.INFERENCE_CONNECT_TIMEOUT,
+        read_timeout=Config.INFERENCE_READ_TIMEOUT,
+        max_retries=Config.INFERENCE_MAX_RETRIES,
+        backoff_base=Config.INFERENCE_BACKOFF_BASE,
+        backoff_max=Config.INFERENCE_BACKOFF_MAX,
+        pool_maxsize=Config.INFERENCE_POOL_MAXSIZE
+    )
+
+inference_client = get_inference_client()
+
+def unique_file_name(file_name, file_texts):
+    """Retourne un nom d'affichage libre pour un fichier (ex: rapport.pdf (2))"""
+    if file_name not in file_texts:
+        return file_name
+    index = 2
+    while f"{file_name} ({index})" in file_texts:
+        index += 1
+    return f"{file_name} ({index})"
+
+# Mutualisation des requêtes d'inférence identiques lancées en même temps par plusieurs sessions
+@st.cache_resource
+def get_single_flight():
+    return SingleFlight()
 
-    Contexte :
-    {context}
+single_flight = get_single_flight()
 
-    Question : {question}
+# File d'attente commune à toutes les sessions : plafond d'appels simultanés, priorité au chat
+@st.cache_resource
+def get_inference_scheduler():
+    return InferenceScheduler(
+        max_concurrency=Config.INFERENCE_MAX_CONCURRENCY,
+        expected_seconds=Config.INFERENCE_EXPECTED_SECONDS,
+        timeout=Config.INFERENCE_QUEUE_TIMEOUT
+    )
 
-    Réponse :
-    """
+inference_scheduler = get_inference_scheduler()
 
-    payload = {
-        "inputs": prompt,
-        "parameters": {
-            "max_new_tokens": 500,
-            "temperature": 0.7,
-            "return_full_text": False
-        }
+# Backends d'inférence, dans l'ordre de repli défini par Config.INFERENCE_BACKENDS
+@st.cache_resource
+def get_inference_backend():
+    factories = {
+        HUGGINGFACE: lambda: HuggingFaceBackend(
+            inference_client,
+            Config.INFERENCE_BASE_URL,
+            Config.SUMMARY_MODEL,
+            Config.CHAT_MODEL,
+            summary_cache=summary_cache,
+            input_chars=Config.SUMMARY_INPUT_CHARS,
+            context_chars=Config.CHAT_CONTEXT_CHARS,
+            max_new_tokens=Config.CHAT_MAX_NEW_TOKENS,
+            single_flight=single_flight,
+            scheduler=inference_scheduler
+        ),
+        LOCAL: lambda: LocalExtractiveBackend(Config.LOCAL_SUMMARY_SENTENCES, Config.LOCAL_ANSWER_SENTENCES),
+        STUB: StubBackend
     }
+    return BackendChain([factories[name]() for name in Config.INFERENCE_BACKENDS], Config.INFERENCE_BACKEND_COOLDOWN)
+
+inference_backend = get_inference_backend()
 
+def summarize_with_huggingface(text, user_id=None):
+    """Résume un document complet : résumé des blocs puis résumé des résumés"""
     try:
-        response = requests.post(api_url, headers=headers, json=payload)
-        
-        # Gestion spécifique de l'erreur 504 (Gateway Timeout)
-        if response.status_code == 504:
-            return "Le service Hugging Face est temporairement surchargé. Veuillez réessayer dans quelques minutes."
+        return summarize_hierarchical(
+            text,
+            inference_scheduler.bind(inference_backend.summarize, user_id or "anonyme", BULK),
+            chunk_tokens=Config.SUMMARY_CHUNK_TOKENS,
+            max_workers=Config.SUMMARY_MAX_CONCURRENCY,
+            max_depth=Config.SUMMARY_MAX_DEPTH
+        )
+    except SummarizationError as e:
+        return extractive_fallback(text, str(e))
+    except Exception as e:
+        return extractive_fallback(text, f"Erreur lors du résumé : {e}")
 
-        if response.status_code == 503:
-            return "Le modèle est en train de se charger. Réessaye dans quelques secondes."
+def extractive_fallback(text, error_message):
+    """Résumé extractif local, affiché à la place d'un message d'erreur quand le résumé échoue"""
+    summary = summarize_extractive(text, Config.QUICK_SUMMARY_SENTENCES)
+    if not summary:
+        return error_message
+    return f"{summary}\n\n_⚡ Résumé extractif ({error_message})_"
 
-        if response.status_code != 200:
-            return f"Erreur API Hugging Face : {response.status_code} - Service temporairement indisponible"
+def queue_message(position, estimated_wait):
+    """Texte affiché pendant l'attente d'une place auprès du service d'IA"""
+    return f"⏳ En file d'attente : position {position + 1}, attente estimée ~{max(1, round(estimated_wait))} s"
 
-        result = response.json()
-        if isinstance(result, list) and "generated_text" in result[0]:
-            return result[0]["generated_text"]
-        else:
-            return f"Réponse inattendue du service"
+def format_summaries(summaries):
+    """Met en forme les résumés par fichier pour l'affichage"""
+    return "\n\n".join(f"**{file_name}** : {summary}" for file_name, summary in summaries.items())
 
+def ask_question_with_huggingface(question, context):
+    try:
+        return inference_backend.answer(question, context)
+    except BackendError as e:
+        return str(e)
+    except Exception as e:
+        return f"Erreur lors de la réponse : {e}"
+
+def stream_answer_with_huggingface(question, context):
+    """Lance la génération en streaming ; retourne un TokenStream, ou la réponse complète / un message d'erreur"""
+    try:
+        return inference_backend.stream_answer(question, context)
+    except BackendError as e:
+        return str(e)
     except Exception as e:
         return f"Erreur lors de la réponse : {e}"
 
+def get_session_store():
+    """Retourne le suivi des modifications de la session, pour ne sauvegarder que les deltas"""
+    if "session_store" not in st.session_state:
+        st.session_state["session_store"] = SessionStore(db, st.session_state.session_id, st.session_state.current_user["email"])
+    return st.session_state["session_store"]
+
+def get_search_index():
+    """Retourne l'index de passages de la session, synchronisé avec les fichiers chargés"""
+    if "search_index" not in st.session_state:
+        # Reprendre l'index persisté de la session plutôt que de re-tokeniser les documents
+        search_index = None
+        index_data = db.load_search_index(st.session_state.session_id)
+        if index_data:
+            try:
+                texts = {file_name: data["text"] for file_name, data in st.session_state["file_texts"].items()}
+                search_index = PassageIndex.from_bytes(index_data, texts)
+            except Exception as e:
+                print(f"Index de recherche illisible, reconstruction: {e}")
+        st.session_state["search_index"] = search_index or PassageIndex(Config.RETRIEVAL_PASSAGE_TOKENS)
+    search_index = st.session_state["search_index"]
+    file_texts = st.session_state["file_texts"]
+
+    changed = False
+    for file_name in list(search_index.documents):
+        if file_name not in file_texts:
+            search_index.remove_document(file_name)
+            changed = True
+    for file_name, data in file_texts.items():
+        if file_name not in search_index.documents:
+            search_index.add_document(file_name, data["text"])
+            changed = True
+
+    if changed:
+        # Le texte des passages est déjà stocké avec les documents : seul l'index est sauvegardé
+        index_data = search_index.to_bytes(include_passages=False)
+        # Index trop volumineux ou base indisponible : il sera reconstruit depuis les documents
+        if not db.save_search_index(st.session_state.session_id, index_data, st.session_state.current_user["email"]):
+            st.warning("L'index de recherche n'a pas pu être sauvegardé ; il sera reconstruit au prochain chargement de la session.")
+    return search_index
+
 # Initialiser les états de session
 if "summaries" not in st.session_state:
     st.session_state["summaries"] = []
@@ -352,6 +548,7 @@ if "session_loaded" not in st.session_state:
         st.session_state["current_summaries"] = saved_data.get("current_summaries", "")
         st.session_state["messages"] = saved_data.get("messages", [])
         st.session_state["session_loaded"] = True
+        get_session_store().mark_persisted(st.session_state)
         db.log_activity("session_restored", {
             "session_id": st.session_state.session_id,
             "files_count": len(st.session_state["file_texts"])
@@ -370,9 +567,7 @@ with col2:
         st.markdown(f'<div class="user-info">👤 <strong>{st.session_state.user["username"]}</strong></div>', unsafe_allow_html=True)
 with col3:
     if st.button("🚪 Déconnexion", key="logout_btn"):
-        auth_manager.logout_user()
-        st.success("Déconnexion réussie !")
-        st.rerun()
+        logout()
 st.markdown('</div>', unsafe_allow_html=True)
 
 # Sidebar pour les logs et la gestion de session
@@ -382,29 +577,89 @@ with st.sidebar:
     
     # Bouton pour afficher les logs
     if st.button("📋 Afficher les logs récents", key="show_logs_btn"):
-        user_id = st.session_state.get("user_id", "default")
-        logs = db.get_recent_logs(Config.LOG_DISPLAY_LIMIT, user_id)
+        st.session_state["show_logs"] = not st.session_state.get("show_logs", False)
+        st.session_state["log_cursors"] = [None]
+
+    if st.session_state.get("show_logs"):
+        activity_types = st.multiselect("Types d'activité", Config.LOG_ACTIVITY_TYPES, key="log_activity_types")
+        date_range = st.date_input("Période", value=(), key="log_date_range")
+        start = end = None
+        if len(date_range) == 2:
+            start = datetime.combine(date_range[0], datetime.min.time())
+            end = datetime.combine(date_range[1] + timedelta(days=1), datetime.min.time())
+
+        # Revenir à la première page quand les filtres changent
+        log_filters = (tuple(activity_types), start, end)
+        if st.session_state.get("log_filters") != log_filters:
+            st.session_state["log_filters"] = log_filters
+            st.session_state["log_cursors"] = [None]
+
+        log_cursors = st.session_state["log_cursors"]
+        logs, next_cursor = db.get_logs_page(
+            st.session_state.current_user["email"],
+            Config.LOG_DISPLAY_LIMIT,
+            log_cursors[-1],
+            activity_types,
+            start,
+            end
+        )
 
         if logs:
-            st.markdown('<h4>Logs récents:</h4>', unsafe_allow_html=True)
+            st.markdown(f'<h4>Logs récents (page {len(log_cursors)}):</h4>', unsafe_allow_html=True)
             for log in logs:
                 st.markdown(f'<div class="log-entry">{format_log_entry(log)}</div>', unsafe_allow_html=True)
         else:
             st.info("Aucun log disponible")
+
+        previous_col, next_col = st.columns(2)
+        with previous_col:
+            if len(log_cursors) > 1 and st.button("⬅️ Précédents", key="logs_previous_btn"):
+                log_cursors.pop()
+                st.rerun()
+        with next_col:
+            if next_cursor and st.button("Suivants ➡️", key="logs_next_btn"):
+                log_cursors.append(next_cursor)
+                st.rerun()
     
     # Informations de session
     st.markdown('<h4>Session actuelle:</h4>', unsafe_allow_html=True)
     st.markdown(f'<div class="session-info">ID: {st.session_state.session_id[:8]}...<br>Fichiers: {len(st.session_state["file_texts"])}</div>', unsafe_allow_html=True)
+    st.caption(f"Cache des résumés : {summary_cache.hits} succès / {summary_cache.misses} échecs")
+    log_stats = db.get_log_stats()
+    if log_stats:
+        st.caption(f"Logs : {log_stats['pending']} en attente, {log_stats['flushed']} écrits, {log_stats['dropped']} perdus")
+    client_metrics = inference_client.metrics()
+    st.caption(f"API IA : {client_metrics['in_flight']} requête(s) en cours, réutilisation des connexions {client_metrics['reuse_ratio']:.0%}")
+    scheduler_stats = inference_scheduler.stats()
+    queued = sum(scheduler_stats["queued"].values())
+    if queued:
+        st.caption(f"File IA : {scheduler_stats['running']}/{scheduler_stats['max_concurrency']} appels en cours, {queued} en attente")
+    flight_stats = single_flight.stats()
+    if flight_stats["coalesced"]:
+        st.caption(f"Requêtes IA mutualisées : {flight_stats['coalesced']} sur {flight_stats['requests']} ({flight_stats['saved_ratio']:.0%} d'appels évités)")
+    backend_stats = inference_backend.stats()
+    if backend_stats["fallbacks"] or backend_stats["unavailable"]:
+        st.caption(f"Backends IA : {backend_stats['fallbacks']} repli(s), indisponible(s) : {', '.join(backend_stats['unavailable']) or 'aucun'}")
+    
+    # Statistiques d'utilisation pré-agrégées
+    if st.button("📊 Mon utilisation", key="usage_btn"):
+        usage = db.get_user_usage(st.session_state.current_user["email"])
+        if usage:
+            st.metric("Fichiers analysés", usage["file_uploaded"])
+            st.metric("Résumés générés", usage["summaries_generated"])
+            st.metric("Questions posées", usage["question_asked"])
+            st.caption(f"{usage['pages']} pages, {usage['words']} mots traités")
+        else:
+            st.info("Aucune statistique disponible")
+    
+    # Latences et état du pool MongoDB
+    if st.button("📈 Métriques base de données", key="db_metrics_btn"):
+        st.json({**db.get_metrics(), "auth_rate_limit": rate_limiter.stats(), "inference_single_flight": single_flight.stats(),
+                 "inference_scheduler": inference_scheduler.stats()})
     
     # Bouton pour sauvegarder manuellement
     if st.button("💾 Sauvegarder session", key="save_session_btn"):
-        session_data = {
-            "file_texts": st.session_state["file_texts"],
-            "summaries": st.session_state["summaries"],
-            "current_summaries": st.session_state.get("current_summaries", ""),
-            "messages": st.session_state.get("messages", [])
-        }
-        db.save_session_data(st.session_state.session_id, session_data, st.session_state.get("user_id", "default"))
+        get_session_store().flush(st.session_state)
         db.log_activity("manual_save", {
             "session_id": st.session_state.session_id,
             "files_count": len(st.session_state["file_texts"])
@@ -418,7 +673,9 @@ with st.sidebar:
         st.session_state["file_texts"] = {}
         st.session_state["summaries"] = []
         st.session_state["current_summaries"] = ""
-        st.session_state["messages"] = []
+        session_store = get_session_store()
+        session_store.clear_messages(st.session_state)
+        session_store.flush(st.session_state)
         db.log_activity("session_cleared", {
             "session_id": st.session_state.session_id
         }, st.session_state.current_user["email"])
@@ -431,38 +688,55 @@ uploaded_files = st.file_uploader("Télécharger vos fichiers PDF", type="pdf",
 # uploaded_files = st.file_uploader("", type="pdf", accept_multiple_files=True)
 
 
+if "upload_hashes" not in st.session_state:
+    st.session_state["upload_hashes"] = {}
+
 if uploaded_files:
     for uploaded_file in uploaded_files:
-        if uploaded_file.name not in st.session_state["file_texts"]:
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-
-            # Stocker le contenu extrait pour chaque fichier
-            st.session_state["file_texts"][uploaded_file.name] = {
-                "text": text,
-                "num_pages": len(pdf_reader.pages),
-                "num_words": len(text.split())
-            }
-            
-            # Logger l'ajout du fichier
-            db.log_activity("file_uploaded", {
-                "filename": uploaded_file.name,
-                "pages": len(pdf_reader.pages),
-                "words": len(text.split()),
-                "session_id": st.session_state.session_id
+        # Empreinte du contenu, calculée une seule fois par fichier téléversé
+        file_hash = st.session_state["upload_hashes"].get(uploaded_file.file_id)
+        if file_hash is None:
+            file_hash = content_hash(uploaded_file.getvalue())
+            st.session_state["upload_hashes"][uploaded_file.file_id] = file_hash
+
+        known_hashes = {data.get("hash") for data in st.session_state["file_texts"].values()}
+        if file_hash in known_hashes:
+            continue
+
+        extracted = extraction_cache.get(file_hash)
+        if extracted is None:
+            progress_bar = st.progress(0.0, text=f"Extraction de {uploaded_file.name}...")
+
+            def update_progress(done, total, progress_bar=progress_bar, file_name=uploaded_file.name):
+                progress_bar.progress(done / total, text=f"Extraction de {file_name} : page {done}/{total}")
+
+            extracted = extract_pdf(
+                uploaded_file.getvalue(),
+                progress_callback=update_progress,
+                max_workers=Config.EXTRACTION_MAX_WORKERS,
+                pages_per_task=Config.EXTRACTION_PAGES_PER_TASK,
+                min_parallel_pages=Config.EXTRACTION_MIN_PARALLEL_PAGES
+            )
+            progress_bar.empty()
+            extraction_cache.put(file_hash, extracted)
 
-            }, st.session_state.current_user["email"])
-            
-            # Sauvegarder automatiquement la session
-            session_data = {
-                "file_texts": st.session_state["file_texts"],
-                "summaries": st.session_state["summaries"],
-                "current_summaries": st.session_state.get("current_summaries", ""),
-                "messages": st.session_state.get("messages", [])
-            }
-            db.save_session_data(st.session_state.session_id, session_data, st.session_state.current_user["email"])
+        # Stocker le contenu extrait pour chaque fichier
+        file_name = unique_file_name(uploaded_file.name, st.session_state["file_texts"])
+        st.session_state["file_texts"][file_name] = {**extracted, "hash": file_hash}
+        get_search_index()
+        
+        # Logger l'ajout du fichier
+        db.log_activity("file_uploaded", {
+            "filename": file_name,
+            "pages": extracted["num_pages"],
+            "words": extracted["num_words"],
+            "hash": file_hash,
+            "session_id": st.session_state.session_id
+
+        }, st.session_state.current_user["email"])
+        
+        # Sauvegarder automatiquement la session
+        get_session_store().flush(st.session_state)
 
     # Affichage des analyses
     for file_name, data in st.session_state["file_texts"].items():
@@ -479,14 +753,61 @@ if uploaded_files:
     if "current_summaries" not in st.session_state:
         st.session_state["current_summaries"] = ""
 
+    # Bouton pour forcer la régénération des résumés des documents chargés
+    if st.button("♻️ Régénérer les résumés", key="invalidate_summaries_btn"):
+        # Lecture sans effet sur les statistiques ni l'ordre LRU : ces entrées vont être invalidées
+        cached_summary = lambda chunk: summary_cache.peek(
+            SummaryCache.make_key(chunk[:Config.SUMMARY_INPUT_CHARS], Config.SUMMARY_MODEL, Config.SUMMARY_INPUT_CHARS))
+        for data in st.session_state["file_texts"].values():
+            # Blocs du document et résumés intermédiaires : tous les niveaux de réduction sont recalculés
+            inputs = summary_inputs(data["text"], cached_summary, Config.SUMMARY_CHUNK_TOKENS, Config.SUMMARY_MAX_DEPTH)
+            for chunk in inputs:
+                summary_cache.invalidate(chunk[:Config.SUMMARY_INPUT_CHARS])
+        st.session_state["current_summaries"] = ""
+
     # Bouton pour générer un résumé pour tous les fichiers
     if st.button("📝 Résumer les documents", key="summarize_btn"):
+        texts = {file_name: data["text"] for file_name, data in st.session_state["file_texts"].items()}
+
+        # Résumé rapide extractif affiché tout de suite, remplacé par le résumé du modèle une fois prêt
+        quick_placeholder = st.empty()
+        if Config.QUICK_SUMMARY_ENABLED:
+            quick = {file_name: summarize_extractive(text, Config.QUICK_SUMMARY_SENTENCES) for file_name, text in texts.items()}
+            st.session_state["current_summaries"] = format_summaries(quick)
+            with quick_placeholder.container():
+                st.markdown('<div class="summary-container">', unsafe_allow_html=True)
+                st.markdown('<h3>⚡ Résumé rapide</h3>', unsafe_allow_html=True)
+                st.caption("Phrases clés extraites des documents, en attendant le résumé complet")
+                st.write(st.session_state["current_summaries"])
+                st.markdown('</div>', unsafe_allow_html=True)
+
+        user_id = st.session_state.current_user["email"]
+
+        def show_queue_status():
+            """Position des blocs de l'utilisateur dans la file d'attente commune"""
+            status = inference_scheduler.user_status(user_id)
+            if status is None:
+                queue_status.empty()
+            else:
+                queue_status.caption(f"{queue_message(status['position'], status['estimated_wait'])} · "
+                                     f"{status['queued']} bloc(s) en attente, fin estimée ~{max(1, round(status['estimated_drain']))} s")
+
         with st.spinner("Génération des résumés en cours..."):
-            summaries = []
-            for file_name, data in st.session_state["file_texts"].items():
-                summary = summarize_with_huggingface(data["text"][:Config.MAX_TEXT_LENGTH])
-                summaries.append(f"**{file_name}** : {summary}")
-            st.session_state["current_summaries"] = "\n\n".join(summaries)
+            progress_bar = st.progress(0.0)
+            queue_status = st.empty()
+            results = summarize_documents(
+                texts,
+                lambda text: summarize_with_huggingface(text, user_id),
+                max_workers=Config.SUMMARY_MAX_CONCURRENCY,
+                timeout=Config.SUMMARY_BATCH_TIMEOUT,
+                on_result=lambda file_name, done, total: progress_bar.progress(done / total, text=f"Résumé de {file_name} terminé ({done}/{total})"),
+                fallback=extractive_fallback,
+                on_wait=show_queue_status
+            )
+            progress_bar.empty()
+            queue_status.empty()
+            quick_placeholder.empty()
+            st.session_state["current_summaries"] = format_summaries(results)
             
             # Logger la génération de résumés
             db.log_activity("summaries_generated", {
@@ -496,13 +817,7 @@ if uploaded_files:
             }, st.session_state.current_user["email"])
             
             # Sauvegarder la session
-            session_data = {
-                "file_texts": st.session_state["file_texts"],
-                "summaries": st.session_state["summaries"],
-                "current_summaries": st.session_state["current_summaries"],
-                "messages": st.session_state.get("messages", [])
-            }
-            db.save_session_data(st.session_state.session_id, session_data, st.session_state.current_user["email"])
+            get_session_store().flush(st.session_state)
 
     if st.session_state["current_summaries"]:
         st.markdown('<div class="summary-container">', unsafe_allow_html=True)
@@ -521,51 +836,101 @@ for message in st.session_state.messages:
     role_class = "user" if message["role"] == "user" else "assistant"
     st.markdown(f'<div class="chat-message {role_class}">{message["content"]}</div>', unsafe_allow_html=True)
 
+def log_question(question, answer_metrics=None):
+    """Enregistre la question posée et, en streaming, les métriques de la réponse"""
+    details = {
+        "question": question[:100],  # Limiter la longueur
+        "files_count": len(st.session_state["file_texts"]),
+        "session_id": st.session_state.session_id
+    }
+    if answer_metrics:
+        details.update(answer_metrics)
+    db.log_activity("question_asked", details, st.session_state.current_user["email"])
+
+def render_streamed_answer(question, context):
+    """Affiche la réponse au fil des tokens ; retourne (réponse, métriques)"""
+    placeholder = st.empty()
+    placeholder.markdown('<div class="chat-message assistant">L\'IA réfléchit à votre question...</div>', unsafe_allow_html=True)
+    on_wait = lambda position, estimated_wait: placeholder.markdown(
+        f'<div class="chat-message assistant">{queue_message(position, estimated_wait)}</div>', unsafe_allow_html=True)
+    with inference_scheduler.context(st.session_state.current_user["email"], INTERACTIVE, on_wait):
+        stream = stream_answer_with_huggingface(question, context)
+    if isinstance(stream, str):
+        placeholder.markdown(f'<div class="chat-message assistant">{stream}</div>', unsafe_allow_html=True)
+        return stream, None
+
+    st.session_state["chat_stream"] = stream
+    answer = ""
+    completed = False
+    try:
+        with stream:
+            for token in stream:
+                answer += token
+                # Appel à chaque itération, même sans nouveau token : Streamlit peut ainsi
+                # interrompre le script dès qu'une nouvelle question est posée
+                placeholder.markdown(f'<div class="chat-message assistant">{answer or "..."}▌</div>', unsafe_allow_html=True)
+        completed = True
+    finally:
+        st.session_state.pop("chat_stream", None)
+        if not completed:
+            # Génération interrompue : la réponse partielle est conservée dans l'historique
+            if answer:
+                st.session_state.messages.append({"role": "assistant", "content": f"{answer} …"})
+            log_question(question, stream.stats())
+
+    placeholder.markdown(f'<div class="chat-message assistant">{answer}</div>', unsafe_allow_html=True)
+    return answer, stream.stats()
+
 user_question = st.chat_input("Posez votre question sur les documents...")
 if user_question:
+    # Une nouvelle question interrompt la réponse encore en cours de génération
+    previous_stream = st.session_state.pop("chat_stream", None)
+    if previous_stream is not None:
+        previous_stream.cancel()
+
     st.session_state.messages.append({"role": "user", "content": user_question})
     st.markdown(f'<div class="chat-message user">{user_question}</div>', unsafe_allow_html=True)
 
-    with st.spinner("L'IA réfléchit à votre question..."):
-        try:
-            combined_texts = "\n\n".join(
-                [f"Contenu de {file_name} : {data['text'][:1000]}" for file_name, data in st.session_state["file_texts"].items()]
-            )
-            answer = ask_question_with_huggingface(user_question, combined_texts)
-            st.session_state.messages.append({"role": "assistant", "content": answer})
+    try:
+        # Seuls les passages les plus pertinents sont envoyés au modèle
+        passages = get_search_index().search(
+            user_question,
+            k=Config.RETRIEVAL_TOP_K,
+            token_budget=Config.RETRIEVAL_TOKEN_BUDGET
+        )
+        combined_texts = "\n\n".join(
+            [f"Extrait de {file_name} : {passage}" for file_name, passage, _ in passages]
+        )
+
+        answer_metrics = None
+        if Config.CHAT_STREAMING:
+            answer, answer_metrics = render_streamed_answer(user_question, combined_texts)
+            if answer_metrics and answer_metrics["ttft_ms"] is not None:
+                st.caption(f"⏱️ Premier token : {answer_metrics['ttft_ms'] / 1000:.1f} s · "
+                           f"{answer_metrics['tokens_per_second'] or 0:.0f} tokens/s")
+        else:
+            queue_status = st.empty()
+            with st.spinner("L'IA réfléchit à votre question..."):
+                on_wait = lambda position, estimated_wait: queue_status.caption(queue_message(position, estimated_wait))
+                with inference_scheduler.context(st.session_state.current_user["email"], INTERACTIVE, on_wait):
+                    answer = ask_question_with_huggingface(user_question, combined_texts)
+            queue_status.empty()
             st.markdown(f'<div class="chat-message assistant">{answer}</div>', unsafe_allow_html=True)
-            
-            # Logger la question posée
-            db.log_activity("question_asked", {
+        st.session_state.messages.append({"role": "assistant", "content": answer})
 
-                "question": user_question[:100],  # Limiter la longueur
-                # "question": user_question[:Config.MAX_QUESTION_LENGTH],  # Limiter la longueur
-                "files_count": len(st.session_state["file_texts"]),
-                "session_id": st.session_state.session_id
-            }, st.session_state.current_user["email"])
+        # Logger la question posée
+        log_question(user_question, answer_metrics)
 
-#                 "question": user_question[:Config.MAX_QUESTION_LENGTH],  # Limiter la longueur
-#                 "files_count": len(st.session_state["file_texts"]),
-#                 "session_id": st.session_state.session_id
-#             }, st.session_state.get("user_id", "default"))
-
-            
-            # Sauvegarder la session avec les nouveaux messages
-            session_data = {
-                "file_texts": st.session_state["file_texts"],
-                "summaries": st.session_state["summaries"],
-                "current_summaries": st.session_state.get("current_summaries", ""),
-                "messages": st.session_state.messages
-            }
-            db.save_session_data(st.session_state.session_id, session_data, st.session_state.current_user["email"])
-            
-        except Exception as e:
-            st.error(f"Une erreur s'est produite : {e}")
-            db.log_activity("error_occurred", {
-                "error": str(e),
-                "session_id": st.session_state.session_id
+        # Sauvegarder la session avec les nouveaux messages
+        get_session_store().flush(st.session_state)
+        
+    except Exception as e:
+        st.error(f"Une erreur s'est produite : {e}")
+        db.log_activity("error_occurred", {
+            "error": str(e),
+            "session_id": st.session_state.session_id
 
-            }, st.session_state.current_user["email"])
+        }, st.session_state.current_user["email"])
 
 
 st.markdown('</div>', unsafe_allow_html=True)
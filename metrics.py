@@ -0,0 +1,190 @@
+import bisect
+import functools
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from pymongo import monitoring
+
+# Bornes supérieures des intervalles de latence, en millisecondes
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+class LatencyHistogram:
+    """Histogramme de latences à intervalles fixes"""
+
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS_MS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, duration_ms: float):
+        """Enregistre une mesure"""
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, duration_ms)] += 1
+            self.count += 1
+            self.total_ms += duration_ms
+            self.max_ms = max(self.max_ms, duration_ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Estime un percentile (borne supérieure de l'intervalle qui le contient)"""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = fraction * self.count
+            cumulative = 0
+            for index, count in enumerate(self.counts):
+                cumulative += count
+                if cumulative >= rank:
+                    return float(self.buckets[index]) if index < len(self.buckets) else self.max_ms
+            return self.max_ms
+
+    def summary(self) -> Dict[str, float]:
+        """Retourne nombre, moyenne, p50/p95/p99 et maximum"""
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ms
+        }
+
+
+class DatabaseMetrics:
+    """Registre des métriques d'accès à MongoDB"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.operations: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.commands: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.collection_operations: Dict[str, int] = defaultdict(int)
+        self.command_failures = 0
+        self.checkout_wait = LatencyHistogram()
+        self.checkout_failures = 0
+        self.connections_in_use = 0
+        self.connections_open = 0
+
+    def operation(self, name: str) -> LatencyHistogram:
+        """Histogramme d'une opération de DatabaseManager"""
+        with self._lock:
+            return self.operations[name]
+
+    def command(self, name: str) -> LatencyHistogram:
+        """Histogramme d'une commande MongoDB"""
+        with self._lock:
+            return self.commands[name]
+
+    def increment(self, counter: str, delta: int = 1):
+        """Modifie un compteur ; appelé depuis les threads des listeners pymongo"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + delta)
+
+    def count_collection_operation(self, key: str):
+        """Compte une commande sur une collection"""
+        with self._lock:
+            self.collection_operations[key] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Retourne l'ensemble des métriques sous forme de dictionnaire"""
+        with self._lock:
+            operations = dict(self.operations)
+            commands = dict(self.commands)
+            collection_operations = dict(self.collection_operations)
+            command_failures = self.command_failures
+            checkout_failures = self.checkout_failures
+            connections_in_use = self.connections_in_use
+            connections_open = self.connections_open
+        return {
+            "operations": {name: histogram.summary() for name, histogram in operations.items()},
+            "commands": {name: histogram.summary() for name, histogram in commands.items()},
+            "collection_operations": collection_operations,
+            "command_failures": command_failures,
+            "pool": {
+                "checkout_wait": self.checkout_wait.summary(),
+                "checkout_failures": checkout_failures,
+                "connections_in_use": connections_in_use,
+                "connections_open": connections_open
+            }
+        }
+
+
+def timed(operation: str):
+    """Décorateur mesurant la latence d'une méthode de DatabaseManager"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.metrics.operation(operation).observe((time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Compte les commandes par collection et mesure leur durée côté serveur"""
+
+    def __init__(self, metrics: DatabaseMetrics):
+        self.metrics = metrics
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if isinstance(collection, str):
+            self.metrics.count_collection_operation(f"{collection}.{event.command_name}")
+
+    def succeeded(self, event):
+        self.metrics.command(event.command_name).observe(event.duration_micros / 1000)
+
+    def failed(self, event):
+        self.metrics.increment("command_failures")
+        self.metrics.command(event.command_name).observe(event.duration_micros / 1000)
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Suit l'attente de checkout et le nombre de connexions utilisées dans le pool"""
+
+    def __init__(self, metrics: DatabaseMetrics):
+        self.metrics = metrics
+        self._checkout_started = threading.local()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.metrics.increment("connections_open")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.metrics.increment("connections_open", -1)
+
+    def connection_check_out_started(self, event):
+        self._checkout_started.value = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        self.metrics.increment("checkout_failures")
+
+    def connection_checked_out(self, event):
+        started = getattr(self._checkout_started, "value", None)
+        if started is not None:
+            self.metrics.checkout_wait.observe((time.perf_counter() - started) * 1000)
+        self.metrics.increment("connections_in_use")
+
+    def connection_checked_in(self, event):
+        self.metrics.increment("connections_in_use", -1)
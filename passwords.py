@@ -0,0 +1,138 @@
+import base64
+import hashlib
+import hmac
+import re
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+# Identifiant du format de hachage courant
+SCRYPT_SCHEME = "scrypt"
+
+# Anciens formats : SHA-256 hexadécimal non salé (main.py) et "sel$sha256" (AuthManager)
+_LEGACY_UNSALTED = re.compile(r"^[0-9a-f]{64}$")
+_LEGACY_SALTED = re.compile(r"^[0-9a-f]{32}\$[0-9a-f]{64}$")
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int, length: int) -> bytes:
+    """Dérive une clé scrypt (mémoire utilisée : 128 * n * r octets)"""
+    return hashlib.scrypt(
+        password.encode("utf-8"),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        maxmem=256 * n * r * p,
+        dklen=length
+    )
+
+
+def hash_password(password: str, n: int = 2 ** 14, r: int = 8, p: int = 1, salt_bytes: int = 16,
+                  key_bytes: int = 32) -> str:
+    """Hache un mot de passe avec scrypt.
+
+    Le résultat embarque les paramètres de coût : `scrypt$n=16384,r=8,p=1$<sel>$<clé>`,
+    ce qui permet de les augmenter plus tard sans invalider les hachages existants.
+    """
+    salt = secrets.token_bytes(salt_bytes)
+    key = _scrypt(password, salt, n, r, p, key_bytes)
+    return f"{SCRYPT_SCHEME}$n={n},r={r},p={p}${_b64encode(salt)}${_b64encode(key)}"
+
+
+def parse_hash(stored: str) -> Optional[Tuple[Dict[str, int], bytes, bytes]]:
+    """Décompose un hachage scrypt en (paramètres, sel, clé) ; None pour un autre format"""
+    parts = stored.split("$")
+    if len(parts) != 4 or parts[0] != SCRYPT_SCHEME:
+        return None
+    try:
+        params = {name: int(value) for name, value in (item.split("=") for item in parts[1].split(","))}
+        return {"n": params["n"], "r": params["r"], "p": params["p"]}, _b64decode(parts[2]), _b64decode(parts[3])
+    except (KeyError, ValueError):
+        return None
+
+
+def is_legacy_hash(stored: str) -> bool:
+    """Indique si le hachage est un ancien SHA-256"""
+    return bool(_LEGACY_UNSALTED.match(stored) or _LEGACY_SALTED.match(stored))
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """Vérifie un mot de passe contre un hachage scrypt ou un ancien SHA-256"""
+    if not stored:
+        return False
+
+    parsed = parse_hash(stored)
+    if parsed is not None:
+        params, salt, key = parsed
+        try:
+            candidate = _scrypt(password, salt, params["n"], params["r"], params["p"], len(key))
+        except ValueError:
+            return False
+        return hmac.compare_digest(candidate, key)
+
+    if _LEGACY_UNSALTED.match(stored):
+        candidate = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(candidate, stored)
+
+    if _LEGACY_SALTED.match(stored):
+        salt, hash_value = stored.split("$")
+        candidate = hashlib.sha256((password + salt).encode()).hexdigest()
+        return hmac.compare_digest(candidate, hash_value)
+
+    return False
+
+
+def needs_rehash(stored: str, n: int = 2 ** 14, r: int = 8, p: int = 1) -> bool:
+    """Indique si le hachage doit être recalculé (ancien format ou coût inférieur à la cible)"""
+    parsed = parse_hash(stored)
+    if parsed is None:
+        return True
+    params = parsed[0]
+    return params["n"] < n or params["r"] < r or params["p"] < p
+
+
+class PasswordHasher:
+    """Hachage scrypt exécuté dans un pool de threads borné.
+
+    scrypt libère le GIL et consomme `128 * n * r` octets par calcul : le pool limite
+    le nombre de calculs simultanés, donc le CPU et la mémoire qu'une rafale de
+    connexions peut mobiliser, sans bloquer les autres sessions Streamlit.
+    """
+
+    def __init__(self, n: int = 2 ** 14, r: int = 8, p: int = 1, max_concurrency: int = 4,
+                 timeout: Optional[float] = 10.0):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="password-hasher")
+
+    def hash(self, password: str) -> str:
+        """Hache un mot de passe avec les paramètres de coût courants"""
+        future = self._executor.submit(hash_password, password, self.n, self.r, self.p)
+        return future.result(timeout=self.timeout)
+
+    def verify(self, password: str, stored: str) -> bool:
+        """Vérifie un mot de passe"""
+        future = self._executor.submit(verify_password, password, stored)
+        return future.result(timeout=self.timeout)
+
+    def verify_and_update(self, password: str, stored: str) -> Tuple[bool, Optional[str]]:
+        """Vérifie un mot de passe et retourne (valide, nouveau hachage si une mise à niveau est nécessaire)"""
+        if not self.verify(password, stored):
+            return False, None
+        if needs_rehash(stored, self.n, self.r, self.p):
+            return True, self.hash(password)
+        return True, None
+
+    def close(self):
+        """Arrête le pool de threads"""
+        self._executor.shutdown(wait=False)
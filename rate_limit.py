@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+
+def resolve_client_ip(peer_ip: Optional[str], forwarded_for: Optional[str] = None, trusted_proxies: int = 0) -> Optional[str]:
+    """Adresse du client pour la limitation de débit.
+
+    Par défaut, l'adresse de la connexion (`peer_ip`) : l'en-tête X-Forwarded-For est
+    fourni par le client et ne doit pas être cru. Derrière `trusted_proxies` proxys de
+    confiance, chacun ajoute l'adresse qu'il voit à droite de l'en-tête : l'entrée à
+    `trusted_proxies` crans de la droite est la dernière écrite par un proxy de confiance.
+    """
+    if trusted_proxies <= 0 or not forwarded_for:
+        return peer_ip
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    if len(hops) < trusted_proxies:
+        # En-tête plus court que la chaîne de proxys attendue : requête qui les contourne
+        return peer_ip
+    return hops[-trusted_proxies]
+
+
+class TokenBucketLimiter:
+    """Seaux à jetons en mémoire, un par clé.
+
+    Chaque clé dispose de `capacity` tentatives, rechargées au rythme de
+    `refill_per_second`. Les seaux les moins récemment utilisés sont oubliés au-delà
+    de `max_keys` clés, ce qui borne la mémoire face à des clés aléatoires.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float, max_keys: int = 10000):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refilled(self, key: str, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+
+    def allow(self, key: str, now: Optional[float] = None) -> bool:
+        """Consomme un jeton pour la clé ; retourne False si le seau est vide"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens = self._refilled(key, now)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+    def retry_after(self, key: str, now: Optional[float] = None) -> float:
+        """Secondes à attendre avant la prochaine tentative autorisée"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens = self._refilled(key, now)
+        if tokens >= 1 or self.refill_per_second <= 0:
+            return 0.0
+        return (1 - tokens) / self.refill_per_second
+
+
+class MongoWindowCounter:
+    """Compteurs partagés par fenêtre fixe dans une collection MongoDB.
+
+    Chaque tentative incrémente atomiquement (`$inc`) le compteur de la fenêtre
+    courante ; les documents expirent via un index TTL. Les limites s'appliquent
+    ainsi à l'ensemble des réplicas Streamlit.
+    """
+
+    def __init__(self, collection, window_seconds: int = 60):
+        self.collection = collection
+        self.window_seconds = window_seconds
+
+    def ensure_indexes(self):
+        """Crée l'index TTL qui purge les fenêtres échues"""
+        try:
+            self.collection.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+        except Exception as e:
+            print(f"Erreur lors de la création de l'index du limiteur de débit: {e}")
+
+    def increment(self, key: str, now: Optional[float] = None) -> int:
+        """Incrémente le compteur de la fenêtre courante et retourne sa valeur"""
+        now = time.time() if now is None else now
+        window = int(now // self.window_seconds)
+        expires_at = datetime.fromtimestamp((window + 1) * self.window_seconds, timezone.utc) + timedelta(seconds=self.window_seconds)
+        document = self.collection.find_one_and_update(
+            {"_id": f"{key}:{window}"},
+            {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": expires_at}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return document["count"]
+
+
+class AuthRateLimiter:
+    """Limitation des tentatives de connexion et d'inscription par IP et par email.
+
+    Les seaux en mémoire filtrent les rafales sans accès à la base ; si un stockage
+    partagé est fourni, une tentative acceptée localement doit aussi rester sous la
+    limite globale de la fenêtre (`capacity + refill * window`).
+    """
+
+    def __init__(self, ip_capacity: float = 20, ip_refill_per_minute: float = 10,
+                 email_capacity: float = 5, email_refill_per_minute: float = 1,
+                 shared_store: Optional[MongoWindowCounter] = None):
+        self.limiters = {
+            "ip": TokenBucketLimiter(ip_capacity, ip_refill_per_minute / 60),
+            "email": TokenBucketLimiter(email_capacity, email_refill_per_minute / 60)
+        }
+        self.shared_store = shared_store
+        self.allowed = 0
+        self.rejected: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _shared_limit(self, scope: str) -> float:
+        limiter = self.limiters[scope]
+        return limiter.capacity + limiter.refill_per_second * self.shared_store.window_seconds
+
+    def check(self, action: str, ip: Optional[str], email: Optional[str]) -> Tuple[bool, float]:
+        """Enregistre une tentative ; retourne (autorisée, secondes avant nouvel essai)"""
+        keys = []
+        if ip:
+            keys.append(("ip", f"{action}:ip:{ip}"))
+        if email:
+            keys.append(("email", f"{action}:email:{email.strip().lower()}"))
+
+        for scope, key in keys:
+            limiter = self.limiters[scope]
+            if not limiter.allow(key):
+                return self._reject(f"{action}:{scope}", limiter.retry_after(key))
+
+        if self.shared_store is not None:
+            for scope, key in keys:
+                try:
+                    if self.shared_store.increment(key) > self._shared_limit(scope):
+                        return self._reject(f"{action}:{scope}:shared", float(self.shared_store.window_seconds))
+                except Exception as e:
+                    # Base indisponible : les limites locales restent appliquées
+                    print(f"Erreur du limiteur de débit partagé: {e}")
+                    break
+
+        with self._lock:
+            self.allowed += 1
+        return True, 0.0
+
+    def _reject(self, reason: str, retry_after: float) -> Tuple[bool, float]:
+        with self._lock:
+            self.rejected[reason] += 1
+        return False, retry_after
+
+    def stats(self) -> Dict[str, int]:
+        """Retourne les tentatives acceptées et les refus par motif"""
+        with self._lock:
+            return {"allowed": self.allowed, "rejected": sum(self.rejected.values()), **dict(self.rejected)}
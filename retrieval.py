@@ -0,0 +1,248 @@
+import io
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from summarization import estimate_tokens, split_into_chunks
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Version du format binaire produit par PassageIndex.to_bytes (2 : texte des passages facultatif)
+INDEX_FORMAT_VERSION = 2
+
+STOPWORDS = frozenset("""
+au aux avec ce ces dans de des du elle en et eux il ils je la le les leur lui ma mais me même mes moi mon
+ne nos notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton tu un une vos votre vous
+est sont été être avoir ont cette cet comme plus où dont sans sous entre
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Découpe un texte en termes normalisés (minuscules, sans mots vides)"""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+class PassageIndex:
+    """Index BM25 des passages des documents chargés.
+
+    Les documents sont découpés en passages à l'ajout ; chaque terme garde une liste de
+    postings (identifiants de passages, fréquences) sous forme de tableaux NumPy, ce qui
+    permet de scorer une question avec quelques opérations vectorisées par terme.
+    """
+
+    def __init__(self, passage_tokens: int = 200, k1: float = 1.5, b: float = 0.75):
+        self.passage_tokens = passage_tokens
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: Dict[str, int] = {}
+        self.postings: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self.passages: List[str] = []
+        self.passage_documents: List[str] = []
+        self.lengths = np.zeros(0, dtype=np.float32)
+        self.documents: Dict[str, List[int]] = {}
+        self.total_length = 0.0
+
+    @property
+    def num_passages(self) -> int:
+        """Nombre de passages actifs"""
+        return sum(len(passage_ids) for passage_ids in self.documents.values())
+
+    def add_document(self, name: str, text: str):
+        """Découpe un document en passages et les ajoute à l'index"""
+        if name in self.documents:
+            self.remove_document(name)
+
+        chunks = split_into_chunks(text, self.passage_tokens)
+        first_id = len(self.passages)
+        token_lists = [tokenize(chunk) for chunk in chunks]
+        lengths = np.asarray([len(tokens) for tokens in token_lists], dtype=np.int64)
+
+        vocabulary = self.vocabulary
+        term_ids = np.fromiter(
+            (vocabulary.setdefault(token, len(vocabulary)) for tokens in token_lists for token in tokens),
+            dtype=np.int64,
+            count=int(lengths.sum())
+        )
+        passage_ids = np.repeat(np.arange(first_id, first_id + len(chunks), dtype=np.int64), lengths)
+
+        # Comptage des couples (terme, passage) trié par terme puis par passage
+        stride = first_id + len(chunks)
+        pairs, counts = np.unique(term_ids * stride + passage_ids, return_counts=True)
+        pair_terms = pairs // stride
+        pair_passages = (pairs % stride).astype(np.int32)
+        counts = counts.astype(np.int32)
+        starts = np.flatnonzero(np.r_[True, np.diff(pair_terms) != 0]) if len(pairs) else np.zeros(0, dtype=np.int64)
+        stops = np.r_[starts[1:], len(pairs)]
+
+        for term_id, start, stop in zip(pair_terms[starts].tolist(), starts.tolist(), stops.tolist()):
+            ids = pair_passages[start:stop]
+            tfs = counts[start:stop]
+            if term_id in self.postings:
+                old_ids, old_tfs = self.postings[term_id]
+                ids = np.concatenate([old_ids, ids])
+                tfs = np.concatenate([old_tfs, tfs])
+            self.postings[term_id] = (ids, tfs)
+
+        self.passages.extend(chunks)
+        self.passage_documents.extend([name] * len(chunks))
+        self.lengths = np.concatenate([self.lengths, lengths.astype(np.float32)])
+        self.total_length += float(lengths.sum())
+        self.documents[name] = list(range(first_id, first_id + len(chunks)))
+
+    def remove_document(self, name: str):
+        """Retire un document de l'index sans reconstruire les autres"""
+        passage_ids = self.documents.pop(name, None)
+        if not passage_ids:
+            return
+
+        removed = np.asarray(passage_ids, dtype=np.int32)
+        for passage_id in passage_ids:
+            self.passages[passage_id] = ""
+        self.total_length -= float(self.lengths[removed].sum())
+        self.lengths[removed] = 0
+
+        # Les identifiants d'un document sont contigus : un simple test d'intervalle suffit
+        low, high = removed[0], removed[-1]
+        for term_id in list(self.postings):
+            ids, tfs = self.postings[term_id]
+            keep = (ids < low) | (ids > high)
+            if keep.all():
+                continue
+            if keep.any():
+                self.postings[term_id] = (ids[keep], tfs[keep])
+            else:
+                del self.postings[term_id]
+
+    def search(self, query: str, k: int = 5, token_budget: int = 600) -> List[Tuple[str, str, float]]:
+        """Retourne les passages les plus pertinents (document, passage, score) dans la limite du budget de tokens"""
+        num_passages = self.num_passages
+        if num_passages == 0:
+            return []
+
+        term_ids = {self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary}
+        term_ids = [term_id for term_id in term_ids if term_id in self.postings]
+        if not term_ids:
+            return []
+
+        average_length = self.total_length / num_passages or 1.0
+        scores = np.zeros(len(self.passages), dtype=np.float32)
+        for term_id in term_ids:
+            ids, tfs = self.postings[term_id]
+            idf = math.log(1 + (num_passages - len(ids) + 0.5) / (len(ids) + 0.5))
+            tfs = tfs.astype(np.float32)
+            norms = self.k1 * (1 - self.b + self.b * self.lengths[ids] / average_length)
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + norms)
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates])]
+
+        results = []
+        used_tokens = 0
+        for passage_id in candidates:
+            passage = self.passages[passage_id]
+            passage_tokens = estimate_tokens(passage)
+            if results and used_tokens + passage_tokens > token_budget:
+                break
+            results.append((self.passage_documents[passage_id], passage, float(scores[passage_id])))
+            used_tokens += passage_tokens
+        return results
+
+    def to_bytes(self, include_passages: bool = True) -> bytes:
+        """Sérialise l'index sous forme de tableaux compactés (format npz compressé).
+
+        Les passages des documents retirés sont éliminés et les identifiants renumérotés ;
+        le vocabulaire, les postings (format CSR) et les longueurs sont stockés tels quels,
+        sans re-tokenisation au chargement. Avec `include_passages=False`, le texte des
+        passages est omis : `from_bytes` le redécoupe alors depuis le texte des documents.
+        """
+        live_ids = np.asarray([passage_id for passage_ids in self.documents.values() for passage_id in passage_ids], dtype=np.int64)
+        remap = np.full(len(self.passages), -1, dtype=np.int64)
+        remap[live_ids] = np.arange(len(live_ids))
+
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        posting_ids = []
+        posting_tfs = []
+        for term_id in range(len(terms)):
+            ids, tfs = self.postings.get(term_id, (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)))
+            posting_ids.append(remap[ids].astype(np.int32))
+            posting_tfs.append(tfs)
+            term_offsets[term_id + 1] = term_offsets[term_id] + len(ids)
+
+        passages = [self.passages[passage_id].encode("utf-8") for passage_id in live_ids] if include_passages else []
+        passage_offsets = np.cumsum([0] + [len(passage) for passage in passages], dtype=np.int64)
+
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            header=np.asarray([INDEX_FORMAT_VERSION, self.passage_tokens], dtype=np.int64),
+            parameters=np.asarray([self.k1, self.b], dtype=np.float64),
+            vocabulary=np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+            term_offsets=term_offsets,
+            posting_ids=np.concatenate(posting_ids) if posting_ids else np.zeros(0, dtype=np.int32),
+            posting_tfs=np.concatenate(posting_tfs) if posting_tfs else np.zeros(0, dtype=np.int32),
+            lengths=self.lengths[live_ids] if len(live_ids) else np.zeros(0, dtype=np.float32),
+            passages=np.frombuffer(b"".join(passages), dtype=np.uint8),
+            passage_offsets=passage_offsets,
+            document_names=np.frombuffer("\0".join(self.documents).encode("utf-8"), dtype=np.uint8),
+            document_sizes=np.asarray([len(passage_ids) for passage_ids in self.documents.values()], dtype=np.int64)
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, texts: Optional[Dict[str, str]] = None) -> "PassageIndex":
+        """Reconstruit un index sérialisé par `to_bytes`.
+
+        `texts` (nom du document -> texte) est requis si le texte des passages n'a pas été
+        sérialisé ; lève ValueError si un document manque ou ne correspond plus à l'index.
+        """
+        arrays = np.load(io.BytesIO(data), allow_pickle=False)
+        version, passage_tokens = arrays["header"].tolist()
+        if version not in (1, INDEX_FORMAT_VERSION):
+            raise ValueError(f"Version d'index non supportée : {version}")
+
+        k1, b = arrays["parameters"].tolist()
+        index = cls(passage_tokens=int(passage_tokens), k1=k1, b=b)
+
+        vocabulary = arrays["vocabulary"].tobytes().decode("utf-8")
+        terms = vocabulary.split("\n") if vocabulary else []
+        index.vocabulary = {term: term_id for term_id, term in enumerate(terms)}
+
+        term_offsets = arrays["term_offsets"]
+        posting_ids = arrays["posting_ids"]
+        posting_tfs = arrays["posting_tfs"]
+        for term_id in range(len(terms)):
+            start, stop = term_offsets[term_id], term_offsets[term_id + 1]
+            if stop > start:
+                index.postings[term_id] = (posting_ids[start:stop], posting_tfs[start:stop])
+
+        index.lengths = arrays["lengths"].astype(np.float32)
+        index.total_length = float(index.lengths.sum())
+
+        names = arrays["document_names"].tobytes().decode("utf-8")
+        sizes = arrays["document_sizes"].tolist()
+        first_id = 0
+        for name, size in zip(names.split("\0") if names else [], sizes):
+            index.documents[name] = list(range(first_id, first_id + size))
+            index.passage_documents.extend([name] * size)
+            first_id += size
+
+        passage_offsets = arrays["passage_offsets"].tolist()
+        if len(passage_offsets) == first_id + 1:
+            passages = arrays["passages"].tobytes()
+            index.passages = [passages[start:stop].decode("utf-8") for start, stop in zip(passage_offsets, passage_offsets[1:])]
+        else:
+            # Passages non sérialisés : le découpage est déterministe, il est refait depuis les documents
+            for name, passage_ids in index.documents.items():
+                if texts is None or name not in texts:
+                    raise ValueError(f"Texte du document manquant pour reconstruire l'index : {name}")
+                chunks = split_into_chunks(texts[name], index.passage_tokens)
+                if len(chunks) != len(passage_ids):
+                    raise ValueError(f"Le document {name} ne correspond plus à l'index")
+                index.passages.extend(chunks)
+        return index
@@ -0,0 +1,95 @@
+from typing import Any, Dict, Mapping
+
+# Champs de session sauvegardés par simple remplacement
+TRACKED_FIELDS = ("summaries", "current_summaries")
+
+# Compteur incrémenté à chaque effacement de l'historique des messages
+HISTORY_GENERATION_FIELD = "messages_generation"
+
+
+class SessionStore:
+    """Suit l'état persisté d'une session pour n'écrire que ce qui a changé.
+
+    Les fichiers sont ajoutés/retirés individuellement (le texte est stocké une seule
+    fois par empreinte), les messages sont ajoutés en fin de liste (ou remplacés en bloc
+    après `clear_messages`), et les autres champs ne sont réécrits que s'ils ont été
+    modifiés depuis la dernière sauvegarde.
+    """
+
+    def __init__(self, db, session_id: str, user_id: str = "default"):
+        self.db = db
+        self.session_id = session_id
+        self.user_id = user_id
+        self.persisted_files = set()
+        self.persisted_messages = 0
+        self.persisted_generation = 0
+        self.persisted_fields: Dict[str, Any] = {}
+
+    def mark_persisted(self, state: Mapping[str, Any]):
+        """Considère l'état donné comme déjà sauvegardé (après un chargement)"""
+        self.persisted_files = set(state.get("file_texts", {}))
+        self.persisted_messages = len(state.get("messages", []))
+        self.persisted_generation = state.get(HISTORY_GENERATION_FIELD, 0)
+        self.persisted_fields = {field: _snapshot(state.get(field)) for field in TRACKED_FIELDS}
+
+    def clear_messages(self, state):
+        """Vide l'historique ; la prochaine sauvegarde le remplace au lieu de le compléter"""
+        state["messages"] = []
+        state[HISTORY_GENERATION_FIELD] = state.get(HISTORY_GENERATION_FIELD, 0) + 1
+
+    def is_dirty(self, state: Mapping[str, Any]) -> bool:
+        """Indique si l'état diffère de la dernière sauvegarde"""
+        return any(self._delta(state))
+
+    def _delta(self, state: Mapping[str, Any]):
+        """Calcule (champs à remplacer, fichiers ajoutés, fichiers retirés, nouveaux messages)"""
+        file_texts = state.get("file_texts", {})
+        messages = state.get("messages", [])
+
+        set_fields = {
+            field: state.get(field)
+            for field in TRACKED_FIELDS
+            if _snapshot(state.get(field)) != self.persisted_fields.get(field)
+        }
+        add_files = {name: data for name, data in file_texts.items() if name not in self.persisted_files}
+        remove_files = [name for name in self.persisted_files if name not in file_texts]
+
+        if state.get(HISTORY_GENERATION_FIELD, 0) != self.persisted_generation:
+            # Historique effacé depuis la dernière sauvegarde : la liste est remplacée
+            set_fields["messages"] = list(messages)
+            push_messages = []
+        else:
+            push_messages = list(messages[self.persisted_messages:])
+        return set_fields, add_files, remove_files, push_messages
+
+    def flush(self, state: Mapping[str, Any]) -> bool:
+        """Écrit les modifications depuis la dernière sauvegarde.
+
+        Retourne False s'il n'y en avait aucune ou si l'écriture a échoué ; dans ce cas
+        elles restent en attente et seront renvoyées à la prochaine sauvegarde.
+        """
+        set_fields, add_files, remove_files, push_messages = self._delta(state)
+        if not (set_fields or add_files or remove_files or push_messages):
+            return False
+
+        written = self.db.update_session(
+            self.session_id,
+            self.user_id,
+            set_fields=set_fields,
+            add_files=add_files,
+            remove_files=remove_files,
+            push_messages=push_messages
+        )
+        if not written:
+            return False
+        self.mark_persisted(state)
+        return True
+
+
+def _snapshot(value: Any) -> Any:
+    """Copie superficielle permettant de détecter une modification en place"""
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
@@ -0,0 +1,90 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Dict, Optional, Union
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class SessionTokenSigner:
+    """Jetons de session signés (HMAC-SHA256) avec date d'expiration.
+
+    Un jeton `<charge>.<signature>` porte l'utilisateur (`sub`), l'identifiant de session
+    (`sid`), la date de première émission (`iat`), la version des jetons de l'utilisateur
+    (`ver`, incrémentée pour les révoquer) et l'expiration (`exp`, secondes epoch).
+    Un renouvellement repousse `exp` de `ttl_seconds` sans jamais dépasser
+    `iat + max_lifetime_seconds` : un jeton divulgué n'ouvre pas un accès illimité.
+    Un jeton peut être lié (`bnd`) à une valeur que le client présente sans qu'elle
+    figure dans le jeton, par exemple son User-Agent : il n'est alors accepté qu'avec
+    cette même valeur.
+    """
+
+    def __init__(self, secret: Union[str, bytes], ttl_seconds: float, max_lifetime_seconds: Optional[float] = None):
+        self.secret = secret.encode("utf-8") if isinstance(secret, str) else secret
+        self.ttl_seconds = ttl_seconds
+        self.max_lifetime_seconds = max_lifetime_seconds
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self.secret, payload.encode("ascii"), hashlib.sha256).digest())
+
+    @staticmethod
+    def binding_digest(binding: str) -> str:
+        """Empreinte courte de la valeur de liaison, stockée dans le jeton"""
+        return hashlib.sha256(binding.encode("utf-8")).hexdigest()[:16]
+
+    def _encode(self, claims: Dict[str, Any]) -> str:
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        return f"{payload}.{self._sign(payload)}"
+
+    def _claims(self, user_id: str, session_id: str, now: Optional[float], version: int,
+                issued_at: Optional[float]) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        issued_at = now if issued_at is None else issued_at
+        expires_at = now + self.ttl_seconds
+        if self.max_lifetime_seconds is not None:
+            expires_at = min(expires_at, issued_at + self.max_lifetime_seconds)
+        return {"sub": user_id, "sid": session_id, "iat": int(issued_at), "ver": version, "exp": int(expires_at)}
+
+    def issue(self, user_id: str, session_id: str, now: Optional[float] = None, version: int = 0,
+              issued_at: Optional[float] = None, binding: Optional[str] = None) -> str:
+        """Émet un jeton valable `ttl_seconds` secondes, dans la limite de la durée de vie maximale"""
+        claims = self._claims(user_id, session_id, now, version, issued_at)
+        if binding is not None:
+            claims["bnd"] = self.binding_digest(binding)
+        return self._encode(claims)
+
+    def renew(self, claims: Dict[str, Any], now: Optional[float] = None) -> str:
+        """Émet un jeton prolongé pour les mêmes session, version, date d'émission et liaison"""
+        renewed = self._claims(claims["sub"], claims["sid"], now, claims.get("ver", 0), claims["iat"])
+        if "bnd" in claims:
+            renewed["bnd"] = claims["bnd"]
+        return self._encode(renewed)
+
+    def verify(self, token: str, now: Optional[float] = None, binding: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Retourne les informations du jeton, ou None s'il est invalide, expiré ou présenté avec une autre liaison"""
+        try:
+            payload, signature = token.split(".")
+            if not hmac.compare_digest(signature, self._sign(payload)):
+                return None
+            claims = json.loads(_b64decode(payload))
+        except (ValueError, TypeError, UnicodeError):
+            return None
+
+        now = time.time() if now is None else now
+        if not isinstance(claims, dict) or claims.get("exp", 0) <= now:
+            return None
+        if not claims.get("sub") or not claims.get("sid") or "iat" not in claims:
+            return None
+        if self.max_lifetime_seconds is not None and claims["iat"] + self.max_lifetime_seconds <= now:
+            return None
+        if "bnd" in claims and (binding is None or not hmac.compare_digest(claims["bnd"], self.binding_digest(binding))):
+            return None
+        return claims
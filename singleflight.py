@@ -0,0 +1,106 @@
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """Appel en cours, partagé par le premier demandeur et ceux qui l'attendent"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+        self.interrupted = False
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Mutualise les appels identiques simultanés.
+
+    Le premier appel d'une clé exécute la fonction ; les appels de même clé qui
+    arrivent pendant son exécution attendent et reçoivent le même résultat (ou la
+    même exception) au lieu de relancer une requête. Une fois l'appel terminé, la
+    clé est libérée : les appels suivants passent par le cache habituel.
+
+    Seules les exceptions ordinaires (`Exception`) sont partagées. Si le premier appel
+    est interrompu (arrêt ou relance du script Streamlit de sa session), les appels en
+    attente ne reçoivent pas cette interruption : ils réessaient et l'un d'eux prend le
+    relais.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.peak_waiters = 0
+
+    @staticmethod
+    def make_key(model: str, text: str, parameters: Optional[Dict[str, Any]] = None) -> str:
+        """Construit la clé d'un appel d'inférence (modèle, empreinte de l'entrée, paramètres)"""
+        digest = hashlib.sha256(text.encode("utf-8"))
+        digest.update(json.dumps(parameters or {}, sort_keys=True).encode("utf-8"))
+        return f"{model}:{digest.hexdigest()}"
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Exécute `fn`, ou attend le résultat de l'appel de même clé déjà en cours"""
+        with self._lock:
+            self.requests += 1
+
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self.executions += 1
+                else:
+                    call.waiters += 1
+                    self.coalesced += 1
+                    self.peak_waiters = max(self.peak_waiters, call.waiters)
+
+            if leader:
+                return self._lead(key, call, fn)
+
+            call.done.wait()
+            if call.interrupted:
+                # Le premier appel a été interrompu : nouvelle tentative
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+    def _lead(self, key: Hashable, call: _Call, fn: Callable[[], Any]) -> Any:
+        """Exécute `fn` pour tous les appels de la clé, puis libère la clé"""
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException:
+            call.interrupted = True
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """Nombre de clés en cours d'exécution"""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        """Appels reçus, appels réellement exécutés et appels mutualisés"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "saved_ratio": self.coalesced / self.requests if self.requests else 0.0,
+                "peak_waiters": self.peak_waiters,
+                "in_flight": len(self._calls)
+            }
@@ -0,0 +1,179 @@
+import math
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Nombre moyen de tokens BPE par mot (estimation prudente pour le français)
+TOKENS_PER_WORD = 1.5
+
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?…])\s+")
+
+
+class SummarizationError(Exception):
+    """Erreur du service de résumé, dont le message est affichable tel quel"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Estime le nombre de tokens d'un texte à partir du nombre de mots"""
+    return math.ceil(len(text.split()) * TOKENS_PER_WORD)
+
+
+def _split_units(text: str, max_tokens: int) -> List[tuple]:
+    """Découpe un texte en unités (paragraphes, phrases ou fenêtres de mots) sous le budget.
+
+    Chaque unité est un couple (texte, séparateur à placer devant).
+    """
+    max_words = max(1, int(max_tokens / TOKENS_PER_WORD))
+    units = []
+    for paragraph in _PARAGRAPH_SPLIT.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            units.append((paragraph, "\n\n"))
+            continue
+        separator = "\n\n"
+        for sentence in _SENTENCE_SPLIT.split(paragraph):
+            words = sentence.split()
+            for start in range(0, len(words), max_words):
+                units.append((" ".join(words[start:start + max_words]), separator))
+                separator = " "
+    return units
+
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """Découpe un texte en blocs d'au plus `max_tokens` tokens, sur les frontières de paragraphes et de phrases.
+
+    Le découpage est glouton depuis le début du texte : ajouter des pages à la fin d'un
+    document ne modifie que le dernier bloc, les précédents restent identiques (et en cache).
+    """
+    chunks = []
+    current = ""
+    current_tokens = 0
+    for unit, separator in _split_units(text, max_tokens):
+        unit_tokens = estimate_tokens(unit)
+        if current and current_tokens + unit_tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = "", 0
+        current = f"{current}{separator}{unit}" if current else unit
+        current_tokens += unit_tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _final_reduction(combined: str, chunk_tokens: int) -> Tuple[str, int]:
+    """Entrée de la dernière réduction, tronquée au budget d'un bloc, et nombre de blocs écartés"""
+    parts = split_into_chunks(combined, chunk_tokens)
+    return parts[0], len(parts) - 1
+
+
+def summarize_hierarchical(text: str, summarize_fn: Callable[[str], str], chunk_tokens: int = 700,
+                           max_workers: int = 4, max_depth: int = 3) -> str:
+    """Résume un texte long par map-reduce : résumé des blocs en parallèle, puis résumé des résumés.
+
+    `summarize_fn` résume un bloc et lève une exception en cas d'échec ; la première
+    erreur d'un bloc est propagée. Au-delà de `max_depth` niveaux, les résumés
+    intermédiaires sont tronqués au budget d'un bloc : la troncature est journalisée et
+    signalée à la fin du résumé.
+    """
+    chunks = split_into_chunks(text, chunk_tokens)
+    if not chunks:
+        return ""
+    if len(chunks) == 1:
+        return summarize_fn(chunks[0])
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+        summaries = list(executor.map(summarize_fn, chunks))
+
+    combined = "\n\n".join(summaries)
+    if max_depth > 1:
+        return summarize_hierarchical(combined, summarize_fn, chunk_tokens, max_workers, max_depth - 1)
+
+    final_input, dropped = _final_reduction(combined, chunk_tokens)
+    summary = summarize_fn(final_input)
+    if dropped:
+        print(f"Résumé hiérarchique tronqué : {dropped} bloc(s) de résumés intermédiaires écartés (profondeur maximale atteinte)")
+        summary += f"\n\n_(Résumé partiel : document trop long, {dropped} partie(s) des résumés intermédiaires non prises en compte)_"
+    return summary
+
+
+def summary_inputs(text: str, lookup: Callable[[str], Optional[str]], chunk_tokens: int = 700,
+                   max_depth: int = 3) -> List[str]:
+    """Blocs que summarize_hierarchical soumet à `summarize_fn`, à tous les niveaux de réduction.
+
+    `lookup(bloc)` retourne le résumé déjà calculé (en cache) ou None ; l'exploration
+    s'arrête au premier niveau incomplet, les niveaux suivants n'ayant pas pu être calculés.
+    """
+    inputs = []
+    while True:
+        chunks = split_into_chunks(text, chunk_tokens)
+        if len(chunks) <= 1:
+            return inputs + chunks
+        inputs.extend(chunks)
+        summaries = [lookup(chunk) for chunk in chunks]
+        if any(summary is None for summary in summaries):
+            return inputs
+        combined = "\n\n".join(summaries)
+        if max_depth <= 1:
+            return inputs + [_final_reduction(combined, chunk_tokens)[0]]
+        text, max_depth = combined, max_depth - 1
+
+
+def summarize_documents(texts: Dict[str, str], summarize_fn: Callable[[str], str],
+                        max_workers: int = 4, timeout: Optional[float] = None,
+                        on_result: Optional[Callable[[str, int, int], None]] = None,
+                        fallback: Optional[Callable[[str, str], str]] = None,
+                        on_wait: Optional[Callable[[], None]] = None, poll_interval: float = 1.0) -> Dict[str, str]:
+    """Résume plusieurs documents en parallèle avec un nombre borné de requêtes simultanées.
+
+    Retourne les résumés dans l'ordre d'origine de `texts`. Un document en erreur ou qui
+    dépasse `timeout` (délai global du lot, en secondes) reçoit un message d'erreur sans
+    bloquer les autres, ou `fallback(texte, message)` si elle est fournie.
+    `on_result(nom, traites, total)` est appelé dans le thread appelant à chaque résumé
+    terminé, `on_wait()` toutes les `poll_interval` secondes sans nouveau résumé.
+    """
+    def failed(name: str, message: str) -> str:
+        return fallback(texts[name], message) if fallback is not None else message
+
+    if not texts:
+        return {}
+
+    results = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(texts))))
+    futures = {executor.submit(summarize_fn, text): name for name, text in texts.items()}
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pending = set(futures)
+    try:
+        while pending:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError()
+            if on_wait is not None:
+                remaining = poll_interval if remaining is None else min(remaining, poll_interval)
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done and on_wait is not None:
+                on_wait()
+            for future in done:
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except SummarizationError as e:
+                    results[name] = failed(name, str(e))
+                except Exception as e:
+                    results[name] = failed(name, f"Erreur lors du résumé : {e}")
+                if on_result is not None:
+                    on_result(name, len(results), len(texts))
+    except TimeoutError:
+        for future, name in futures.items():
+            if name not in results:
+                future.cancel()
+                results[name] = failed(name, "Le résumé a dépassé le délai imparti. Veuillez réessayer.")
+    finally:
+        # Les requêtes encore en vol terminent en arrière-plan sans retenir l'interface
+        executor.shutdown(wait=False)
+
+    return {name: results[name] for name in texts}
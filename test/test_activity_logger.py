@@ -0,0 +1,71 @@
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from pymongo.errors import BulkWriteError
+
+from activity_logger import ActivityLogger
+
+
+class RecordingCollection:
+    def __init__(self, delay=None):
+        self.batches = []
+        self.release = threading.Event()
+        if delay is None:
+            self.release.set()
+
+    def insert_many(self, documents, ordered=True):
+        self.release.wait()
+        self.batches.append(list(documents))
+
+
+def test_logger_batches_and_flushes():
+    collection = RecordingCollection()
+    logger = ActivityLogger(collection, batch_size=10, flush_interval=60)
+    for i in range(25):
+        logger.log({"activity_type": "question_asked", "index": i})
+
+    assert logger.flush(timeout=2)
+    logger.close()
+
+    assert [len(batch) for batch in collection.batches] == [10, 10, 5]
+    assert logger.stats()["flushed"] == 25
+
+
+def test_logger_drops_oldest_when_full():
+    collection = RecordingCollection(delay=True)
+    logger = ActivityLogger(collection, max_queue_size=3, batch_size=100, flush_interval=60)
+    for i in range(5):
+        logger.log({"index": i})
+
+    assert logger.stats()["dropped"] == 2
+    collection.release.set()
+    logger.close()
+    assert [entry["index"] for entry in collection.batches[0]] == [2, 3, 4]
+
+
+class PartiallyFailingCollection:
+    def insert_many(self, documents, ordered=True):
+        raise BulkWriteError({
+            "writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}],
+            "nInserted": len(documents) - 1
+        })
+
+
+def test_logger_reports_only_inserted_entries_on_partial_failure():
+    flushed = []
+    logger = ActivityLogger(PartiallyFailingCollection(), batch_size=3, flush_interval=60, on_flush=flushed.extend)
+    for i in range(3):
+        logger.log({"index": i})
+
+    assert logger.flush(timeout=2)
+    logger.close()
+
+    assert [entry["index"] for entry in flushed] == [0, 2]
+    assert logger.stats()["flushed"] == 2
+    assert logger.stats()["failed"] == 1
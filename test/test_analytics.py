@@ -0,0 +1,26 @@
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from analytics import rollup_increments
+
+
+def test_rollup_increments_group_by_user_and_day():
+    entries = [
+        {"timestamp": datetime(2024, 1, 1, 9), "activity_type": "file_uploaded", "user_id": "a@x.fr",
+         "details": {"pages": 10, "words": 500}},
+        {"timestamp": datetime(2024, 1, 1, 18), "activity_type": "question_asked", "user_id": "a@x.fr", "details": {}},
+        {"timestamp": datetime(2024, 1, 2, 8), "activity_type": "question_asked", "user_id": "a@x.fr", "details": {}},
+        {"timestamp": datetime(2024, 1, 1, 9), "activity_type": "manual_save", "user_id": "a@x.fr", "details": {}},
+    ]
+
+    increments = rollup_increments(entries)
+
+    assert dict(increments[("a@x.fr", "2024-01-01")]) == {"file_uploaded": 1, "pages": 10, "words": 500, "question_asked": 1}
+    assert dict(increments[("a@x.fr", "2024-01-02")]) == {"question_asked": 1}
+    assert len(increments) == 2
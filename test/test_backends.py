@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from backends import BackendChain, HuggingFaceBackend, LocalExtractiveBackend, StubBackend
+from inference_scheduler import InferenceScheduler
+from summarization import SummarizationError
+
+
+class FailingBackend:
+    """Backend toujours en échec, qui compte ses appels"""
+
+    name = "failing"
+
+    def __init__(self):
+        self.calls = 0
+
+    def summarize(self, text):
+        self.calls += 1
+        raise SummarizationError("service indisponible")
+
+
+def test_chain_falls_back_and_skips_failed_backend_during_cooldown():
+    failing = FailingBackend()
+    chain = BackendChain([failing, StubBackend(summary_words=3)], cooldown_seconds=60)
+
+    assert chain.summarize("un deux trois quatre") == "un deux trois"
+    assert chain.summarize("cinq six sept huit") == "cinq six sept"
+    assert failing.calls == 1
+    stats = chain.stats()
+    assert stats["fallbacks"] == 1
+    assert stats["unavailable"] == ["failing"]
+
+
+def test_chain_retries_every_backend_when_all_are_unavailable():
+    failing = FailingBackend()
+    chain = BackendChain([failing], cooldown_seconds=60)
+    for _ in range(2):
+        try:
+            chain.summarize("texte")
+        except SummarizationError:
+            pass
+    assert failing.calls == 2
+
+
+def test_local_backend_answers_from_matching_sentences():
+    context = "Le chiffre d'affaires a progressé de 12 %. La météo était clémente. Les marges restent stables."
+    answer = LocalExtractiveBackend(answer_sentences=1).answer("Comment évolue le chiffre d'affaires ?", context)
+    assert "12 %" in answer
+    assert "météo" not in answer
+
+
+def test_saturated_queue_falls_back_without_marking_backend_unavailable():
+    scheduler = InferenceScheduler(max_concurrency=1, timeout=0.01)
+    blocker = scheduler.acquire("alice")
+    backend = HuggingFaceBackend(client=None, base_url="http://stub", summary_model="bart", chat_model="mistral",
+                                 scheduler=scheduler)
+    chain = BackendChain([backend, StubBackend(summary_words=2)], cooldown_seconds=60)
+
+    assert chain.summarize("un deux trois") == "un deux"
+    scheduler.release(blocker)
+
+    stats = chain.stats()
+    assert stats["unavailable"] == []
+    assert stats["failures"]["huggingface"] == 0
+    assert stats["queue_timeouts"] == 1
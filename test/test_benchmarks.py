@@ -0,0 +1,35 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks"))
+
+import pytest
+
+pytest.importorskip("PyPDF2")
+requests = pytest.importorskip("requests")
+
+from corpus import make_corpus
+from extraction import extract_pdf
+from stub_server import StubInferenceServer
+
+
+def test_synthetic_corpus_is_extractable():
+    corpus = make_corpus(1, profiles=[("note", 3, 40)], seed=1)
+
+    result = extract_pdf(corpus["note_1.pdf"], min_parallel_pages=1000)
+
+    assert result["num_pages"] == 3
+    assert result["num_words"] >= 30
+
+
+def test_stub_server_mimics_models_and_injects_errors():
+    with StubInferenceServer(latency_ms=0, jitter_ms=0, error_rate=1.0, error_statuses=(503,)) as failing:
+        response = requests.post(f"{failing.base_url}/facebook/bart-large-cnn", json={"inputs": "a b"})
+        assert response.status_code == 503 and response.headers["Retry-After"] == "0"
+
+    with StubInferenceServer(latency_ms=0, jitter_ms=0, summary_words=2) as server:
+        summary = requests.post(f"{server.base_url}/facebook/bart-large-cnn", json={"inputs": "un deux trois"}).json()
+        answer = requests.post(f"{server.base_url}/mistralai/Mistral-7B-Instruct-v0.3", json={"inputs": "question"}).json()
+
+    assert summary == [{"summary_text": "un deux"}]
+    assert "generated_text" in answer[0]
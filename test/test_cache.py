@@ -0,0 +1,58 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from cache import LRUCache, ExtractionCache, SummaryCache, content_hash
+
+
+def test_lru_cache_evicts_by_size():
+    cache = LRUCache(max_bytes=10, sizeof=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    cache.get("a")
+    cache.put("c", "xxxx")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "xxxx"
+    assert cache.current_bytes == 8
+    assert cache.stats()["evictions"] == 1
+
+
+def test_extraction_cache_is_content_addressed():
+    cache = ExtractionCache(max_bytes=1024)
+    file_hash = content_hash(b"%PDF-1.4 contrat")
+    cache.put(file_hash, {"text": "Contrat", "num_pages": 1, "num_words": 1})
+
+    assert cache.get(file_hash)["text"] == "Contrat"
+    assert cache.get(content_hash(b"%PDF-1.4 autre")) is None
+
+
+def test_summary_cache_keys_and_invalidation():
+    cache = SummaryCache()
+    key = SummaryCache.make_key("Texte du contrat", "facebook/bart-large-cnn", 1300)
+    other_model = SummaryCache.make_key("Texte du contrat", "autre/modele", 1300)
+    cache.put(key, "Résumé")
+    cache.put(other_model, "Autre résumé")
+
+    assert cache.get(key) == "Résumé"
+    assert cache.get(SummaryCache.make_key("Texte du contrat", "facebook/bart-large-cnn", 500)) is None
+    assert cache.invalidate("Texte du contrat") == 2
+    assert cache.get(key) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_summary_cache_peek_leaves_counters_and_recency_alone():
+    cache = SummaryCache(max_bytes=2 * (len("Résumé".encode("utf-8")) + 64))
+    first = SummaryCache.make_key("Premier bloc", "facebook/bart-large-cnn", 1300)
+    second = SummaryCache.make_key("Second bloc", "facebook/bart-large-cnn", 1300)
+    cache.put(first, "Résumé")
+    cache.put(second, "Résumé")
+
+    assert cache.peek(first) == "Résumé"
+    assert cache.peek(SummaryCache.make_key("Absent", "facebook/bart-large-cnn", 1300)) is None
+    assert (cache.hits, cache.misses) == (0, 0)
+
+    # Le premier bloc reste le plus ancien : c'est lui qui est évincé
+    cache.put(SummaryCache.make_key("Troisième bloc", "facebook/bart-large-cnn", 1300), "Résumé")
+    assert cache.peek(first) is None
+    assert cache.peek(second) == "Résumé"
@@ -0,0 +1,64 @@
+import sys
+import os
+import json
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from chat_stream import TokenStream, iter_sse_data
+
+
+class StreamingResponse:
+    """Réponse SSE simulée ; `gate` retient les événements après le premier"""
+
+    def __init__(self, tokens, gate=None):
+        self.headers = {"Content-Type": "text/event-stream"}
+        self.tokens = tokens
+        self.gate = gate
+        self.closed = threading.Event()
+
+    def iter_lines(self):
+        for index, text in enumerate(self.tokens):
+            if index and self.gate is not None:
+                self.gate.wait()
+                if self.closed.is_set():
+                    raise ConnectionError("connexion fermée")
+            yield ("data: " + json.dumps({"token": {"text": text, "special": False}})).encode()
+            yield b""
+        yield b"data: " + json.dumps({"token": {"text": "</s>", "special": True}}).encode()
+        yield b""
+
+    def close(self):
+        self.closed.set()
+        if self.gate is not None:
+            self.gate.set()
+
+
+def test_iter_sse_data_groups_multiline_events_and_skips_comments():
+    lines = [b": keep-alive", b"data: un", b"data: deux", b"", b"event: fin", b"data:trois"]
+
+    assert list(iter_sse_data(lines)) == ["un\ndeux", "trois"]
+
+
+def test_token_stream_yields_tokens_and_records_metrics():
+    stream = TokenStream(StreamingResponse(["Le", " contrat", " expire"]), poll_interval=0.01)
+
+    with stream:
+        answer = "".join(stream)
+
+    stats = stream.stats()
+    assert answer == "Le contrat expire"
+    assert stats["tokens"] == 3 and stats["ttft_ms"] is not None and not stats["cancelled"]
+
+
+def test_cancel_stops_generation_while_waiting_for_tokens():
+    response = StreamingResponse(["Le", " contrat"], gate=threading.Event())
+    stream = TokenStream(response, poll_interval=0.01)
+
+    received = []
+    for token in stream:
+        received.append(token)
+        if token == "":
+            stream.cancel()
+
+    assert "".join(received) == "Le"
+    assert response.closed.is_set() and stream.stats()["cancelled"]
@@ -0,0 +1,280 @@
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+pytest.importorskip("pymongo")
+mongomock = pytest.importorskip("mongomock")
+
+from pymongo.errors import OperationFailure
+
+from config import Config
+from utils import (DatabaseManager, INDEX_SPECS, LOG_DETAIL_FIELDS, OBSOLETE_INDEXES,
+                   decode_log_cursor, encode_log_cursor)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def manager():
+    manager = DatabaseManager(mongomock.MongoClient(), start_background_jobs=False)
+    yield manager
+    manager.close_connection()
+
+
+def test_tools_connect_without_background_jobs(manager):
+    assert manager.db is not None and manager.analytics is not None
+    assert manager.activity_logger is None
+    assert manager._retention_thread is None
+
+
+def test_ensure_indexes_matches_the_specs(manager):
+    manager.db.activity_logs.create_index([("user_id", 1), ("timestamp", -1)], name="user_id_timestamp")
+
+    created = manager.ensure_indexes()
+
+    assert created == [f"{collection}.{options['name']}" for collection, _, options in INDEX_SPECS]
+    for collection, keys, options in INDEX_SPECS:
+        index = manager.db[collection].index_information()[options["name"]]
+        assert index["key"] == keys
+        assert index.get("unique", False) == options.get("unique", False)
+        assert index.get("expireAfterSeconds") == options.get("expireAfterSeconds")
+    for collection, name in OBSOLETE_INDEXES:
+        assert name not in manager.db[collection].index_information()
+
+    # Idempotent
+    assert manager.ensure_indexes() == created
+
+
+def test_ttl_specs_follow_the_configured_retention():
+    options = {f"{collection}.{options['name']}": options for collection, _, options in INDEX_SPECS}
+    assert options["activity_logs.timestamp_ttl"]["expireAfterSeconds"] == Config.LOG_RETENTION_DAYS * 24 * 3600
+    assert options["sessions_archive.archived_at_ttl"]["expireAfterSeconds"] == Config.SESSION_ARCHIVE_RETENTION_DAYS * 24 * 3600
+
+
+class ConflictingCollection:
+    """Collection dont les index TTL existent déjà avec une autre durée"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def create_index(self, keys, **options):
+        if "expireAfterSeconds" in options:
+            raise OperationFailure("IndexOptionsConflict", code=85)
+        return options["name"]
+
+    def index_information(self):
+        return {}
+
+
+class ConflictingDatabase:
+    def __init__(self):
+        self.commands = []
+
+    def __getitem__(self, name):
+        return ConflictingCollection(name)
+
+    def command(self, name, collection, **options):
+        self.commands.append((name, collection, options))
+
+
+def test_changed_ttl_updates_the_existing_index_with_collmod(manager):
+    manager.db = ConflictingDatabase()
+
+    created = manager.ensure_indexes()
+
+    ttl_specs = [(collection, keys, options) for collection, keys, options in INDEX_SPECS if "expireAfterSeconds" in options]
+    assert manager.db.commands == [
+        ("collMod", collection, {"index": {"keyPattern": dict(keys), "expireAfterSeconds": options["expireAfterSeconds"]}})
+        for collection, keys, options in ttl_specs
+    ]
+    assert len(created) == len(INDEX_SPECS)
+
+
+class ExplainedCursor:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def limit(self, count):
+        return self
+
+    def sort(self, keys):
+        return self
+
+    def explain(self):
+        return {"queryPlanner": {"winningPlan": self.plan},
+                "executionStats": {"totalDocsExamined": 1, "totalKeysExamined": 1}}
+
+
+class ExplainedCollection:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def find(self, query):
+        return ExplainedCursor(self.plan)
+
+
+class ExplainedDatabase:
+    """Retourne un plan indexé pour les utilisateurs, un parcours complet trié en mémoire ailleurs"""
+
+    def __getitem__(self, name):
+        if name == "users":
+            return ExplainedCollection({"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "email_unique"}})
+        return ExplainedCollection({"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}})
+
+
+def test_explain_hot_queries_reports_index_usage(manager):
+    manager.db = ExplainedDatabase()
+
+    reports = {report["query"]: report for report in manager.explain_hot_queries()}
+
+    assert reports["get_user_by_email"]["uses_index"] is True
+    assert reports["get_user_by_email"]["index"] == "email_unique"
+    assert reports["get_user_by_email"]["in_memory_sort"] is False
+    assert reports["get_logs_page"]["uses_index"] is False
+    assert reports["get_logs_page"]["in_memory_sort"] is True
+    assert reports["get_logs_page"]["stages"] == ["SORT", "COLLSCAN"]
+
+
+def expired_session(session_id):
+    return {
+        "session_id": session_id,
+        "user_id": "a@x.fr",
+        "last_updated": datetime.now() - timedelta(hours=Config.SESSION_TIMEOUT_HOURS + 1),
+        "messages": [{"role": "user", "content": "Bonjour"}],
+        "summaries": ["Résumé"]
+    }
+
+
+def test_archived_session_round_trip(manager):
+    manager.db.sessions.insert_one(expired_session("s1"))
+    manager.db.sessions.insert_one(dict(expired_session("s2"), last_updated=datetime.now()))
+    manager.db.search_indexes.insert_one({"session_id": "s1", "index": b"..."})
+
+    assert manager.archive_expired_sessions() == 1
+    assert manager.db.sessions.find_one({"session_id": "s1"}) is None
+    assert manager.db.sessions.find_one({"session_id": "s2"}) is not None
+    assert manager.db.search_indexes.count_documents({}) == 0
+    assert manager.db.sessions_archive.find_one({"session_id": "s1"})["user_id"] == "a@x.fr"
+
+    before = datetime.now()
+    restored = manager.restore_archived_session("s1")
+
+    assert restored["messages"] == [{"role": "user", "content": "Bonjour"}]
+    assert restored["summaries"] == ["Résumé"]
+    assert restored["last_updated"] >= before
+    assert manager.db.sessions.find_one({"session_id": "s1"})["messages"] == restored["messages"]
+    assert manager.db.sessions_archive.count_documents({}) == 0
+    assert manager.restore_archived_session("s1") is None
+
+
+def test_session_modified_during_archiving_is_kept(manager):
+    manager.db.sessions.insert_one(expired_session("s1"))
+    archive_update = manager.db.sessions_archive.update_one
+
+    def update_then_touch_session(*args, **kwargs):
+        # Écriture concurrente entre la lecture de la session et sa suppression
+        manager.db.sessions.update_one({"session_id": "s1"}, {"$set": {"last_updated": datetime.now()}})
+        return archive_update(*args, **kwargs)
+
+    manager.db.sessions_archive.update_one = update_then_touch_session
+
+    assert manager.archive_expired_sessions() == 0
+    assert manager.db.sessions.find_one({"session_id": "s1"}) is not None
+
+
+def test_retention_job_archives_batches_until_none_are_left(manager):
+    results = iter([100, 100, 3, 0])
+    calls = []
+
+    def archive_batch():
+        calls.append(1)
+        return next(results)
+
+    manager.archive_expired_sessions = archive_batch
+    manager.start_retention_job()
+    try:
+        wait_until(lambda: len(calls) == 4)
+        # Le passage suivant n'a lieu qu'après RETENTION_INTERVAL_MINUTES
+        time.sleep(0.05)
+        assert len(calls) == 4
+    finally:
+        manager._retention_stop.set()
+        manager._retention_thread.join(5)
+    assert not manager._retention_thread.is_alive()
+
+
+def insert_logs(manager):
+    """25 logs sur 5 horodatages identiques deux à deux, pour deux utilisateurs"""
+    base = datetime(2026, 10, 1, 12, 0, 0)
+    logs = []
+    for index in range(25):
+        logs.append({
+            "timestamp": base + timedelta(minutes=index // 5),
+            "activity_type": "question_asked" if index % 2 else "file_uploaded",
+            "user_id": "a@x.fr" if index % 3 else "b@x.fr",
+            "details": {"question": f"q{index}", "filename": f"f{index}.pdf", "context": "texte complet", "token": "secret"}
+        })
+    manager.db.activity_logs.insert_many(logs)
+    return sorted(logs, key=lambda log: (log["timestamp"], log["_id"]), reverse=True)
+
+
+def walk_pages(manager, page_size, **filters):
+    pages = []
+    cursor = None
+    while True:
+        logs, cursor = manager.get_logs_page(page_size=page_size, cursor=cursor, **filters)
+        pages.append(logs)
+        if cursor is None:
+            return pages
+
+
+def test_logs_pages_cover_every_entry_once_despite_tied_timestamps(manager):
+    expected = insert_logs(manager)
+
+    pages = walk_pages(manager, page_size=4)
+
+    assert [len(page) for page in pages] == [4, 4, 4, 4, 4, 4, 1]
+    assert [log["_id"] for page in pages for log in page] == [log["_id"] for log in expected]
+
+
+def test_logs_pages_apply_filters(manager):
+    expected = insert_logs(manager)
+    start, end = datetime(2026, 10, 1, 12, 1), datetime(2026, 10, 1, 12, 4)
+
+    pages = walk_pages(manager, page_size=3, user_id="a@x.fr", activity_types=["question_asked"], start=start, end=end)
+
+    assert [log["_id"] for page in pages for log in page] == [
+        log["_id"] for log in expected
+        if log["user_id"] == "a@x.fr" and log["activity_type"] == "question_asked" and start <= log["timestamp"] < end
+    ]
+
+
+def test_logs_pages_return_only_whitelisted_fields(manager):
+    insert_logs(manager)
+
+    logs, _ = manager.get_logs_page(page_size=25)
+
+    for log in logs:
+        assert set(log) == {"_id", "timestamp", "activity_type", "details"}
+        assert set(log["details"]) <= set(LOG_DETAIL_FIELDS)
+        assert set(log["details"]) == {"question", "filename"}
+
+
+def test_invalid_log_cursor_returns_an_empty_page(manager):
+    expected = insert_logs(manager)
+    cursor = encode_log_cursor(expected[3])
+    assert decode_log_cursor(cursor) == (expected[3]["timestamp"], expected[3]["_id"])
+
+    for tampered in ["n'importe quoi", cursor.replace("|", "|zz"), "2026-13-01T00:00:00|" + str(expected[3]["_id"])]:
+        with pytest.raises(Exception):
+            decode_log_cursor(tampered)
+        assert manager.get_logs_page(page_size=4, cursor=tampered) == ([], None)
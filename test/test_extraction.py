@@ -0,0 +1,34 @@
+import io
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+PyPDF2 = pytest.importorskip("PyPDF2")
+
+from extraction import extract_pdf
+
+
+def make_pdf(num_pages):
+    writer = PyPDF2.PdfWriter()
+    for _ in range(num_pages):
+        writer.add_blank_page(width=200, height=200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("min_parallel_pages", [1000, 2])
+def test_extract_pdf_counts_and_progress(min_parallel_pages):
+    progress = []
+    result = extract_pdf(
+        make_pdf(5),
+        progress_callback=lambda done, total: progress.append((done, total)),
+        max_workers=2,
+        pages_per_task=2,
+        min_parallel_pages=min_parallel_pages
+    )
+    assert result["num_pages"] == 5
+    assert result["num_words"] == len(result["text"].split())
+    assert progress == [(i, 5) for i in range(1, 6)]
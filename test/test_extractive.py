@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import numpy as np
+
+from extractive import SentenceMatrix, split_sentences, summarize_extractive, textrank_scores
+
+
+def test_sparse_similarity_matches_dense_matrix():
+    sentences = [
+        "Le contrat fixe le prix et le délai de livraison.",
+        "Le prix est révisé chaque année selon le contrat.",
+        "La livraison a lieu sous trente jours.",
+        "Aucun rapport avec le reste."
+    ]
+    matrix = SentenceMatrix(sentences)
+    dense = np.zeros((matrix.num_sentences, matrix.num_terms))
+    dense[matrix.rows, matrix.cols] = matrix.values
+    similarities = dense @ dense.T
+    np.fill_diagonal(similarities, 0)
+
+    vector = np.arange(1, 5, dtype=np.float64)
+    assert np.allclose(matrix.similarity_dot(vector), similarities @ vector)
+
+
+def test_textrank_prefers_central_sentences_and_keeps_order():
+    text = ("Le contrat fixe le prix de la prestation. Il pleut sur la ville. "
+            "Le prix du contrat est révisé chaque année. Le chat dort. "
+            "Toute révision du prix est annexée au contrat.")
+    scores = textrank_scores(SentenceMatrix(split_sentences(text)))
+    assert np.isclose(scores.sum(), 1.0)
+
+    summary = summarize_extractive(text, max_sentences=2)
+    assert summary == "Le contrat fixe le prix de la prestation. Le prix du contrat est révisé chaque année."
+
+
+def test_summarize_extractive_handles_many_sentences():
+    text = " ".join(f"Clause {index % 50} du contrat numéro {index % 7} sur le paiement." for index in range(10000))
+    summary = summarize_extractive(text, max_sentences=3)
+    assert len(split_sentences(summary)) == 3
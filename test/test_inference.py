@@ -0,0 +1,46 @@
+import json
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+pytest.importorskip("requests")
+
+from inference import InferenceClient
+
+
+def test_client_retries_503_then_reuses_connection():
+    statuses = [503, 200, 200]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            body = json.dumps([{"summary_text": "ok"}]).encode()
+            self.send_response(statuses.pop(0))
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/models/test"
+
+    client = InferenceClient("cle", max_retries=2, backoff_base=0.01)
+    try:
+        assert client.post(url, {"inputs": "texte"}).status_code == 200
+        assert client.post(url, {"inputs": "texte"}).status_code == 200
+        metrics = client.metrics()
+        assert metrics["retries"] == 1
+        assert metrics["connections_opened"] == 1
+        assert metrics["reuse_ratio"] > 0
+    finally:
+        client.close()
+        server.shutdown()
@@ -0,0 +1,85 @@
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+from inference_scheduler import BULK, INTERACTIVE, InferenceScheduler, QueueTimeout
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_interactive_first_then_round_robin_between_users():
+    scheduler = InferenceScheduler(max_concurrency=1, expected_seconds=2.0)
+    blocker = scheduler.acquire("alice", BULK)
+    served = []
+
+    def call(user_id, priority, label):
+        ticket = scheduler.acquire(user_id, priority, poll_interval=0.01)
+        served.append(label)
+        scheduler.release(ticket)
+
+    requests = [("alice", BULK, "a1"), ("alice", BULK, "a2"), ("alice", BULK, "a3"),
+                ("bob", BULK, "b1"), ("carol", INTERACTIVE, "question")]
+    threads = []
+    for index, request in enumerate(requests):
+        threads.append(threading.Thread(target=call, args=request))
+        threads[-1].start()
+        wait_until(lambda: sum(scheduler.stats()["queued"].values()) == index + 1)
+
+    status = scheduler.user_status("bob")
+    assert status["position"] == 2
+    assert status["estimated_wait"] == pytest.approx(6.0)
+
+    scheduler.release(blocker)
+    for thread in threads:
+        thread.join(5)
+    assert served == ["question", "a1", "b1", "a2", "a3"]
+    assert scheduler.stats()["running"] == 0
+
+
+def test_concurrency_cap_is_shared_by_all_callers():
+    scheduler = InferenceScheduler(max_concurrency=2)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def call(user_id):
+        with scheduler.slot(user_id, BULK):
+            with lock:
+                active.append(user_id)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.remove(user_id)
+
+    threads = [threading.Thread(target=call, args=(f"user{index % 3}",)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert max(peak) == 2
+    assert scheduler.stats()["running"] == 0
+
+
+def test_timeout_and_context_defaults():
+    scheduler = InferenceScheduler(max_concurrency=1, timeout=0.05)
+    blocker = scheduler.acquire("alice", BULK)
+    positions = []
+    with scheduler.context("bob", INTERACTIVE, on_wait=lambda position, wait: positions.append(position)):
+        with pytest.raises(QueueTimeout):
+            scheduler.acquire(poll_interval=0.01)
+    assert positions and positions[0] == 0
+    assert scheduler.stats()["queued"] == {"interactive": 0, "bulk": 0}
+    assert scheduler.stats()["timeouts"] == 1
+
+    scheduler.release(blocker)
+    scheduler.release(blocker)
+    assert scheduler.stats()["running"] == 0
@@ -0,0 +1,45 @@
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from metrics import DatabaseMetrics, LatencyHistogram, PoolMetricsListener
+
+
+def test_latency_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for duration_ms in [0.5] * 90 + [30] * 9 + [1500]:
+        histogram.observe(duration_ms)
+
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == 1
+    assert summary["p95_ms"] == 50
+    assert summary["p99_ms"] == 50
+    assert summary["max_ms"] == 1500
+
+
+def test_pool_counters_are_consistent_across_listener_threads():
+    metrics = DatabaseMetrics()
+    listener = PoolMetricsListener(metrics)
+
+    def churn():
+        for _ in range(2000):
+            listener.connection_created(None)
+            listener.connection_checked_out(None)
+            listener.connection_checked_in(None)
+            listener.connection_closed(None)
+
+    threads = [threading.Thread(target=churn) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    pool = metrics.snapshot()["pool"]
+    assert pool["connections_open"] == 0
+    assert pool["connections_in_use"] == 0
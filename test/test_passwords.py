@@ -0,0 +1,33 @@
+import sys
+import os
+import hashlib
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from passwords import PasswordHasher, hash_password, needs_rehash, parse_hash, verify_password
+
+
+def test_hash_embeds_cost_parameters():
+    stored = hash_password("Secret123", n=2 ** 10, r=4, p=1)
+
+    params, salt, key = parse_hash(stored)
+
+    assert params == {"n": 2 ** 10, "r": 4, "p": 1}
+    assert len(salt) == 16 and len(key) == 32
+    assert verify_password("Secret123", stored)
+    assert not verify_password("secret123", stored)
+    assert needs_rehash(stored, n=2 ** 14, r=8, p=1)
+    assert not needs_rehash(stored, n=2 ** 10, r=4, p=1)
+
+
+def test_legacy_hashes_are_verified_then_upgraded():
+    hasher = PasswordHasher(n=2 ** 10, r=4, p=1, max_concurrency=2)
+    unsalted = hashlib.sha256(b"Secret123").hexdigest()
+    salted = "0" * 32 + "$" + hashlib.sha256(("Secret123" + "0" * 32).encode()).hexdigest()
+
+    for legacy in (unsalted, salted):
+        is_valid, new_hash = hasher.verify_and_update("Secret123", legacy)
+        assert is_valid
+        assert new_hash.startswith("scrypt$") and verify_password("Secret123", new_hash)
+
+    assert hasher.verify_and_update("Wrong123", unsalted) == (False, None)
+    hasher.close()
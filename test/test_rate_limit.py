@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from rate_limit import AuthRateLimiter, TokenBucketLimiter, resolve_client_ip
+
+
+def test_token_bucket_refills_over_time():
+    limiter = TokenBucketLimiter(capacity=2, refill_per_second=0.5)
+
+    assert limiter.allow("ip", now=0) and limiter.allow("ip", now=0)
+    assert not limiter.allow("ip", now=0)
+    assert limiter.retry_after("ip", now=0) == pytest.approx(2.0)
+    assert limiter.allow("ip", now=2)
+
+
+def test_email_limit_applies_across_ips_and_counts_rejections():
+    limiter = AuthRateLimiter(ip_capacity=100, email_capacity=2, email_refill_per_minute=0)
+
+    results = [limiter.check("login", f"10.0.0.{i}", "Victime@x.fr")[0] for i in range(3)]
+
+    assert results == [True, True, False]
+    assert limiter.check("login", "10.0.0.9", "autre@x.fr")[0]
+    assert limiter.stats() == {"allowed": 3, "rejected": 1, "login:email": 1}
+
+
+def test_spoofed_forwarded_for_does_not_reset_ip_bucket():
+    limiter = AuthRateLimiter(ip_capacity=2, ip_refill_per_minute=0, email_capacity=100)
+
+    # Connexion directe : l'en-tête falsifié est ignoré
+    ips = [resolve_client_ip("203.0.113.7", f"10.0.0.{i}") for i in range(3)]
+    assert ips == ["203.0.113.7"] * 3
+    assert [limiter.check("login", ip, f"u{i}@x.fr")[0] for i, ip in enumerate(ips)] == [True, True, False]
+
+    # Derrière un proxy de confiance : seule l'entrée ajoutée par le proxy compte
+    assert resolve_client_ip("192.168.0.1", "1.2.3.4, 203.0.113.7", trusted_proxies=1) == "203.0.113.7"
+    assert resolve_client_ip("192.168.0.1", None, trusted_proxies=1) == "192.168.0.1"
@@ -0,0 +1,58 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+from retrieval import PassageIndex
+
+
+def make_index():
+    index = PassageIndex(passage_tokens=60)
+    index.add_document("contrat.pdf", "\n\n".join([
+        "Le présent contrat est conclu pour une durée de trois ans.",
+        "La résiliation anticipée donne lieu à une indemnité de six mois de loyer.",
+        "Le preneur s'engage à entretenir les locaux en bon état."
+    ] + ["Clause générale sans rapport avec la question posée."] * 20))
+    index.add_document("rapport.pdf", "Le chiffre d'affaires annuel progresse de douze pour cent.")
+    return index
+
+
+def test_search_returns_relevant_passage_first():
+    results = make_index().search("Quelle indemnité en cas de résiliation ?", k=3)
+
+    assert results[0][0] == "contrat.pdf"
+    assert "indemnité" in results[0][1]
+
+
+def test_remove_document_updates_index_in_place():
+    index = make_index()
+    index.remove_document("rapport.pdf")
+
+    assert index.search("chiffre d'affaires") == []
+    assert index.search("résiliation")[0][0] == "contrat.pdf"
+
+
+def test_serialized_index_answers_without_retokenizing():
+    index = make_index()
+    index.remove_document("rapport.pdf")
+    restored = PassageIndex.from_bytes(index.to_bytes())
+
+    assert list(restored.documents) == ["contrat.pdf"]
+    assert restored.search("indemnité résiliation") == index.search("indemnité résiliation")
+
+    restored.add_document("rapport.pdf", "Le chiffre d'affaires annuel progresse.")
+    assert restored.search("chiffre d'affaires")[0][0] == "rapport.pdf"
+
+
+def test_index_without_passage_text_is_rebuilt_from_documents():
+    index = make_index()
+    texts = {name: "\n\n".join(index.passages[i] for i in ids) for name, ids in index.documents.items()}
+    data = index.to_bytes(include_passages=False)
+
+    assert len(data) < len(index.to_bytes())
+    restored = PassageIndex.from_bytes(data, texts)
+    assert restored.search("indemnité résiliation") == index.search("indemnité résiliation")
+
+    with pytest.raises(ValueError):
+        PassageIndex.from_bytes(data, {"contrat.pdf": texts["contrat.pdf"]})
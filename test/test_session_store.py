@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from session_store import SessionStore
+
+
+class RecordingDatabase:
+    def __init__(self):
+        self.updates = []
+        self.available = True
+
+    def update_session(self, session_id, user_id="default", **changes):
+        if not self.available:
+            return False
+        self.updates.append(changes)
+        return True
+
+
+def test_flush_writes_only_deltas():
+    db = RecordingDatabase()
+    store = SessionStore(db, "session", "user@example.com")
+    state = {
+        "file_texts": {"contrat.pdf": {"text": "Contrat", "num_pages": 1, "num_words": 1, "hash": "abc"}},
+        "summaries": [],
+        "current_summaries": "",
+        "messages": [{"role": "user", "content": "Bonjour"}]
+    }
+
+    assert store.flush(state)
+    assert list(db.updates[0]["add_files"]) == ["contrat.pdf"]
+
+    state["messages"].append({"role": "assistant", "content": "Bonjour !"})
+    assert store.flush(state)
+    assert db.updates[1] == {
+        "set_fields": {},
+        "add_files": {},
+        "remove_files": [],
+        "push_messages": [{"role": "assistant", "content": "Bonjour !"}]
+    }
+
+    assert not store.flush(state)
+    assert len(db.updates) == 2
+
+
+def test_failed_write_is_retried_on_next_flush():
+    db = RecordingDatabase()
+    store = SessionStore(db, "session", "user@example.com")
+    state = {"file_texts": {}, "summaries": [], "current_summaries": "", "messages": [{"role": "user", "content": "Bonjour"}]}
+
+    db.available = False
+    assert not store.flush(state)
+
+    db.available = True
+    assert store.flush(state)
+    assert db.updates[0]["push_messages"] == [{"role": "user", "content": "Bonjour"}]
+
+
+def test_cleared_history_replaces_stored_messages_even_at_same_length():
+    db = RecordingDatabase()
+    store = SessionStore(db, "session", "user@example.com")
+    state = {"file_texts": {}, "summaries": [], "current_summaries": "",
+             "messages": [{"role": "user", "content": "Ancienne"}, {"role": "assistant", "content": "Réponse"}]}
+    assert store.flush(state)
+
+    store.clear_messages(state)
+    state["messages"].extend([{"role": "user", "content": "Nouvelle"}, {"role": "assistant", "content": "Autre"}])
+    assert store.flush(state)
+
+    assert db.updates[-1]["set_fields"]["messages"][0]["content"] == "Nouvelle"
+    assert db.updates[-1]["push_messages"] == []
@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from session_tokens import SessionTokenSigner
+
+
+def test_token_round_trip_and_expiry():
+    signer = SessionTokenSigner("secret", ttl_seconds=3600)
+    token = signer.issue("a@x.fr", "session-1", now=1000)
+
+    claims = signer.verify(token, now=2000)
+
+    assert claims["sub"] == "a@x.fr" and claims["sid"] == "session-1"
+    assert signer.verify(token, now=1000 + 3600) is None
+
+
+def test_tampered_or_foreign_tokens_are_rejected():
+    signer = SessionTokenSigner("secret", ttl_seconds=3600)
+    token = signer.issue("a@x.fr", "session-1", now=1000)
+    payload, signature = token.split(".")
+    forged = SessionTokenSigner("autre", ttl_seconds=3600).issue("b@x.fr", "session-1", now=1000)
+
+    assert signer.verify(forged.split(".")[0] + "." + signature, now=2000) is None
+    assert signer.verify(forged, now=2000) is None
+    assert signer.verify(payload, now=2000) is None
+    assert signer.verify("pas un jeton", now=2000) is None
+
+
+def test_renewal_cannot_extend_past_max_lifetime():
+    signer = SessionTokenSigner("secret", ttl_seconds=3600, max_lifetime_seconds=5000)
+    token = signer.issue("a@x.fr", "session-1", now=1000)
+
+    renewed = signer.renew(signer.verify(token, now=4000), now=4000)
+
+    assert signer.verify(renewed, now=5900)["iat"] == 1000
+    assert signer.verify(renewed, now=6000) is None
+
+
+def test_bound_token_requires_the_same_binding_after_renewal():
+    signer = SessionTokenSigner("secret", ttl_seconds=3600)
+    token = signer.issue("a@x.fr", "session-1", now=1000, binding="Mozilla/5.0 Firefox")
+
+    assert signer.verify(token, now=1500) is None
+    assert signer.verify(token, now=1500, binding="curl/8.0") is None
+    claims = signer.verify(token, now=1500, binding="Mozilla/5.0 Firefox")
+
+    renewed = signer.renew(claims, now=1500)
+    assert signer.verify(renewed, now=4000, binding="curl/8.0") is None
+    assert signer.verify(renewed, now=4000, binding="Mozilla/5.0 Firefox")["exp"] == 5100
+
+
+class VersionStore:
+    """Base minimale : profils et versions de jetons en mémoire"""
+
+    def __init__(self):
+        self.versions = {"a@x.fr": 0}
+        self.lookups = 0
+
+    def get_user_by_email(self, email):
+        self.lookups += 1
+        return {"_id": 1, "email": email, "full_name": "A", "token_version": self.versions[email]}
+
+    def increment_token_version(self, email):
+        self.versions[email] += 1
+        return True
+
+
+def test_revoked_tokens_no_longer_restore_the_session():
+    from auth import AuthManager
+
+    store = VersionStore()
+    auth_manager = AuthManager(store)
+    token = auth_manager.issue_session_token(store.get_user_by_email("a@x.fr"), "session-1")
+
+    profile, session_id, renewed = auth_manager.restore_session(token)
+    assert profile["email"] == "a@x.fr" and session_id == "session-1"
+
+    auth_manager.revoke_sessions("a@x.fr")
+    assert auth_manager.restore_session(token) is None
+    assert auth_manager.restore_session(renewed) is None
+
+
+def test_restore_uses_one_lookup_then_the_profile_cache():
+    from auth import AuthManager
+
+    store = VersionStore()
+    auth_manager = AuthManager(store)
+    token = auth_manager.issue_session_token(store.get_user_by_email("a@x.fr"), "session-1")
+    store.lookups = 0
+
+    assert auth_manager.restore_session(token) is not None
+    assert store.lookups == 1
+    assert auth_manager.restore_session(token) is not None
+    assert store.lookups == 1
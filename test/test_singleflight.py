@@ -0,0 +1,97 @@
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def summarize():
+        executions.append(1)
+        release.wait(5)
+        return "résumé"
+
+    key = SingleFlight.make_key("facebook/bart-large-cnn", "même document")
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(single_flight.do, key, summarize) for _ in range(5)]
+        wait_until(lambda: single_flight.stats()["requests"] == 5)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ["résumé"] * 5
+    assert len(executions) == 1
+    stats = single_flight.stats()
+    assert stats["executions"] == 1 and stats["coalesced"] == 4
+    assert stats["in_flight"] == 0
+
+
+def test_errors_reach_every_waiter_and_release_the_key():
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("503")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(single_flight.do, "clé", failing)
+        started.wait(5)
+        follower = executor.submit(single_flight.do, "clé", failing)
+        wait_until(lambda: single_flight.stats()["coalesced"] == 1)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
+
+    assert single_flight.do("clé", lambda: "ok") == "ok"
+
+
+class ScriptInterrupted(BaseException):
+    pass
+
+
+def test_interrupted_leader_lets_a_waiter_take_over():
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def interrupted():
+        started.set()
+        release.wait(5)
+        raise ScriptInterrupted()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(single_flight.do, "clé", interrupted)
+        started.wait(5)
+        follower = executor.submit(single_flight.do, "clé", lambda: "résumé")
+        wait_until(lambda: single_flight.stats()["coalesced"] == 1)
+        release.set()
+        with pytest.raises(ScriptInterrupted):
+            leader.result()
+        assert follower.result(timeout=5) == "résumé"
+
+    stats = single_flight.stats()
+    assert stats["requests"] == 2 and stats["executions"] == 2
+    assert stats["in_flight"] == 0
+
+
+def test_key_depends_on_parameters():
+    assert SingleFlight.make_key("m", "texte", {"max_new_tokens": 100}) != SingleFlight.make_key("m", "texte", {"max_new_tokens": 200})
@@ -0,0 +1,80 @@
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from summarization import estimate_tokens, split_into_chunks, summarize_documents, summarize_hierarchical, summary_inputs
+
+
+def test_summarize_documents_runs_concurrently_and_keeps_order():
+    def slow_summary(text):
+        time.sleep(0.2)
+        if text == "erreur":
+            raise ValueError("service indisponible")
+        return text.upper()
+
+    texts = {f"doc{i}.pdf": f"texte {i}" for i in range(5)}
+    texts["cassé.pdf"] = "erreur"
+
+    start = time.perf_counter()
+    results = summarize_documents(texts, slow_summary, max_workers=6)
+
+    assert time.perf_counter() - start < 0.6
+    assert list(results) == list(texts)
+    assert results["doc3.pdf"] == "TEXTE 3"
+    assert "service indisponible" in results["cassé.pdf"]
+
+
+
+def test_summarize_documents_uses_fallback_for_failures_and_timeouts():
+    def summary(text):
+        if text == "erreur":
+            raise ValueError("503")
+        if text == "lent":
+            time.sleep(1)
+        return text
+
+    texts = {"ok.pdf": "ok", "cassé.pdf": "erreur", "lent.pdf": "lent"}
+    results = summarize_documents(texts, summary, timeout=0.3, fallback=lambda text, message: f"extrait de {text}")
+
+    assert results == {"ok.pdf": "ok", "cassé.pdf": "extrait de erreur", "lent.pdf": "extrait de lent"}
+
+def test_split_into_chunks_respects_budget_and_is_stable_on_append():
+    text = "\n\n".join(f"Paragraphe {i}. " + "mot " * 40 for i in range(20))
+    chunks = split_into_chunks(text, 200)
+
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+    appended = split_into_chunks(text + "\n\nAnnexe ajoutée. " + "mot " * 300, 200)
+    assert appended[:len(chunks) - 1] == chunks[:-1]
+
+
+def test_summarize_hierarchical_reduces_chunk_summaries():
+    calls = []
+
+    def fake_summary(chunk):
+        calls.append(chunk)
+        return f"résumé {len(calls)}"
+
+    text = "\n\n".join("phrase " * 100 for _ in range(6))
+    summary = summarize_hierarchical(text, fake_summary, chunk_tokens=200, max_workers=3)
+
+    assert summary.startswith("résumé")
+    assert len(calls) == len(split_into_chunks(text, 200)) + 1
+
+
+
+def test_max_depth_truncation_is_signalled_and_reduce_inputs_are_listed():
+    cache = {}
+
+    def verbose_summary(chunk):
+        # Résumés aussi longs que leur entrée : la réduction ne converge pas
+        cache[chunk] = "résumé " + chunk
+        return cache[chunk]
+
+    text = "\n\n".join(f"paragraphe {i} " + "mot " * 100 for i in range(6))
+    summary = summarize_hierarchical(text, verbose_summary, chunk_tokens=200, max_workers=1, max_depth=1)
+    assert "Résumé partiel" in summary
+
+    # Toutes les entrées soumises au modèle, y compris la réduction finale, sont retrouvées
+    assert sorted(summary_inputs(text, cache.get, chunk_tokens=200, max_depth=1)) == sorted(cache)
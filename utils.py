@@ -1,32 +1,192 @@
 import pymongo
-from datetime import datetime
+import threading
+import time
+import zlib
+import bson
+from bson import ObjectId
+from datetime import datetime, timedelta
 import streamlit as st
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from cache import content_hash
+from config import Config
+from activity_logger import ActivityLogger
+from analytics import UsageAnalytics
+from metrics import CommandMetricsListener, DatabaseMetrics, PoolMetricsListener, timed
+
+# Marge sous la limite de 16 Mo d'un document MongoDB
+MAX_DOCUMENT_BYTES = 15 * 1024 * 1024
+
+# Index créés au démarrage : (collection, clés, options)
+INDEX_SPECS = [
+    ("users", [("email", pymongo.ASCENDING)], {
+        "name": "email_unique",
+        "unique": True,
+        "partialFilterExpression": {"email": {"$exists": True}}
+    }),
+    ("sessions", [("session_id", pymongo.ASCENDING)], {"name": "session_id_unique", "unique": True}),
+    ("activity_logs", [("user_id", pymongo.ASCENDING), ("timestamp", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)], {
+        "name": "user_id_timestamp_id"
+    }),
+    ("search_indexes", [("session_id", pymongo.ASCENDING)], {"name": "session_id_unique", "unique": True}),
+    # Rétention : les logs expirent automatiquement, les sessions inactives sont archivées
+    ("activity_logs", [("timestamp", pymongo.DESCENDING)], {
+        "name": "timestamp_ttl",
+        "expireAfterSeconds": Config.LOG_RETENTION_DAYS * 24 * 3600
+    }),
+    ("sessions", [("last_updated", pymongo.ASCENDING)], {"name": "last_updated"}),
+    ("usage_rollups", [("day", pymongo.ASCENDING), ("user_id", pymongo.ASCENDING)], {"name": "day_user_id"}),
+    ("usage_rollups", [("user_id", pymongo.ASCENDING), ("day", pymongo.ASCENDING)], {"name": "user_id_day"}),
+    ("sessions_archive", [("session_id", pymongo.ASCENDING)], {"name": "session_id_unique", "unique": True}),
+    ("sessions_archive", [("archived_at", pymongo.ASCENDING)], {
+        "name": "archived_at_ttl",
+        "expireAfterSeconds": Config.SESSION_ARCHIVE_RETENTION_DAYS * 24 * 3600
+    }),
+]
+
+# Index remplacés par une version plus complète, supprimés au démarrage : (collection, nom)
+OBSOLETE_INDEXES = [
+    ("activity_logs", "user_id_timestamp"),
+]
+
+# Champs de "details" renvoyés par la pagination des logs
+LOG_DETAIL_FIELDS = ["filename", "pages", "words", "files_count", "question", "error"]
+
+# Requêtes fréquentes vérifiées par explain_hot_queries : (nom, collection, filtre, tri)
+HOT_QUERIES = [
+    ("get_user_by_email", "users", {"email": "diagnostic@example.com"}, None),
+    ("load_session_data", "sessions", {"session_id": "diagnostic"}, None),
+    ("get_recent_logs", "activity_logs", {"user_id": "diagnostic"}, [("timestamp", pymongo.DESCENDING)]),
+    ("get_logs_page", "activity_logs", {"user_id": "diagnostic"}, [("timestamp", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)]),
+]
+
+def _plan_stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Aplatit un plan d'exécution MongoDB en liste d'étapes"""
+    stages = [plan]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
 
 class DatabaseManager:
-    def __init__(self):
-        self.connection_string = st.secrets["mongodb"]["connection_string"]
-        self.client = None
+    def __init__(self, client: Optional[pymongo.MongoClient] = None, start_background_jobs: bool = True):
+        # Un client déjà construit (tests, outils) remplace la connexion configurée dans les secrets
+        self.connection_string = st.secrets["mongodb"]["connection_string"] if client is None else None
+        self.client = client
+        # Sans tâches de fond (outils en ligne de commande) : ni logger asynchrone, ni archivage des sessions
+        self.start_background_jobs = start_background_jobs
         self.db = None
+        self.metrics = DatabaseMetrics()
+        self.activity_logger = None
+        self.analytics = None
+        self._retention_stop = threading.Event()
+        self._retention_thread = None
         self.connect()
     
     def connect(self):
         """Établit la connexion à MongoDB"""
         try:
-            self.client = pymongo.MongoClient(self.connection_string)
+            if self.client is None:
+                self.client = pymongo.MongoClient(
+                    self.connection_string,
+                    maxPoolSize=Config.MONGODB_MAX_POOL_SIZE,
+                    minPoolSize=Config.MONGODB_MIN_POOL_SIZE,
+                    maxIdleTimeMS=Config.MONGODB_MAX_IDLE_TIME_MS,
+                    waitQueueTimeoutMS=Config.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+                    serverSelectionTimeoutMS=Config.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+                    connectTimeoutMS=Config.MONGODB_CONNECT_TIMEOUT_MS,
+                    socketTimeoutMS=Config.MONGODB_SOCKET_TIMEOUT_MS,
+                    w=Config.MONGODB_WRITE_CONCERN,
+                    event_listeners=[CommandMetricsListener(self.metrics), PoolMetricsListener(self.metrics)]
+                )
 
             self.db = self.client.apocalipssi_db
             # Test de connexion
             self.client.admin.command('ping')
             print("Connexion MongoDB réussie")
+            self.ensure_indexes()
+            
+            # Les logs sont écrits en arrière-plan, par lots, et alimentent les agrégats d'utilisation
+            self.analytics = UsageAnalytics(self.db)
+            if not self.start_background_jobs:
+                return
+            self.activity_logger = ActivityLogger(
+                self.db.activity_logs,
+                max_queue_size=Config.LOG_QUEUE_MAX_SIZE,
+                batch_size=Config.LOG_BATCH_SIZE,
+                flush_interval=Config.LOG_FLUSH_INTERVAL,
+                overflow_policy=Config.LOG_OVERFLOW_POLICY,
+                block_timeout=Config.LOG_BLOCK_TIMEOUT,
+                on_flush=self.analytics.record_batch
+            )
+            self.start_retention_job()
         except Exception as e:
             print(f"Erreur de connexion MongoDB: {e}")
             st.error(f"Erreur de connexion à la base de données: {e}")
     
+    def ensure_indexes(self) -> List[str]:
+        """Crée les index nécessaires aux requêtes fréquentes (opération idempotente)"""
+        created = []
+        if self.db is None:
+            return created
+        for collection, keys, options in INDEX_SPECS:
+            try:
+                created.append(f"{collection}.{self.db[collection].create_index(keys, **options)}")
+            except pymongo.errors.OperationFailure as e:
+                # Durée de rétention modifiée dans Config : mise à jour de l'index TTL existant
+                if e.code == 85 and "expireAfterSeconds" in options:
+                    self.db.command("collMod", collection, index={
+                        "keyPattern": dict(keys),
+                        "expireAfterSeconds": options["expireAfterSeconds"]
+                    })
+                    created.append(f"{collection}.{options['name']}")
+                else:
+                    print(f"Erreur lors de la création de l'index {collection}.{options['name']}: {e}")
+            except Exception as e:
+                print(f"Erreur lors de la création de l'index {collection}.{options['name']}: {e}")
+        for collection, name in OBSOLETE_INDEXES:
+            try:
+                if name in self.db[collection].index_information():
+                    self.db[collection].drop_index(name)
+            except Exception as e:
+                print(f"Erreur lors de la suppression de l'index {collection}.{name}: {e}")
+        return created
+    
+    def explain_hot_queries(self) -> List[Dict[str, Any]]:
+        """Analyse le plan d'exécution des requêtes fréquentes et indique si elles utilisent un index"""
+        reports = []
+        if self.db is None:
+            return reports
+        for name, collection, query, sort in HOT_QUERIES:
+            try:
+                cursor = self.db[collection].find(query).limit(Config.MAX_LOG_ENTRIES)
+                if sort:
+                    cursor = cursor.sort(sort)
+                explanation = cursor.explain()
+                stages = _plan_stages(explanation["queryPlanner"]["winningPlan"])
+                stage_names = [stage.get("stage") for stage in stages]
+                index_names = [stage["indexName"] for stage in stages if "indexName" in stage]
+                execution = explanation.get("executionStats", {})
+                reports.append({
+                    "query": name,
+                    "collection": collection,
+                    "stages": stage_names,
+                    "index": index_names[0] if index_names else None,
+                    "uses_index": "IXSCAN" in stage_names and "COLLSCAN" not in stage_names,
+                    "in_memory_sort": "SORT" in stage_names,
+                    "docs_examined": execution.get("totalDocsExamined"),
+                    "keys_examined": execution.get("totalKeysExamined")
+                })
+            except Exception as e:
+                reports.append({"query": name, "collection": collection, "error": str(e)})
+        return reports
+    
     def get_current_timestamp(self):
         """Retourne le timestamp actuel"""
         return datetime.now()
     
+    @timed("create_user")
     def create_user(self, user_data: Dict[str, Any]) -> bool:
         """Crée un nouvel utilisateur"""
         try:
@@ -41,6 +201,7 @@ class DatabaseManager:
             print(f"Erreur lors de la création de l'utilisateur: {e}")
             return False
     
+    @timed("get_user_by_email")
     def get_user_by_email(self, email: str) -> Dict[str, Any]:
         """Récupère un utilisateur par son email"""
         try:
@@ -53,6 +214,7 @@ class DatabaseManager:
             print(f"Erreur lors de la récupération de l'utilisateur: {e}")
             return None
     
+    @timed("update_last_login")
     def update_last_login(self, user_id) -> bool:
         """Met à jour la dernière connexion d'un utilisateur"""
         try:
@@ -68,6 +230,36 @@ class DatabaseManager:
             print(f"Erreur lors de la mise à jour de la dernière connexion: {e}")
             return False
     
+    @timed("increment_token_version")
+    def increment_token_version(self, email: str) -> bool:
+        """Invalide les jetons de session émis jusqu'ici pour un utilisateur"""
+        try:
+            if self.db is not None:
+                result = self.db.users.update_one({"email": email}, {"$inc": {"token_version": 1}})
+                return result.modified_count > 0
+            else:
+                return False
+        except Exception as e:
+            print(f"Erreur lors de la révocation des jetons: {e}")
+            return False
+    
+    @timed("update_password_hash")
+    def update_password_hash(self, user_id, old_hash: str, new_hash: str) -> bool:
+        """Remplace le hachage du mot de passe s'il n'a pas été modifié entre-temps"""
+        try:
+            if self.db is not None:
+                result = self.db.users.update_one(
+                    {"_id": user_id, "password": old_hash},
+                    {"$set": {"password": new_hash}}
+                )
+                return result.modified_count > 0
+            else:
+                return False
+        except Exception as e:
+            print(f"Erreur lors de la mise à jour du mot de passe: {e}")
+            return False
+    
+    @timed("log_activity")
     def log_activity(self, activity_type: str, details: Dict[str, Any], user_id: str = "default"):
         """Enregistre une activité dans la base de données"""
         try:
@@ -78,18 +270,22 @@ class DatabaseManager:
                 "details": details
             }
             
-            if self.db is not None:
-                self.db.activity_logs.insert_one(log_entry)
-                print(f"Log enregistré: {activity_type} pour utilisateur {user_id}")
+            if self.activity_logger is not None:
+                self.activity_logger.log(log_entry)
             else:
                 print("Base de données non connectée")
                 
         except Exception as e:
             print(f"Erreur lors de l'enregistrement du log: {e}")
     
+    @timed("get_recent_logs")
     def get_recent_logs(self, limit: int = 50, user_id: str = None) -> List[Dict]:
         """Récupère les logs récents"""
+        limit = min(limit, Config.MAX_LOG_ENTRIES)
         try:
+            # Inclure les entrées encore en attente d'écriture
+            if self.activity_logger is not None:
+                self.activity_logger.flush(timeout=1.0)
             if self.db is not None:
                 if user_id:
                     # Logs pour un utilisateur spécifique
@@ -104,42 +300,361 @@ class DatabaseManager:
             print(f"Erreur lors de la récupération des logs: {e}")
             return []
     
+    @timed("get_logs_page")
+    def get_logs_page(self, user_id: str = None, page_size: int = 20, cursor: Optional[str] = None,
+                      activity_types: List[str] = None, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Récupère une page de logs, du plus récent au plus ancien.
+
+        La pagination se fait par clé (timestamp, _id) : `cursor` est la valeur renvoyée
+        pour la page précédente, ce qui évite le coût croissant d'un skip. Seuls les champs
+        affichés sont transférés. Retourne (logs, curseur de la page suivante ou None).
+        """
+        try:
+            if self.activity_logger is not None and cursor is None:
+                self.activity_logger.flush(timeout=1.0)
+            if self.db is None:
+                return [], None
+            
+            query = {}
+            if user_id:
+                query["user_id"] = user_id
+            if activity_types:
+                query["activity_type"] = {"$in": list(activity_types)}
+            if start or end:
+                query["timestamp"] = {}
+                if start:
+                    query["timestamp"]["$gte"] = start
+                if end:
+                    query["timestamp"]["$lt"] = end
+            if cursor:
+                timestamp, last_id = decode_log_cursor(cursor)
+                query["$or"] = [
+                    {"timestamp": {"$lt": timestamp}},
+                    {"timestamp": timestamp, "_id": {"$lt": last_id}}
+                ]
+            
+            projection = {"timestamp": 1, "activity_type": 1}
+            projection.update({f"details.{field}": 1 for field in LOG_DETAIL_FIELDS})
+            results = self.db.activity_logs.find(query, projection).sort(
+                [("timestamp", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)]
+            ).limit(page_size + 1).batch_size(page_size + 1)
+            
+            logs = []
+            for log in results:
+                logs.append(log)
+                if len(logs) > page_size:
+                    break
+            if len(logs) > page_size:
+                logs = logs[:page_size]
+                return logs, encode_log_cursor(logs[-1])
+            return logs, None
+        except Exception as e:
+            print(f"Erreur lors de la récupération des logs: {e}")
+            return [], None
+    
+    def iter_logs(self, page_size: int = 100, **filters) -> Iterator[Dict]:
+        """Parcourt tous les logs correspondant aux filtres, page par page"""
+        cursor = None
+        while True:
+            logs, cursor = self.get_logs_page(page_size=page_size, cursor=cursor, **filters)
+            yield from logs
+            if cursor is None:
+                return
+    
+    @timed("store_document")
+    def store_document(self, file_hash: str, file_data: Dict[str, Any]) -> bool:
+        """Enregistre le texte d'un document une seule fois, référencé par son empreinte"""
+        try:
+            if self.db is not None:
+                compressed = zlib.compress(file_data["text"].encode("utf-8"))
+                if len(compressed) > MAX_DOCUMENT_BYTES:
+                    print(f"Document trop volumineux pour être sauvegardé: {file_hash}")
+                    return False
+                self.db.documents.update_one(
+                    {"_id": file_hash},
+                    {"$setOnInsert": {
+                        "text": compressed,
+                        "num_pages": file_data.get("num_pages", 0),
+                        "num_words": file_data.get("num_words", 0),
+                        "created_at": datetime.now()
+                    }},
+                    upsert=True
+                )
+                return True
+            return False
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde du document: {e}")
+            return False
+    
+    def _session_file_entry(self, file_name: str, file_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Stocke le document et retourne sa référence légère pour la session"""
+        file_hash = file_data.get("hash") or content_hash(file_data["text"].encode("utf-8"))
+        self.store_document(file_hash, file_data)
+        return {
+            "name": file_name,
+            "hash": file_hash,
+            "num_pages": file_data.get("num_pages", 0),
+            "num_words": file_data.get("num_words", 0)
+        }
+    
+    @timed("update_session")
+    def update_session(self, session_id: str, user_id: str = "default", set_fields: Dict[str, Any] = None,
+                       add_files: Dict[str, Dict[str, Any]] = None, remove_files: List[str] = None,
+                       push_messages: List[Dict[str, Any]] = None) -> bool:
+        """Applique uniquement les modifications d'une session (champs, fichiers, nouveaux messages) ; retourne True si elles sont écrites"""
+        try:
+            if self.db is not None:
+                # $pull et $push ne peuvent pas viser le même champ dans une seule mise à jour
+                if remove_files:
+                    self.db.sessions.update_one(
+                        {"session_id": session_id},
+                        {"$pull": {"files": {"name": {"$in": remove_files}}}}
+                    )
+                
+                update = {"$set": {**(set_fields or {}), "user_id": user_id, "last_updated": datetime.now()}}
+                push = {}
+                if add_files:
+                    push["files"] = {"$each": [self._session_file_entry(name, data) for name, data in add_files.items()]}
+                if push_messages:
+                    push["messages"] = {"$each": push_messages}
+                if push:
+                    update["$push"] = push
+                
+                self.db.sessions.update_one({"session_id": session_id}, update, upsert=True)
+                return True
+            else:
+                return False
+        except Exception as e:
+            print(f"Erreur lors de la mise à jour de session: {e}")
+            return False
+    
+    @timed("save_session_data")
     def save_session_data(self, session_id: str, data: Dict[str, Any], user_id: str = "default"):
-        """Sauvegarde les données de session"""
+        """Sauvegarde complète des données de session (les textes sont stockés à part, par empreinte)"""
         try:
             if self.db is not None:
+                files = [self._session_file_entry(name, file_data) for name, file_data in data.get("file_texts", {}).items()]
                 self.db.sessions.update_one(
                     {"session_id": session_id},
                     {"$set": {
-                        "data": data, 
+                        "files": files,
+                        "summaries": data.get("summaries", []),
+                        "current_summaries": data.get("current_summaries", ""),
+                        "messages": data.get("messages", []),
                         "user_id": user_id,
                         "last_updated": datetime.now()
-                    }},
+                    }, "$unset": {"data": ""}},
                     upsert=True
                 )
                 print(f"Session sauvegardée: {session_id} pour utilisateur {user_id}")
         except Exception as e:
             print(f"Erreur lors de la sauvegarde de session: {e}")
     
+    @timed("load_session_data")
     def load_session_data(self, session_id: str) -> Dict[str, Any]:
         """Charge les données de session"""
         try:
             if self.db is not None:
                 session = self.db.sessions.find_one({"session_id": session_id})
+                if session is None:
+                    session = self.restore_archived_session(session_id)
                 if session:
-                    return session.get("data", {})
+                    # Ancien format : tout le contenu dans un seul champ "data", migré au passage
+                    if "data" in session:
+                        self.save_session_data(session_id, session["data"], session.get("user_id", "default"))
+                        return session["data"]
+                    
+                    files = session.get("files", [])
+                    documents = {
+                        document["_id"]: document
+                        for document in self.db.documents.find({"_id": {"$in": [entry["hash"] for entry in files]}})
+                    }
+                    file_texts = {}
+                    for entry in files:
+                        document = documents.get(entry["hash"])
+                        if document is None:
+                            continue
+                        file_texts[entry["name"]] = {
+                            "text": zlib.decompress(document["text"]).decode("utf-8"),
+                            "num_pages": entry["num_pages"],
+                            "num_words": entry["num_words"],
+                            "hash": entry["hash"]
+                        }
+                    return {
+                        "file_texts": file_texts,
+                        "summaries": session.get("summaries", []),
+                        "current_summaries": session.get("current_summaries", ""),
+                        "messages": session.get("messages", [])
+                    }
             return {}
         except Exception as e:
             print(f"Erreur lors du chargement de session: {e}")
             return {}
     
+    @timed("archive_expired_sessions")
+    def archive_expired_sessions(self, batch_size: int = 100) -> int:
+        """Déplace les sessions inactives depuis SESSION_TIMEOUT_HOURS vers l'archive compressée"""
+        archived = 0
+        if self.db is None:
+            return archived
+        cutoff = datetime.now() - timedelta(hours=Config.SESSION_TIMEOUT_HOURS)
+        try:
+            for session in self.db.sessions.find({"last_updated": {"$lt": cutoff}}).limit(batch_size):
+                self.db.sessions_archive.update_one(
+                    {"session_id": session["session_id"]},
+                    {"$set": {
+                        "user_id": session.get("user_id", "default"),
+                        "last_updated": session.get("last_updated"),
+                        "archived_at": datetime.now(),
+                        "payload": zlib.compress(bson.encode(session))
+                    }},
+                    upsert=True
+                )
+                # Ne supprime que si la session n'a pas été modifiée entre-temps
+                result = self.db.sessions.delete_one({"_id": session["_id"], "last_updated": session.get("last_updated")})
+                if result.deleted_count:
+                    self.db.search_indexes.delete_one({"session_id": session["session_id"]})
+                    archived += 1
+            if archived:
+                print(f"{archived} session(s) archivée(s)")
+        except Exception as e:
+            print(f"Erreur lors de l'archivage des sessions: {e}")
+        return archived
+    
+    @timed("restore_archived_session")
+    def restore_archived_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Remet une session archivée dans la collection active"""
+        try:
+            if self.db is not None:
+                archived = self.db.sessions_archive.find_one({"session_id": session_id})
+                if archived:
+                    session = bson.decode(zlib.decompress(archived["payload"]))
+                    session["last_updated"] = datetime.now()
+                    self.db.sessions.replace_one({"session_id": session_id}, session, upsert=True)
+                    self.db.sessions_archive.delete_one({"_id": archived["_id"]})
+                    return session
+            return None
+        except Exception as e:
+            print(f"Erreur lors de la restauration de session archivée: {e}")
+            return None
+    
+    def start_retention_job(self):
+        """Lance l'archivage périodique des sessions inactives en arrière-plan"""
+        if self._retention_thread is not None:
+            return
+        
+        def run():
+            while not self._retention_stop.is_set():
+                # Archive par lots jusqu'à épuisement, puis attend le prochain passage
+                while self.archive_expired_sessions() and not self._retention_stop.is_set():
+                    pass
+                self._retention_stop.wait(Config.RETENTION_INTERVAL_MINUTES * 60)
+        
+        self._retention_thread = threading.Thread(target=run, name="session-retention", daemon=True)
+        self._retention_thread.start()
+    
+    @timed("save_search_index")
+    def save_search_index(self, session_id: str, index_data: bytes, user_id: str = "default") -> bool:
+        """Sauvegarde l'index de recherche sérialisé d'une session ; retourne False s'il n'a pas été écrit"""
+        if len(index_data) > Config.SEARCH_INDEX_MAX_BYTES:
+            print(f"Index de recherche non sauvegardé : {len(index_data)} octets, au-delà de la limite de {Config.SEARCH_INDEX_MAX_BYTES}")
+            return False
+        try:
+            if self.db is not None:
+                self.db.search_indexes.update_one(
+                    {"session_id": session_id},
+                    {"$set": {
+                        "index": index_data,
+                        "user_id": user_id,
+                        "last_updated": datetime.now()
+                    }},
+                    upsert=True
+                )
+                return True
+            return False
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde de l'index de recherche: {e}")
+            return False
+    
+    @timed("load_search_index")
+    def load_search_index(self, session_id: str) -> Optional[bytes]:
+        """Charge l'index de recherche sérialisé d'une session"""
+        try:
+            if self.db is not None:
+                document = self.db.search_indexes.find_one({"session_id": session_id}, {"index": 1})
+                if document:
+                    return bytes(document["index"])
+            return None
+        except Exception as e:
+            print(f"Erreur lors du chargement de l'index de recherche: {e}")
+            return None
+    
+    @timed("get_user_usage")
+    def get_user_usage(self, user_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, int]:
+        """Totaux d'utilisation d'un utilisateur (fichiers, résumés, questions, pages, mots)"""
+        try:
+            if self.analytics is not None:
+                return self.analytics.get_user_usage(user_id, start, end)
+        except Exception as e:
+            print(f"Erreur lors du calcul des statistiques d'utilisation: {e}")
+        return {}
+    
+    @timed("get_daily_usage")
+    def get_daily_usage(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                        user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Totaux d'utilisation par jour, pour un utilisateur ou toute la plateforme"""
+        try:
+            if self.analytics is not None:
+                return self.analytics.get_daily_usage(start, end, user_id)
+        except Exception as e:
+            print(f"Erreur lors du calcul des statistiques d'utilisation: {e}")
+        return []
+    
+    def health_check(self) -> Dict[str, Any]:
+        """Mesure la latence d'un ping pour distinguer une base lente d'une base injoignable"""
+        if self.client is None:
+            return {"status": "disconnected", "ping_ms": None}
+        start = time.perf_counter()
+        try:
+            self.client.admin.command('ping')
+            return {"status": "ok", "ping_ms": (time.perf_counter() - start) * 1000}
+        except Exception as e:
+            return {"status": "error", "ping_ms": None, "error": str(e)}
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Retourne les latences par opération, les compteurs par collection et l'état du pool"""
+        metrics = self.metrics.snapshot()
+        metrics["health"] = self.health_check()
+        return metrics
+    
+    def get_log_stats(self) -> Dict[str, int]:
+        """Retourne les compteurs du logger asynchrone"""
+        if self.activity_logger is not None:
+            return self.activity_logger.stats()
+        return {}
+    
     def close_connection(self):
-        """Ferme la connexion MongoDB"""
+        """Écrit les logs en attente puis ferme la connexion MongoDB"""
+        self._retention_stop.set()
+        if self.activity_logger is not None:
+            self.activity_logger.close()
+            self.activity_logger = None
 
         if self.client is not None:
             self.client.close()
+            self.client = None
             print("Connexion MongoDB fermée")
 
+def encode_log_cursor(log_entry: Dict) -> str:
+    """Encode la position (timestamp, _id) d'un log en curseur opaque"""
+    return f"{log_entry['timestamp'].isoformat()}|{log_entry['_id']}"
+
+def decode_log_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Décode un curseur produit par encode_log_cursor"""
+    timestamp, last_id = cursor.split("|", 1)
+    return datetime.fromisoformat(timestamp), ObjectId(last_id)
+
 def format_log_entry(log_entry: Dict) -> str:
     """Formate une entrée de log pour l'affichage"""
     timestamp = log_entry.get("timestamp", "")
@@ -148,5 +663,7 @@ def format_log_entry(log_entry: Dict) -> str:
     
     activity_type = log_entry.get("activity_type", "")
     details = log_entry.get("details", {})
+    if isinstance(details, dict):
+        details = ", ".join(f"{key}: {value}" for key, value in details.items())
     
     return f"**{timestamp}** - {activity_type}: {details}" 
\ No newline at end of file